@@ -8,8 +8,13 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 
 import os
+import time
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fusion_force.settings')
 
-application = get_asgi_application()
\ No newline at end of file
+started = time.perf_counter()
+application = get_asgi_application()
+
+from main.warmup import log_startup  # noqa: E402 (needs the apps loaded)
+log_startup(started)
@@ -1,13 +1,17 @@
 # settings.py - ADD/UPDATE THESE SETTINGS
 import os
 from pathlib import Path
-import dj_database_url
-from dotenv import load_dotenv
-
-load_dotenv()
+from urllib.parse import urlparse
+from main.db_pool import database_config
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Local development reads a .env file; deployments set real environment
+# variables, so they skip importing python-dotenv and searching for one
+if (BASE_DIR / '.env').is_file():
+    from dotenv import load_dotenv
+    load_dotenv(BASE_DIR / '.env')
+
 SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-key-123')
 
 # Keep DEBUG as True for now
@@ -38,12 +42,11 @@ if DEBUG:
         'http://127.0.0.1:8080',
     ])
 
-print(f"✅ CSRF_TRUSTED_ORIGINS: {CSRF_TRUSTED_ORIGINS}")
-
 # Database
 DATABASE_URL = os.environ.get('DATABASE_URL')
 if DATABASE_URL:
-    DATABASES = {'default': dj_database_url.config(default=DATABASE_URL, conn_max_age=600)}
+    # Pooling, health checks etc. are set with query parameters: see main.db_pool.database_config
+    DATABASES = {'default': database_config(DATABASE_URL)}
 else:
     DATABASES = {
         'default': {
@@ -59,7 +62,7 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
-    'django.contrib.staticfiles',
+    'main.apps.StaticFilesConfig',  # django.contrib.staticfiles without the SCSS sources
     'whitenoise.runserver_nostatic',
     'main',
 ]
@@ -67,6 +70,8 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'main.middleware.CompressionMiddleware',
+    'main.middleware.HTMLMinifyMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -77,12 +82,50 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'fusion_force.urls'
 
+# ========== CACHE ==========
+# On disk, so every gunicorn worker shares the content version (main.content)
+# and the page variants cached under it
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_DIR', BASE_DIR / '.cache'),
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    }
+}
+
+# Dynamic responses smaller than this many bytes are sent uncompressed
+COMPRESS_MIN_SIZE = 1024
+COMPRESS_BROTLI_QUALITY = 9
+# Strip comments and collapse whitespace in rendered HTML (main.html)
+HTML_MINIFY = True
+# Stream the homepage section by section (main.views.stream_home), with a
+# Link preload header for the bundles that CDNs can send as 103 Early Hints
+HOME_STREAMING = True
+EARLY_HINTS = True
+# Homepage sections left out of the page and fetched from /fragments/<section>/
+# by static/js/fragments.js as they near the viewport
+LAZY_SECTIONS = ['services', 'gallery', 'testimonials', 'newsletter', 'contact', 'footer']
+# Route the homepage and form endpoints to main.async_views. Only for ASGI
+# workers (gunicorn -k uvicorn.workers.UvicornWorker fusion_force.asgi);
+# under WSGI every async view would be run through its own event loop.
+# bench_http measured the homepage several times slower this way than under
+# the default gthread worker (see main/async_views.py), so leave it off.
+ASGI_VIEWS = os.environ.get('ASGI_VIEWS', '').lower() in ('1', 'true', 'yes')
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Compiled templates are kept for the life of the process (and,
+            # compiled before the fork by main.warmup, shared by the workers);
+            # runserver's autoreloader clears them when a template changes
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -98,16 +141,104 @@ WSGI_APPLICATION = 'fusion_force.wsgi.application'
 # ========== STATIC FILES ==========
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# WhiteNoise's compressed manifest storage, compressing only what changed
+# since the last collectstatic, in STATIC_COMPRESS_WORKERS processes (default:
+# one per CPU). collectstatic runs at build time (bin/post_compile on Heroku,
+# the build command on Railway), not on every boot.
+STATICFILES_STORAGE = 'main.static_storage.IncrementalStaticFilesStorage'
+STATIC_COMPRESS_WORKERS = int(os.environ.get('STATIC_COMPRESS_WORKERS', 0)) or None
 WHITENOISE_MANIFEST_STRICT = False
+STATICFILES_DIRS = [BASE_DIR / 'static']
+STATICFILES_FINDERS = [
+    'django.contrib.staticfiles.finders.FileSystemFinder',
+    'django.contrib.staticfiles.finders.AppDirectoriesFinder',
+    'main.finders.BundleFinder',
+]
+
+# ========== ASSET BUNDLES ==========
+# Concatenated and minified by main.finders.BundleFinder; collectstatic then
+# hashes and compresses them like any other static file
+ASSET_BUNDLES = {
+    'bundles/site.css': [
+        'lib/animate/animate.min.css',
+        'lib/owlcarousel/assets/owl.carousel.min.css',
+        'css/bootstrap.min.css',
+        'css/style.css',
+        'css/home.css',
+    ],
+    'bundles/site.js': [
+        'admin/js/vendor/jquery/jquery.min.js',  # jQuery 3.6 vendored by django.contrib.admin
+        'lib/wow/wow.min.js',
+        'lib/easing/easing.min.js',
+        'lib/owlcarousel/owl.carousel.min.js',
+        'js/main.js',
+        'js/fragments.js',
+    ],
+}
+ASSET_BUNDLE_ROOT = BASE_DIR / '.bundles'
+
+# Above-the-fold subsets of bundles, inlined by {% inline_static %}: the rules
+# that the template's markup up to its "critical-css" comment can match, plus
+# classes scripts add there straight away
+CRITICAL_CSS = {
+    'bundles/critical.css': {
+        'bundle': 'bundles/site.css',
+        'template': 'main/sections/hero.html',
+        'safelist': ['show', 'collapse', 'collapsing', 'active'],
+    },
+}
+
+# Bundle sources pruned to the selectors that occur in CSS_PURGE_CONTENT
+# (globs under BASE_DIR) or in the admin-editable CSS_PURGE_MODEL_FIELDS
+CSS_PURGE_SOURCES = ['css/bootstrap.min.css']
+CSS_PURGE_CONTENT = ['templates/**/*.html', 'static/js/**/*.js']
+CSS_PURGE_MODEL_FIELDS = ['main.Service.icon']
+# Classes added only by Bootstrap's JavaScript or built at runtime (fnmatch patterns)
+CSS_PURGE_SAFELIST = [
+    'show', 'showing', 'hiding', 'fade', 'collapse', 'collapsing', 'collapsed',
+    'modal-open', 'modal-backdrop', 'modal-static', 'active', 'disabled',
+    'was-validated', 'is-valid', 'is-invalid', 'valid-*', 'invalid-*',
+    'dropdown-menu-*', 'dropup', 'dropend', 'dropstart',
+]
+
+# Icon font stylesheets that `manage.py build_icons` cuts down to the icons
+# the CSS_PURGE_CONTENT files and CSS_PURGE_MODEL_FIELDS use, subsetting the
+# fonts to match; served locally as icons/icons.css once built
+ICON_FONTS = [
+    'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/5.10.0/css/all.min.css',
+    'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.4.1/font/bootstrap-icons.css',
+]
 
 # ========== MEDIA FILES ==========
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
-DEFAULT_FILE_STORAGE = 'django.core.files.storage.FileSystemStorage'
+# Uploads are named by content hash: deduplicated and cacheable as immutable
+DEFAULT_FILE_STORAGE = 'main.storage.ContentAddressedStorage'
+# Offload media transfers to the front-end server: 'x-accel-redirect' (nginx,
+# with an internal location at MEDIA_SENDFILE_URL aliased to MEDIA_ROOT) or
+# 'x-sendfile' (Apache/Caddy). Unset: served with os.sendfile by gunicorn.
+MEDIA_SENDFILE = os.environ.get('MEDIA_SENDFILE') or None
+MEDIA_SENDFILE_URL = os.environ.get('MEDIA_SENDFILE_URL', '/protected-media/')
 
-print(f"✅ MEDIA_URL: {MEDIA_URL}")
-print(f"✅ MEDIA_ROOT: {MEDIA_ROOT}")
+# ========== IMAGE RENDITIONS ==========
+# Widths/formats generated for uploaded images (AVIF comes from pillow-avif-plugin)
+IMAGE_RENDITION_WIDTHS = (160, 320, 640, 960, 1280, 1920)
+IMAGE_RENDITION_FORMATS = ('avif', 'webp')
+BACKGROUND_WORKERS = int(os.environ.get('BACKGROUND_WORKERS', 2))
+
+# ========== MEDIA CDN ==========
+# With Cloudinary credentials (CLOUDINARY_URL, or CLOUDINARY_CLOUD_NAME plus
+# CLOUDINARY_API_KEY/CLOUDINARY_API_SECRET) uploads go to Cloudinary and
+# main.cdn builds the delivery URLs locally
+CLOUDINARY_CLOUD_NAME = os.environ.get('CLOUDINARY_CLOUD_NAME') or urlparse(os.environ.get('CLOUDINARY_URL', '')).hostname or ''
+if CLOUDINARY_CLOUD_NAME:
+    # Originals are read through a local disk cache and uploaded in the background
+    MEDIA_REMOTE_STORAGE = 'main.cdn_storage.CloudinaryMediaStorage'
+    DEFAULT_FILE_STORAGE = 'main.storage.LocalCacheStorage'
+MEDIA_CACHE_DIR = os.environ.get('MEDIA_CACHE_DIR', BASE_DIR / 'media_cache')
+MEDIA_CACHE_MAX_SIZE = int(os.environ.get('MEDIA_CACHE_MAX_SIZE', 512 * 1024 * 1024))
+# Resolved URLs kept per process, keyed by (file name, transformation)
+MEDIA_URL_CACHE_SIZE = 4096
 
 # Security - Disable temporarily to fix CSRF
 SECURE_SSL_REDIRECT = False
@@ -127,4 +258,20 @@ LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
 USE_I18N = True
 USE_TZ = True
-DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+# ========== LOGGING ==========
+# The site's own loggers (startup and warm-up timings, background jobs) to
+# stderr, next to gunicorn's; LOG_LEVEL=DEBUG adds a settings summary at startup
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {'format': '[%(asctime)s] [%(process)d] [%(levelname)s] %(name)s: %(message)s'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'simple'},
+    },
+    'loggers': {
+        'main': {'handlers': ['console'], 'level': os.environ.get('LOG_LEVEL', 'INFO')},
+    },
+}
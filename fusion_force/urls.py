@@ -1,14 +1,9 @@
 # fusion_force/urls.py
 from django.contrib import admin
 from django.urls import path, include
-from django.conf import settings
-from django.conf.urls.static import static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('main.urls')),
 ]
-
-# SERVE MEDIA FILES IN DEVELOPMENT
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+# Media files are served by main.media.serve_media (see main/urls.py)
\ No newline at end of file
@@ -1,12 +1,18 @@
 # fusion_force/wsgi.py - FIXED
 import os
+import time
 from django.core.wsgi import get_wsgi_application
 from whitenoise import WhiteNoise
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fusion_force.settings')
 
+started = time.perf_counter()
 application = get_wsgi_application()
 
+from main.warmup import log_startup  # noqa: E402 (needs the apps loaded)
+log_startup(started)
+
 # FIX: Use correct path for WhiteNoise
 application = WhiteNoise(application, root=os.path.join(os.path.dirname(__file__), '..', 'staticfiles'))
-application.add_files(os.path.join(os.path.dirname(__file__), '..', 'media'), prefix='/media/')
\ No newline at end of file
+# Media is not added here: WhiteNoise only sees files present at boot, so
+# uploads go through main.media.serve_media instead
\ No newline at end of file
@@ -0,0 +1,118 @@
+# gunicorn.conf.py
+# Read by gunicorn from the working directory, so the Procfile only needs
+# `gunicorn`. Every value can be overridden from the environment:
+#
+#   WEB_CONCURRENCY         worker processes (default: sized below)
+#   GUNICORN_THREADS        threads per gthread worker (default: sized below)
+#   GUNICORN_WORKER_CLASS   gthread (default), sync, or uvicorn.workers.UvicornWorker
+#                           (serves fusion_force.asgi with the async views)
+#   WEB_MEMORY_BUDGET_MB    memory for all workers (default: the container limit)
+#   WEB_WORKER_MEMORY_MB    expected size of one worker (default 120)
+#   GUNICORN_MAX_REQUESTS   recycle a worker after this many requests (default 1000, 0 = never)
+import gc
+import math
+import os
+import time
+
+_started = time.perf_counter()
+
+
+def _env_int(name, default=None):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def _cpu_count():
+    """CPUs this process may use, honouring a cgroup v2 quota (Railway/Docker limits)"""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count() or 1
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as fh:
+            quota, period = fh.read().split()
+        if quota != 'max':
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def _memory_limit_mb():
+    """Container memory limit (cgroup v2), or None"""
+    try:
+        with open('/sys/fs/cgroup/memory.max') as fh:
+            value = fh.read().strip()
+    except OSError:
+        return None
+    return int(value) // (1024 * 1024) if value.isdigit() else None
+
+
+cpus = _cpu_count()
+memory_budget_mb = _env_int('WEB_MEMORY_BUDGET_MB', _memory_limit_mb())
+worker_memory_mb = _env_int('WEB_WORKER_MEMORY_MB', 120)
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+asgi = 'uvicorn' in worker_class.lower()
+if asgi:
+    os.environ.setdefault('ASGI_VIEWS', '1')
+wsgi_app = 'fusion_force.asgi:application' if asgi else 'fusion_force.wsgi:application'
+
+# The usual 2 x CPUs + 1 processes, as many as fit in the memory budget;
+# when memory is the limit, threads make up the difference
+cpu_workers = 2 * cpus + 1
+memory_workers = max(1, memory_budget_mb // worker_memory_mb) if memory_budget_mb else cpu_workers
+workers = _env_int('WEB_CONCURRENCY', min(cpu_workers, memory_workers))
+if worker_class == 'gthread':
+    threads = _env_int('GUNICORN_THREADS', min(8, max(2, math.ceil(2 * cpu_workers / workers))))
+else:
+    threads = 1
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+timeout = 120
+graceful_timeout = 30
+keepalive = 5
+accesslog = '-'
+
+# Recycle workers now and then, staggered so they don't all restart at once
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = max_requests // 10
+
+# Import Django once in the master; workers fork from it and share those
+# pages copy-on-write
+preload_app = True
+
+
+def when_ready(server):
+    # Runs in the master after the app is loaded and before the first fork
+    from django.db import connections
+    from main.db_pool.base import close_pools
+    from main.warmup import warm_up
+
+    # Compiled templates, the static manifest and the URL resolver, inherited by every worker
+    warm_up('templates', 'static', 'urls')
+    # Connections opened while loading must not be shared across processes
+    connections.close_all()
+    close_pools()
+    # Move everything loaded so far out of the collector's reach: a
+    # collection in a worker would otherwise write to (and so copy) every
+    # shared page holding an object header
+    gc.collect()
+    gc.freeze()
+
+    server.log.info(
+        f"Ready in {(time.perf_counter() - _started) * 1000:.0f}ms. Serving {wsgi_app} with {workers} x {worker_class} worker(s)"
+        + (f", {threads} threads each" if threads > 1 else '')
+        + f" | {cpus} CPU(s), memory budget "
+        + (f"{memory_budget_mb}MB at ~{worker_memory_mb}MB/worker" if memory_budget_mb else 'unlimited')
+        + f" | preload, {gc.get_freeze_count()} objects frozen"
+        + f" | max_requests {max_requests} (+0-{max_requests_jitter})"
+    )
+
+
+def post_worker_init(worker):
+    # Per worker: its own database connection, and a first render of the
+    # homepage, before it accepts requests
+    from main.storage import retry_pending_uploads
+    from main.warmup import warm_up
+
+    warm_up('database', 'content')
+    # Media uploads a recycled or crashed worker left unconfirmed
+    retry_pending_uploads()
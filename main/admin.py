@@ -8,6 +8,9 @@ from django.http import HttpResponseRedirect, HttpResponse
 from django.utils.safestring import mark_safe
 import json
 
+from .content import bump_content_version
+from .images import thumbnail_url
+from .signals import request_renditions
 from .models import (
     SiteSettings, HeroImage, AboutSection, Service,
     ImpactResult, GalleryImage, Testimonial,
@@ -20,14 +23,29 @@ admin.site.site_header = "FUSION-FORCE LLC ADMIN"
 admin.site.site_title = "Fusion Force Administration"
 admin.site.index_title = "Welcome to Fusion Force Dashboard"
 
+# ============ THUMBNAILS ============
+# Previews use the narrowest rendition about 2x their CSS size, never the original upload; images
+# without renditions show their placeholder and get them queued
+THUMB_SMALL = 120   # changelist columns
+THUMB_LARGE = 800   # change form previews
+
+def thumbnail(image, size, style):
+    request_renditions(image)
+    return format_html(
+        '<img src="{}" loading="lazy" decoding="async" alt="" style="{}" />',
+        thumbnail_url(image, size), style
+    )
+
 # ============ CUSTOM ADMIN ACTIONS ============
 def make_active(modeladmin, request, queryset):
     queryset.update(is_active=True)
+    bump_content_version()  # update() sends no post_save
     messages.success(request, f"{queryset.count()} items marked as active")
 make_active.short_description = "✅ Mark selected as active"
 
 def make_inactive(modeladmin, request, queryset):
     queryset.update(is_active=False)
+    bump_content_version()
     messages.success(request, f"{queryset.count()} items marked as inactive")
 make_inactive.short_description = "❌ Mark selected as inactive"
 
@@ -78,19 +96,13 @@ class SiteSettingsAdmin(admin.ModelAdmin):
     
     def logo_preview(self, obj):
         if obj.logo:
-            return format_html(
-                '<img src="{}" style="width: 50px; height: 50px; object-fit: contain; background: #f0f0f0; padding: 5px; border-radius: 5px;" />', 
-                obj.logo.url  # FIXED: Use direct .url
-            )
+            return thumbnail(obj.logo, THUMB_SMALL, 'width: 50px; height: 50px; object-fit: contain; background: #f0f0f0; padding: 5px; border-radius: 5px;')
         return format_html('<div style="width: 50px; height: 50px; background: #f0f0f0; display: flex; align-items: center; justify-content: center; border-radius: 5px;">No Logo</div>')
     logo_preview.short_description = 'Logo'
     
     def logo_preview_large(self, obj):
         if obj.logo:
-            return format_html(
-                '<img src="{}" style="max-width: 300px; max-height: 200px; object-fit: contain; background: #f0f0f0; padding: 10px; border-radius: 10px; border: 1px solid #ddd;" />', 
-                obj.logo.url  # FIXED: Use direct .url
-            )
+            return thumbnail(obj.logo, THUMB_LARGE, 'max-width: 300px; max-height: 200px; object-fit: contain; background: #f0f0f0; padding: 10px; border-radius: 10px; border: 1px solid #ddd;')
         return "No logo uploaded"
     logo_preview_large.short_description = 'Logo Preview'
     
@@ -131,19 +143,13 @@ class HeroImageAdmin(admin.ModelAdmin):
     
     def image_preview(self, obj):
         if obj.image:
-            return format_html(
-                '<img src="{}" style="width: 60px; height: 40px; object-fit: cover; border-radius: 4px; border: 1px solid #ddd;" />', 
-                obj.image.url  # FIXED: Use direct .url
-            )
+            return thumbnail(obj.image, THUMB_SMALL, 'width: 60px; height: 40px; object-fit: cover; border-radius: 4px; border: 1px solid #ddd;')
         return format_html('<div style="width: 60px; height: 40px; background: #f0f0f0; display: flex; align-items: center; justify-content: center; border-radius: 4px;">No Image</div>')
     image_preview.short_description = 'Preview'
     
     def image_preview_large(self, obj):
         if obj.image:
-            return format_html(
-                '<img src="{}" style="max-width: 400px; max-height: 300px; object-fit: contain; border-radius: 8px; border: 2px solid #ddd;" />', 
-                obj.image.url  # FIXED: Use direct .url
-            )
+            return thumbnail(obj.image, THUMB_LARGE, 'max-width: 400px; max-height: 300px; object-fit: contain; border-radius: 8px; border: 2px solid #ddd;')
         return "No image uploaded"
     image_preview_large.short_description = 'Large Preview'
     
@@ -196,19 +202,13 @@ class AboutSectionAdmin(admin.ModelAdmin):
     
     def image_preview(self, obj):
         if obj.image:
-            return format_html(
-                '<img src="{}" style="width: 50px; height: 50px; object-fit: cover; border-radius: 4px; border: 1px solid #ddd;" />', 
-                obj.image.url  # FIXED: Use direct .url
-            )
+            return thumbnail(obj.image, THUMB_SMALL, 'width: 50px; height: 50px; object-fit: cover; border-radius: 4px; border: 1px solid #ddd;')
         return format_html('<div style="width: 50px; height: 50px; background: #f0f0f0; display: flex; align-items: center; justify-content: center; border-radius: 4px;">No Image</div>')
     image_preview.short_description = 'Image'
     
     def image_preview_large(self, obj):
         if obj.image:
-            return format_html(
-                '<img src="{}" style="max-width: 400px; max-height: 300px; object-fit: contain; border-radius: 8px; border: 2px solid #ddd;" />', 
-                obj.image.url  # FIXED: Use direct .url
-            )
+            return thumbnail(obj.image, THUMB_LARGE, 'max-width: 400px; max-height: 300px; object-fit: contain; border-radius: 8px; border: 2px solid #ddd;')
         return "No image uploaded"
     image_preview_large.short_description = 'Large Preview'
     
@@ -400,19 +400,13 @@ class GalleryImageAdmin(admin.ModelAdmin):
     
     def image_preview(self, obj):
         if obj.image:
-            return format_html(
-                '<img src="{}" style="width: 60px; height: 40px; object-fit: cover; border-radius: 4px; border: 1px solid #ddd;" />', 
-                obj.image.url  # FIXED: Use direct .url
-            )
+            return thumbnail(obj.image, THUMB_SMALL, 'width: 60px; height: 40px; object-fit: cover; border-radius: 4px; border: 1px solid #ddd;')
         return format_html('<div style="width: 60px; height: 40px; background: #f0f0f0; display: flex; align-items: center; justify-content: center; border-radius: 4px;">No Image</div>')
     image_preview.short_description = 'Preview'
     
     def image_preview_large(self, obj):
         if obj.image:
-            return format_html(
-                '<img src="{}" style="max-width: 400px; max-height: 300px; object-fit: contain; border-radius: 8px; border: 2px solid #ddd;" />', 
-                obj.image.url  # FIXED: Use direct .url
-            )
+            return thumbnail(obj.image, THUMB_LARGE, 'max-width: 400px; max-height: 300px; object-fit: contain; border-radius: 8px; border: 2px solid #ddd;')
         return "No image uploaded"
     image_preview_large.short_description = 'Large Preview'
     
@@ -473,10 +467,7 @@ class TestimonialAdmin(admin.ModelAdmin):
     
     def avatar_preview(self, obj):
         if obj.avatar:
-            return format_html(
-                '<img src="{}" style="width: 40px; height: 40px; object-fit: cover; border-radius: 50%; border: 2px solid #053e91;" />', 
-                obj.avatar.url  # FIXED: Use direct .url
-            )
+            return thumbnail(obj.avatar, THUMB_SMALL, 'width: 40px; height: 40px; object-fit: cover; border-radius: 50%; border: 2px solid #053e91;')
         return format_html(
             '<div style="width: 40px; height: 40px; background: #f0f0f0; border-radius: 50%; display: flex; align-items: center; justify-content: center; color: #053e91; font-weight: bold; font-size: 14px;">{}</div>',
             obj.client_name[:2].upper() if obj.client_name else "??"
@@ -485,10 +476,7 @@ class TestimonialAdmin(admin.ModelAdmin):
     
     def avatar_preview_large(self, obj):
         if obj.avatar:
-            return format_html(
-                '<img src="{}" style="width: 150px; height: 150px; object-fit: cover; border-radius: 50%; border: 3px solid #053e91;" />', 
-                obj.avatar.url  # FIXED: Use direct .url
-            )
+            return thumbnail(obj.avatar, THUMB_LARGE, 'width: 150px; height: 150px; object-fit: cover; border-radius: 50%; border: 3px solid #053e91;')
         return format_html(
             '<div style="width: 150px; height: 150px; background: #f0f0f0; border-radius: 50%; display: flex; align-items: center; justify-content: center; color: #053e91; font-weight: bold; font-size: 24px; border: 3px solid #053e91;">{}</div>',
             obj.client_name[:2].upper() if obj.client_name else "??"
@@ -540,19 +528,13 @@ class NewsletterContentAdmin(admin.ModelAdmin):
     
     def image_preview(self, obj):
         if obj.image:
-            return format_html(
-                '<img src="{}" style="width: 50px; height: 50px; object-fit: cover; border-radius: 4px; border: 1px solid #ddd;" />', 
-                obj.image.url  # FIXED: Use direct .url
-            )
+            return thumbnail(obj.image, THUMB_SMALL, 'width: 50px; height: 50px; object-fit: cover; border-radius: 4px; border: 1px solid #ddd;')
         return format_html('<div style="width: 50px; height: 50px; background: #f0f0f0; display: flex; align-items: center; justify-content: center; border-radius: 4px;">No Image</div>')
     image_preview.short_description = 'Image'
     
     def image_preview_large(self, obj):
         if obj.image:
-            return format_html(
-                '<img src="{}" style="max-width: 400px; max-height: 300px; object-fit: contain; border-radius: 8px; border: 2px solid #ddd;" />', 
-                obj.image.url  # FIXED: Use direct .url
-            )
+            return thumbnail(obj.image, THUMB_LARGE, 'max-width: 400px; max-height: 300px; object-fit: contain; border-radius: 8px; border: 2px solid #ddd;')
         return "No image uploaded"
     image_preview_large.short_description = 'Large Preview'
     
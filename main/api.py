@@ -0,0 +1,253 @@
+# main/api.py
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .content import content_version
+from .gallery import gallery_page
+from .images import available_formats, srcset, stored_width
+from .models import (
+    SiteSettings, HeroImage, AboutSection, Service,
+    ImpactResult, Testimonial, NewsletterContent,
+)
+
+# How long an unrequested payload stays cached; a content change orphans it sooner
+CONTENT_API_CACHE_TIMEOUT = 60 * 60
+
+
+def image_data(fieldfile):
+    """An uploaded image with the size, colour and placeholder stored at upload, and its renditions"""
+    if not fieldfile:
+        return None
+    instance, field = fieldfile.instance, fieldfile.field
+    width = stored_width(fieldfile)
+    return {
+        'url': fieldfile.url,
+        'width': width,
+        'height': getattr(instance, field.height_field) if field.height_field else None,
+        'color': getattr(instance, f'{field.name}_color', ''),
+        'placeholder': getattr(instance, f'{field.name}_placeholder', ''),
+        'srcset': {fmt: candidates for fmt in available_formats() if (candidates := srcset(fieldfile.name, fmt, fieldfile.storage, width))},
+    }
+
+
+def site_settings_data(obj):
+    return {
+        'site_name': obj.site_name,
+        'contact_email': obj.contact_email,
+        'contact_phone': obj.contact_phone,
+        'logo': image_data(obj.logo),
+        'updated_at': obj.updated_at,
+    }
+
+
+def hero_data(obj):
+    return {
+        'id': obj.pk,
+        'title': obj.title,
+        'position': obj.position,
+        'order': obj.order,
+        'image': image_data(obj.image),
+    }
+
+
+def about_data(obj):
+    return {
+        'title': obj.title,
+        'content': obj.content,
+        'bullet_points': obj.bullet_points_list,
+        'image': image_data(obj.image),
+        'updated_at': obj.updated_at,
+    }
+
+
+def service_data(obj):
+    return {
+        'id': obj.pk,
+        'title': obj.title,
+        'service_type': obj.service_type,
+        'description': obj.description,
+        'icon': obj.icon,
+        'topics': obj.topics_list,
+        'button_text': obj.button_text,
+        'order': obj.order,
+    }
+
+
+def result_data(obj):
+    return {
+        'id': obj.pk,
+        'title': obj.title,
+        'value': obj.value,
+        'order': obj.order,
+    }
+
+
+def gallery_data(obj):
+    return {
+        'id': obj.pk,
+        'title': obj.title,
+        'description': obj.description,
+        'position': obj.position,
+        'order': obj.order,
+        'image': image_data(obj.image),
+    }
+
+
+def testimonial_data(obj):
+    return {
+        'id': obj.pk,
+        'client_name': obj.client_name,
+        'position': obj.position,
+        'company': obj.company,
+        'content': obj.content,
+        'order': obj.order,
+        'avatar': image_data(obj.avatar),
+    }
+
+
+def newsletter_data(obj):
+    return {
+        'title': obj.title,
+        'subtitle': obj.subtitle,
+        'benefits': obj.benefits_list,
+        'image': image_data(obj.image),
+        'pdf_url': obj.pdf_file.url if obj.pdf_file else None,
+        'updated_at': obj.updated_at,
+    }
+
+
+def gallery_page_data(after=None, page=None):
+    """A gallery feed page (main.gallery, or page) with each slot serialized; next is the ?after= cursor"""
+    page = page or gallery_page(after)
+    return {
+        'large': gallery_data(page['large']) if page['large'] else None,
+        'small': [gallery_data(image) for image in page['small']],
+        'tall': gallery_data(page['tall']) if page['tall'] else None,
+        'next': page['next'],
+    }
+
+
+def first(queryset, serialize):
+    obj = queryset.first()
+    return serialize(obj) if obj is not None else None
+
+
+# Section name -> its data: the same rows the homepage shows
+SECTIONS = {
+    'site_settings': lambda: first(SiteSettings.objects.all(), site_settings_data),
+    'hero': lambda: [hero_data(obj) for obj in HeroImage.objects.filter(is_active=True).order_by('order')],
+    'about': lambda: first(AboutSection.objects.filter(is_active=True), about_data),
+    'services': lambda: [service_data(obj) for obj in Service.objects.filter(is_active=True).order_by('order')],
+    'results': lambda: [result_data(obj) for obj in ImpactResult.objects.filter(is_active=True).order_by('order')],
+    'gallery': gallery_page_data,
+    'testimonials': lambda: [testimonial_data(obj) for obj in Testimonial.objects.filter(is_active=True).order_by('order')],
+    'newsletter': lambda: first(NewsletterContent.objects.filter(is_active=True), newsletter_data),
+}
+# Sections holding layout slots of rows rather than one row or a list of them
+SLOTTED_SECTIONS = {'gallery': ('large', 'small', 'tall')}
+# The fields ?fields= may pick from each section's rows (the keys of its *_data())
+SECTION_FIELDS = {
+    'site_settings': {'site_name', 'contact_email', 'contact_phone', 'logo', 'updated_at'},
+    'hero': {'id', 'title', 'position', 'order', 'image'},
+    'about': {'title', 'content', 'bullet_points', 'image', 'updated_at'},
+    'services': {'id', 'title', 'service_type', 'description', 'icon', 'topics', 'button_text', 'order'},
+    'results': {'id', 'title', 'value', 'order'},
+    'gallery': {'id', 'title', 'description', 'position', 'order', 'image'},
+    'testimonials': {'id', 'client_name', 'position', 'company', 'content', 'order', 'avatar'},
+    'newsletter': {'title', 'subtitle', 'benefits', 'image', 'pdf_url', 'updated_at'},
+}
+
+
+def build_content():
+    """Every homepage section as plain data; the gallery is its first feed page"""
+    return {name: build() for name, build in SECTIONS.items()}
+
+
+def parse_fields(value):
+    """
+    ?fields=services,about.title,about.image -> {'services': None,
+    'about': {'title', 'image'}}: a bare section name selects the whole
+    section, section.field picks fields from it. Empty selects everything.
+    Raises ValueError naming an unknown section or field.
+    """
+    selection = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        section, _, field = item.partition('.')
+        if section not in SECTIONS:
+            raise ValueError(f"Unknown section: {section}")
+        if field and field not in SECTION_FIELDS[section]:
+            raise ValueError(f"Unknown field: {section}.{field}")
+        if not field:
+            selection[section] = None
+        elif section not in selection or selection[section] is not None:
+            selection.setdefault(section, set()).add(field)
+    return selection
+
+
+def pick(row, fields):
+    if isinstance(row, list):
+        return [pick(item, fields) for item in row]
+    return {key: row[key] for key in row if key in fields} if row is not None else None
+
+
+def select_fields(content, selection):
+    if not selection:
+        return content
+    selected = {}
+    for section, fields in selection.items():
+        data = content[section]
+        if fields is None or data is None:
+            selected[section] = data
+        elif section in SLOTTED_SECTIONS:
+            selected[section] = {key: pick(value, fields) if key in SLOTTED_SECTIONS[section] else value
+                                 for key, value in data.items()}
+        else:
+            selected[section] = pick(data, fields)
+    return selected
+
+
+def cached_json(key, build):
+    """(JSON bytes, ETag) for build()'s data, serialized once per cache key (every time without one)"""
+    cached = cache.get(key) if key else None
+    if cached is None:
+        body = json.dumps(build(), cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+        cached = (body, f'"{hashlib.md5(body, usedforsecurity=False).hexdigest()}"')
+        if key:
+            cache.set(key, cached, CONTENT_API_CACHE_TIMEOUT)
+    return cached
+
+
+def content_payload(selection=None):
+    """
+    (JSON bytes, ETag) for the content API. The sections are read from the
+    database once per content version, and each field selection is
+    serialized once per version on top of that, so serving a payload is
+    cache reads only. selection must come from parse_fields(), which only
+    lets known sections and fields through, so clients can't make up
+    cache keys.
+    """
+    version = content_version()
+    spec = ','.join(sorted(f'{section}.{field}' if field else section
+                           for section, fields in (selection or {}).items()
+                           for field in (sorted(fields) if fields else [''])))
+
+    def build():
+        content_key = f'api:content:{version}'
+        content = cache.get(content_key)
+        if content is None:
+            content = build_content()
+            cache.set(content_key, content, CONTENT_API_CACHE_TIMEOUT)
+        return select_fields(content, selection)
+
+    return cached_json(f'api:content:{version}:{hashlib.md5(spec.encode(), usedforsecurity=False).hexdigest()}', build)
+
+
+def gallery_payload(after=None):
+    """(JSON bytes, ETag) for the gallery feed page after the (order, id) cursor, or the first page"""
+    page = gallery_page(after)
+    cursor = '%d.%d' % after if after else 'first'
+    key = f'api:gallery:{content_version()}:{cursor}' if page['cacheable'] else None
+    return cached_json(key, lambda: gallery_page_data(page=page))
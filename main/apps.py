@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.contrib.staticfiles.apps import StaticFilesConfig as BaseStaticFilesConfig
 
 
 class MainConfig(AppConfig):
+    default = True  # 'main' in INSTALLED_APPS; StaticFilesConfig below is listed by path
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'main'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+
+class StaticFilesConfig(BaseStaticFilesConfig):
+    # Sass sources are compiled into static/css by hand; never collect them
+    ignore_patterns = [*BaseStaticFilesConfig.ignore_patterns, 'scss', '*.scss']
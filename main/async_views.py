@@ -0,0 +1,238 @@
+# main/async_views.py
+"""
+Async versions of the homepage and the two form endpoints, for serving
+under an ASGI worker (uvicorn). main/urls.py routes to them when
+ASGI_VIEWS is on; everything else stays synchronous.
+
+They are slower than the default: on one CPU with two workers each,
+bench_http measured the homepage at about 32 req/s (p99 ~420ms) under
+uvicorn against about 180 req/s (p99 ~100ms) under gthread. The async
+homepage renders every section on every request (stream_home's chunk
+cache is sync-only), and each section render is handed to the sync
+thread. Measure again before switching a deployment to uvicorn.
+"""
+import asyncio
+import json
+import logging
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
+
+from .gallery import gallery_page
+from .models import (
+    SiteSettings, HeroImage, AboutSection, Service,
+    ImpactResult, Testimonial, NewsletterContent,
+    ContactSubmission, NewsletterSubscription, SystemLog,
+)
+from .views import HOME_SECTIONS, NO_CACHE_HEADERS, lazy_sections, preload_links, resolve_hero_images
+
+logger = logging.getLogger(__name__)
+
+
+async def alog_system_action(message, level='info', source='views', request=None):
+    """log_system_action for async views"""
+    try:
+        await SystemLog.objects.acreate(
+            log_level=level,
+            message=message,
+            source=source,
+            user_ip=request.META.get('REMOTE_ADDR', '') if request else '',
+            user_agent=request.META.get('HTTP_USER_AGENT', '') if request else ''
+        )
+    except Exception as e:
+        logger.error(f"Failed to log action: {e}")
+
+
+def csrf_exempt_post(view):
+    """csrf_exempt plus require_POST for an async view (Django 4.2's decorators only wrap sync views)"""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != 'POST':
+            return HttpResponseNotAllowed(['POST'])
+        return await view(request, *args, **kwargs)
+
+    wrapper.csrf_exempt = True
+    return wrapper
+
+
+async def alist(queryset):
+    return [obj async for obj in queryset]
+
+
+async def home_context():
+    """
+    The homepage data, every section's query started at once. On Django 4.2
+    the async ORM still runs queries one at a time on a shared thread, so
+    they don't overlap in the database.
+    """
+    (site_settings, hero_images, about_section, services, results,
+     gallery, testimonials, newsletter) = await asyncio.gather(
+        SiteSettings.objects.afirst(),
+        alist(HeroImage.objects.filter(is_active=True).order_by('order')),
+        AboutSection.objects.filter(is_active=True).afirst(),
+        alist(Service.objects.filter(is_active=True).order_by('order')),
+        alist(ImpactResult.objects.filter(is_active=True).order_by('order')),
+        sync_to_async(gallery_page)(),
+        alist(Testimonial.objects.filter(is_active=True).order_by('order')),
+        NewsletterContent.objects.filter(is_active=True).afirst(),
+    )
+    hero_desktop, hero_mobile = resolve_hero_images(hero_images)
+    return {
+        'site_settings': site_settings,
+        'hero_desktop': hero_desktop,
+        'hero_mobile': hero_mobile,
+        'about_section': about_section,
+        'services': services,
+        'results': results,
+        'gallery': gallery,
+        'testimonials': testimonials,
+        'newsletter': newsletter,
+        'home_sections': HOME_SECTIONS,
+        'lazy_sections': lazy_sections(),
+    }
+
+
+async def home(request):
+    """main.views.stream_home for ASGI: the data is loaded up front, then the sections stream out"""
+    context = await home_context()
+
+    async def sections():
+        for name in HOME_SECTIONS:
+            template_name = 'main/sections/placeholder.html' if name in context['lazy_sections'] else f'main/sections/{name}.html'
+            try:
+                # Template tags may query the database (icon_stylesheets), which an async context can't do directly
+                yield await sync_to_async(render_to_string)(template_name, {**context, 'section': name}, request)
+            except Exception:
+                logger.exception(f"Homepage section {name} failed to render")
+
+    response = StreamingHttpResponse(sections(), content_type='text/html; charset=utf-8')
+    for header, value in NO_CACHE_HEADERS.items():
+        response[header] = value
+    if getattr(settings, 'EARLY_HINTS', True):
+        response['Link'] = await sync_to_async(preload_links)()
+    return response
+
+
+@csrf_exempt_post
+async def contact_submit(request):
+    """main.views.contact_submit on the async ORM"""
+    try:
+        data = json.loads(request.body)
+
+        required_fields = ['full_name', 'email', 'organization', 'event_type', 'event_details']
+        for field in required_fields:
+            if not data.get(field):
+                return JsonResponse({
+                    'status': 'error',
+                    'message': f'{field.replace("_", " ").title()} is required.'
+                }, status=400)
+
+        submission = await ContactSubmission.objects.acreate(
+            full_name=data['full_name'],
+            email=data['email'],
+            organization=data['organization'],
+            event_type=data['event_type'],
+            event_details=data['event_details']
+        )
+
+        await alog_system_action(
+            f"New contact submission from {submission.full_name} ({submission.organization})",
+            level='success',
+            source='contact_form',
+            request=request
+        )
+
+        return JsonResponse({
+            'status': 'success',
+            'message': 'Thank you for your booking request! Pamela will review your details and get back to you within 24 hours.',
+            'submission_id': submission.id
+        })
+
+    except json.JSONDecodeError:
+        return JsonResponse({
+            'status': 'error',
+            'message': 'Invalid request data.'
+        }, status=400)
+    except Exception as e:
+        await alog_system_action(
+            f"Contact submission error: {str(e)}",
+            level='error',
+            source='contact_form',
+            request=request
+        )
+        return JsonResponse({
+            'status': 'error',
+            'message': 'An error occurred. Please try again later.'
+        }, status=500)
+
+
+@csrf_exempt_post
+async def newsletter_submit(request):
+    """main.views.newsletter_submit on the async ORM"""
+    try:
+        data = json.loads(request.body)
+
+        email = data.get('email', '').strip()
+        name = data.get('name', '').strip()
+        source = data.get('source', 'newsletter_section')
+        agreed_to_terms = data.get('agreed_to_terms', True)
+
+        if not email:
+            return JsonResponse({
+                'status': 'error',
+                'message': 'Email is required.'
+            }, status=400)
+
+        subscription = await NewsletterSubscription.objects.filter(email=email).afirst()
+        if subscription is not None:
+            return JsonResponse({
+                'status': 'info',
+                'message': f'You are already subscribed to our newsletter! (Subscribed on {subscription.created_at.strftime("%Y-%m-%d")})'
+            })
+
+        subscription = await NewsletterSubscription.objects.acreate(
+            email=email,
+            name=name if name else email.split('@')[0],
+            source=source,
+            agreed_to_terms=agreed_to_terms,
+            is_active=True
+        )
+
+        await alog_system_action(
+            f"New newsletter subscription: {email}",
+            level='success',
+            source='newsletter_form',
+            request=request
+        )
+
+        return JsonResponse({
+            'status': 'success',
+            'message': 'Thank you for subscribing to our newsletter!',
+            'subscription_id': subscription.id
+        })
+
+    except IntegrityError:
+        return JsonResponse({
+            'status': 'info',
+            'message': 'You are already subscribed to our newsletter!'
+        })
+    except json.JSONDecodeError:
+        return JsonResponse({
+            'status': 'error',
+            'message': 'Invalid request data.'
+        }, status=400)
+    except Exception as e:
+        await alog_system_action(
+            f"Newsletter subscription error: {str(e)}",
+            level='error',
+            source='newsletter_form',
+            request=request
+        )
+        return JsonResponse({
+            'status': 'error',
+            'message': 'An error occurred. Please try again later.'
+        }, status=500)
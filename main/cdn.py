@@ -0,0 +1,84 @@
+# main/cdn.py
+import posixpath
+from functools import lru_cache
+from urllib.parse import urljoin
+
+import cloudinary.utils
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.encoding import filepath_to_uri
+
+CLOUDINARY_HOST = 'https://res.cloudinary.com/'
+
+
+def cloud_name():
+    return getattr(settings, 'CLOUDINARY_CLOUD_NAME', '')
+
+
+def cdn_enabled():
+    """True when uploads live on Cloudinary rather than the local MEDIA_ROOT"""
+    return bool(cloud_name())
+
+
+def public_id(name):
+    """Cloudinary public id for a storage name, with the prefix django-cloudinary-storage adds"""
+    prefix = getattr(settings, 'CLOUDINARY_STORAGE', {}).get('PREFIX', settings.MEDIA_URL).strip('/')
+    if prefix and not name.startswith(prefix + '/'):
+        name = posixpath.join(prefix, name)
+    return name
+
+
+@lru_cache(maxsize=getattr(settings, 'MEDIA_URL_CACHE_SIZE', 4096))
+def media_url(name, transformation=''):
+    """
+    Final URL for an uploaded file, optionally with a Cloudinary transformation
+    such as 'c_limit,w_640,f_auto'. The URL is built locally by
+    cloudinary.utils (no API call) and memoized per (name, transformation),
+    so repeated .url calls are a dictionary lookup. Without a configured
+    cloud the local MEDIA_URL stands in and transformations are ignored.
+    """
+    if not name:
+        return ''
+    if not cdn_enabled():
+        return urljoin(settings.MEDIA_URL, filepath_to_uri(name).lstrip('/'))
+    url, _options = cloudinary.utils.cloudinary_url(
+        public_id(name),
+        cloud_name=cloud_name(),
+        resource_type='image',
+        type='upload',
+        secure=True,
+        raw_transformation=transformation or None,
+        force_version=False,
+    )
+    return url
+
+
+@lru_cache(maxsize=getattr(settings, 'MEDIA_URL_CACHE_SIZE', 4096))
+def normalize_url(url):
+    """
+    Repair a stored Cloudinary URL or path: a collapsed 'https:/', a missing
+    host, a missing 'upload' delivery type or a missing file extension
+    (Cloudinary then delivers a JPEG).
+    """
+    if not url:
+        return ''
+    if url.startswith('https:/') and not url.startswith('https://'):
+        url = url.replace('https:/', 'https://', 1)
+    if not url.startswith(('http://', 'https://')):
+        if not cdn_enabled():
+            return url
+        url = f'{CLOUDINARY_HOST}{cloud_name()}/{url.lstrip("/")}'
+    if url.startswith(CLOUDINARY_HOST) and '/image/' in url:
+        if '/image/upload/' not in url:
+            url = url.replace('/image/', '/image/upload/', 1)
+        if '.' not in url.rsplit('/', 1)[-1]:
+            url += '.jpg'
+    return url
+
+
+@receiver(setting_changed)
+def clear_url_caches(setting, **kwargs):
+    if setting in ('CLOUDINARY_CLOUD_NAME', 'CLOUDINARY_STORAGE', 'MEDIA_URL'):
+        media_url.cache_clear()
+        normalize_url.cache_clear()
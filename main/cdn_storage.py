@@ -0,0 +1,49 @@
+# main/cdn_storage.py
+# Only imported when Cloudinary is configured: cloudinary_storage refuses to
+# import without credentials
+import posixpath
+
+import cloudinary.uploader
+from cloudinary_storage.storage import MediaCloudinaryStorage
+from django.core.files.uploadedfile import UploadedFile
+
+from .cdn import media_url, public_id
+
+
+class CloudinaryMediaStorage(MediaCloudinaryStorage):
+    """
+    Uploads to Cloudinary under exactly the name it's given (the public id is
+    the name without its extension), so callers such as LocalCacheStorage can
+    pick the name before the upload happens. URLs come from the memoized
+    local resolver.
+    """
+
+    def _public_id(self, name):
+        return posixpath.splitext(public_id(self._normalise_name(name)))[0]
+
+    def _upload(self, name, content):
+        return cloudinary.uploader.upload(
+            content,
+            public_id=self._public_id(name),
+            unique_filename=False,
+            overwrite=True,
+            resource_type=self._get_resource_type(name),
+            tags=self.TAG,
+        )
+
+    def _save(self, name, content):
+        name = self._normalise_name(name)
+        self._upload(name, UploadedFile(content, name))
+        return name
+
+    def delete(self, name):
+        response = cloudinary.uploader.destroy(
+            self._public_id(name), invalidate=True, resource_type=self._get_resource_type(name)
+        )
+        return response['result'] == 'ok'
+
+    def _get_url(self, name):
+        return media_url(name)
+
+    def url(self, name):
+        return media_url(name)
@@ -0,0 +1,32 @@
+# main/content.py
+import time
+
+from django.core.cache import cache
+
+CONTENT_VERSION_KEY = 'content:version'
+
+# Models whose rows only record visitor activity; saving them doesn't change any page
+ACTIVITY_MODELS = ('ContactSubmission', 'NewsletterSubscription', 'FormSubmission', 'SystemLog')
+
+
+def content_version():
+    """
+    Token that changes whenever admin-edited content changes: the key for
+    anything derived from rendered pages. Kept in the default cache so
+    every worker sees the same value; if the cache loses it, a new one
+    starts, which only costs a recompute.
+    """
+    version = cache.get(CONTENT_VERSION_KEY)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(CONTENT_VERSION_KEY, version, None):
+            version = cache.get(CONTENT_VERSION_KEY, version)
+    return version
+
+
+def bump_content_version():
+    cache.set(CONTENT_VERSION_KEY, time.time_ns(), None)
+
+
+def is_content_model(model):
+    return model._meta.app_label == 'main' and model.__name__ not in ACTIVITY_MODELS
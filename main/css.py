@@ -0,0 +1,184 @@
+# main/css.py
+import fnmatch
+import posixpath
+import re
+
+# Strings and comments are matched first so the whitespace rules never touch their insides
+TOKEN_RE = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|(/\*.*?\*/)''', re.S)
+URL_RE = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+
+
+def _squeeze(chunk):
+    chunk = re.sub(r'\s+', ' ', chunk)
+    chunk = re.sub(r' ?([{};,>]) ?', r'\1', chunk)
+    chunk = re.sub(r': ', ':', chunk)
+    return chunk.replace(';}', '}')
+
+
+def minify(css):
+    """
+    Conservative CSS minifier: drops comments (except /*! licence banners) and
+    redundant whitespace and semicolons, leaving strings, selectors and
+    values otherwise untouched.
+    """
+    out = []
+    pos = 0
+    for match in TOKEN_RE.finditer(css):
+        out.append(_squeeze(css[pos:match.start()]))
+        if match.group(1):
+            out.append(match.group(1))
+        elif match.group(2).startswith('/*!'):
+            # Licence banners stay
+            out.append(match.group(2) + '\n')
+        pos = match.end()
+    out.append(_squeeze(css[pos:]))
+    return ''.join(out).strip()
+
+
+def rewrite_urls(css, source, target):
+    """
+    Rewrite relative url()s in a stylesheet at static path source so they
+    still resolve when the rules are served from static path target.
+    """
+    source_dir = posixpath.dirname(source)
+    target_dir = posixpath.dirname(target)
+
+    def rewrite(match):
+        quote, url = match.groups()
+        if url.startswith(('data:', 'http:', 'https:', '//', '/', '#')):
+            return match.group(0)
+        resolved = posixpath.normpath(posixpath.join(source_dir, url))
+        return f'url({quote}{posixpath.relpath(resolved, target_dir or ".")}{quote})'
+
+    return URL_RE.sub(rewrite, css)
+
+
+# ---------------------------------------------------------------- purging
+
+# At-rules whose blocks hold declarations or keyframes rather than style rules
+OPAQUE_AT_RULES = ('@font-face', '@keyframes', '@-webkit-keyframes', '@page', '@counter-style', '@property')
+# Selector parts that can't require a class: :not()/:is() arguments and [attribute] tests
+IGNORED_SELECTOR_PARTS_RE = re.compile(r':(?:not|is|where|has)\((?:[^()]|\([^()]*\))*\)|\[[^\]]*\]')
+NAME_RE = re.compile(r'[.#](-?[_a-zA-Z][\w-]*)')
+TYPE_RE = re.compile(r'(?:^|[\s>+~])([a-zA-Z][\w-]*)')
+INTERACTION_RE = re.compile(r':(?:hover|focus|focus-visible|focus-within|active)\b')
+KEYFRAMES_RE = re.compile(r'@(?:-webkit-)?keyframes\s+([\w-]+)', re.I)
+
+
+def _blocks(css):
+    """
+    Split a stylesheet into top-level (prelude, body) pairs. body is None for
+    statements such as @charset/@import. Braces inside strings and comments
+    are skipped.
+    """
+    blocks = []
+    depth = 0
+    start = 0
+    prelude = ''
+    i = 0
+    while i < len(css):
+        char = css[i]
+        if char in '"\'':
+            end = i + 1
+            while end < len(css) and css[end] != char:
+                end += 2 if css[end] == '\\' else 1
+            i = end
+        elif css.startswith('/*', i):
+            end = css.find('*/', i + 2)
+            if depth == 0 and css.startswith('/*!', i):
+                blocks.append((css[i:end + 2], None))
+                start = end + 2
+            i = len(css) if end == -1 else end + 1
+        elif char == '{':
+            if depth == 0:
+                prelude = css[start:i].strip()
+                start = i + 1
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                blocks.append((prelude, css[start:i]))
+                start = i + 1
+        elif char == ';' and depth == 0:
+            blocks.append((css[start:i + 1].strip(), None))
+            start = i + 1
+        i += 1
+    return blocks
+
+
+def _split_selectors(prelude):
+    """Split a selector list on top-level commas (not those inside :not(...))"""
+    parts, depth, current = [], 0, ''
+    for char in prelude:
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        if char == ',' and depth == 0:
+            parts.append(current)
+            current = ''
+        else:
+            current += char
+    parts.append(current)
+    return [part.strip() for part in parts if part.strip()]
+
+
+def selector_names(selector):
+    """Class and id names a selector needs to match anything"""
+    return NAME_RE.findall(IGNORED_SELECTOR_PARTS_RE.sub('', selector))
+
+
+def selector_types(selector):
+    """Element names a selector needs (h1, a.btn, ul > li)"""
+    return [name.lower() for name in TYPE_RE.findall(IGNORED_SELECTOR_PARTS_RE.sub('', selector))]
+
+
+def purge(css, used, safelist=(), elements=None):
+    """
+    Drop style rules whose selectors need a class or id that doesn't occur
+    in used (a set of tokens). safelist holds names or fnmatch patterns that
+    are always kept, for classes only ever added by JavaScript. With
+    elements (a set of tag names, for critical CSS) rules for other elements
+    and for interaction states go too.
+    """
+    def needed(name):
+        return name in used or any(fnmatch.fnmatchcase(name, pattern) for pattern in safelist)
+
+    def matches(selector):
+        names = selector_names(selector)
+        if not all(needed(name) for name in names):
+            return False
+        if elements is None:
+            return True
+        if INTERACTION_RE.search(selector):
+            # Hover/focus states can't matter for the first paint
+            return False
+        types = selector_types(selector)
+        if not names and not types:
+            # Only attributes/pseudo-elements ([type=search], ::-webkit-...):
+            # keep the universal and :root rules, skip form-control resets
+            return selector.startswith(('*', ':root'))
+        return all(tag in elements for tag in types)
+
+    out = []
+    for prelude, body in _blocks(css):
+        if body is None:
+            out.append(prelude)
+        elif prelude.startswith('@'):
+            if prelude.lower().startswith(OPAQUE_AT_RULES) or '{' not in body:
+                out.append(f'{prelude}{{{body}}}')
+            else:
+                inner = purge(body, used, safelist, elements)
+                if inner:
+                    out.append(f'{prelude}{{{inner}}}')
+        else:
+            kept = [sel for sel in _split_selectors(prelude) if matches(sel)]
+            if kept:
+                out.append(f'{",".join(kept)}{{{body}}}')
+
+    # Keyframes are only worth shipping if a surviving rule still animates with them
+    rules = ''.join(block for block in out if not KEYFRAMES_RE.match(block))
+    return ''.join(
+        block for block in out
+        if not KEYFRAMES_RE.match(block) or re.search(rf'(?<![\w-]){re.escape(KEYFRAMES_RE.match(block).group(1))}(?![\w-])', rules)
+    )
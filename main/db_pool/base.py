@@ -0,0 +1,211 @@
+# main/db_pool/base.py
+"""
+PostgreSQL backend that keeps a bounded pool of connections per process.
+
+Django opens one connection per thread (every gthread thread, and the
+thread the async ORM runs on) and, with CONN_MAX_AGE=0, closes it at the
+end of each request. Here "closing" hands the connection back to the
+pool and "opening" takes an idle one when there is one, so a worker never
+holds more than POOL['MAX_SIZE'] connections and a request doesn't pay
+for a new connection. With CONN_HEALTH_CHECKS a connection is checked
+before it is handed out, so one the server dropped while it sat idle is
+replaced instead of failing the request.
+
+Counted in main.metrics: db_pool_checkouts, db_pool_connects,
+db_pool_waits (with db_pool_wait_ms) and db_pool_errors. /api/metrics/
+shows them along with pool_stats().
+"""
+import logging
+import os
+import threading
+import time
+
+from django.db.backends.postgresql.base import DatabaseWrapper as PostgresDatabaseWrapper
+from django.db.backends.postgresql.base import Database
+
+from .. import metrics
+
+logger = logging.getLogger(__name__)
+
+# psycopg2 transaction states a connection can go back to the pool from (after a rollback)
+IDLE = Database.extensions.TRANSACTION_STATUS_IDLE
+ROLLBACK = (Database.extensions.TRANSACTION_STATUS_INTRANS, Database.extensions.TRANSACTION_STATUS_INERROR)
+
+
+class ConnectionPool:
+    """
+    Up to max_size connections, shared by this process's threads. getconn()
+    waits up to timeout seconds when they are all in use; connections older
+    than max_age seconds are closed rather than reused.
+    """
+
+    def __init__(self, max_size=5, timeout=10, max_age=None, health_check=None):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_age = max_age
+        self.health_check = health_check
+        self.idle = []  # (connection, opened at), most recently returned last
+        self.size = 0  # idle + checked out
+        self.opened = {}  # id(connection) -> opened at, for the checked out ones
+        self.condition = threading.Condition()
+
+    def getconn(self, connect):
+        """An idle connection that passes the health check, or a new one from connect()"""
+        start = time.monotonic()
+        with self.condition:
+            if not self.idle and self.size >= self.max_size:
+                metrics.incr('db_pool_waits')
+                if not self.condition.wait_for(lambda: self.idle or self.size < self.max_size, self.timeout):
+                    metrics.incr('db_pool_errors')
+                    raise Database.OperationalError(
+                        f"No database connection free after {self.timeout}s ({self.max_size} in use)"
+                    )
+                metrics.observe('db_pool_wait_ms', (time.monotonic() - start) * 1000)
+            if self.idle:
+                connection, opened = self.idle.pop()
+            else:
+                # Reserve the slot, then connect outside the lock
+                connection, opened = None, None
+                self.size += 1
+
+        try:
+            if connection is not None and not self.usable(connection):
+                self.discard(connection)
+                connection = None
+            if connection is None:
+                connection, opened = connect(), time.monotonic()
+                metrics.incr('db_pool_connects')
+        except Exception:
+            metrics.incr('db_pool_errors')
+            with self.condition:
+                self.size -= 1
+                self.condition.notify()
+            raise
+        with self.condition:
+            self.opened[id(connection)] = opened
+        metrics.incr('db_pool_checkouts')
+        return connection
+
+    def usable(self, connection):
+        if connection.closed:
+            return False
+        if self.health_check is None or self.health_check(connection):
+            return True
+        metrics.incr('db_pool_errors')
+        logger.warning("Dropped a pooled database connection that failed its health check")
+        return False
+
+    def putconn(self, connection):
+        with self.condition:
+            opened = self.opened.pop(id(connection), None)
+        reuse = opened is not None and not connection.closed
+        if reuse and self.max_age is not None:
+            reuse = time.monotonic() - opened < self.max_age
+        if reuse:
+            # Nothing may leak into the next checkout, not even an open transaction
+            status = connection.info.transaction_status
+            if status in ROLLBACK:
+                try:
+                    connection.rollback()
+                except Database.Error:
+                    reuse = False
+            elif status != IDLE:
+                reuse = False
+        if not reuse:
+            self.discard(connection)
+        with self.condition:
+            if reuse:
+                self.idle.append((connection, opened))
+            else:
+                self.size -= 1
+            self.condition.notify()
+
+    def discard(self, connection):
+        try:
+            connection.close()
+        except Database.Error:
+            pass
+
+    def stats(self):
+        with self.condition:
+            return {'max_size': self.max_size, 'size': self.size, 'idle': len(self.idle), 'in_use': self.size - len(self.idle)}
+
+    def close(self):
+        """Close the idle connections (checked out ones are closed when they come back)"""
+        with self.condition:
+            idle, self.idle = self.idle, []
+            self.size -= len(idle)
+        for connection, _ in idle:
+            self.discard(connection)
+
+
+# One pool per process and set of connection parameters. A forked worker
+# must not reuse the sockets of its parent, so it starts a pool of its own;
+# and the test runner (or a _nodb_cursor) pointing an alias at another
+# database gets another pool.
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(conn_params, create):
+    key = (os.getpid(), repr(sorted(conn_params.items())))
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = create()
+        return _pools[key]
+
+
+def pool_stats():
+    """ConnectionPool.stats() of each of this process's pools"""
+    pid = os.getpid()
+    with _pools_lock:
+        pools = [pool for (owner, _), pool in _pools.items() if owner == pid]
+    return [pool.stats() for pool in pools]
+
+
+def close_pools():
+    """Close this process's idle pooled connections, e.g. in the gunicorn master before it forks"""
+    pid = os.getpid()
+    with _pools_lock:
+        pools = [pool for (owner, _), pool in _pools.items() if owner == pid]
+        for key in [key for key in _pools if key[0] != pid]:
+            # Inherited from the parent process: forget them without closing the parent's sockets
+            del _pools[key]
+    for pool in pools:
+        pool.close()
+
+
+def check_connection(connection):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except Database.Error:
+        return False
+    # The check must not leave a transaction open behind it
+    if connection.info.transaction_status != IDLE:
+        connection.rollback()
+    return True
+
+
+class DatabaseWrapper(PostgresDatabaseWrapper):
+    """django.db.backends.postgresql, with connections taken from and returned to a ConnectionPool"""
+
+    pool = None
+
+    def get_pool(self, conn_params):
+        options = self.settings_dict.get('POOL', {})
+        return get_pool(conn_params, lambda: ConnectionPool(
+            max_size=options.get('MAX_SIZE', 5),
+            timeout=options.get('TIMEOUT', 10),
+            max_age=options.get('MAX_AGE'),
+            health_check=check_connection if self.settings_dict['CONN_HEALTH_CHECKS'] else None,
+        ))
+
+    def get_new_connection(self, conn_params):
+        self.pool = self.get_pool(conn_params)
+        return self.pool.getconn(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.putconn(self.connection)
@@ -0,0 +1,194 @@
+# main/finders.py
+import logging
+import os
+import re
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.finders import BaseFinder
+from django.contrib.staticfiles.utils import get_files
+from django.core.checks import Error
+from django.core.files.storage import FileSystemStorage
+from django.db import DatabaseError
+from django.template.loader import get_template
+
+from .css import minify, purge, rewrite_urls
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+logger = logging.getLogger(__name__)
+
+CHARSET_RE = re.compile(r'@charset\s+"[^"]*";\s*', re.I)
+WORD_RE = re.compile(r'[\w-]+')
+TAG_RE = re.compile(r'<([a-zA-Z][\w-]*)')
+CRITICAL_MARKER = '{# critical-css'
+BANNER_RE = re.compile(r'/\*!.*?\*/\s*', re.S)
+
+
+def _find_source(path):
+    """Absolute path of a bundle source, looked up by every finder except this one"""
+    for finder in finders.get_finders():
+        if isinstance(finder, BundleFinder):
+            continue
+        found = finder.find(path)
+        if found:
+            return found
+    return None
+
+
+def purge_content_files():
+    base = Path(settings.BASE_DIR)
+    return [path for pattern in getattr(settings, 'CSS_PURGE_CONTENT', []) for path in base.glob(pattern)]
+
+
+def purge_tokens():
+    """
+    Every word-like token in the CSS_PURGE_CONTENT files (templates, scripts)
+    and in the admin-editable CSS_PURGE_MODEL_FIELDS: the names a purged
+    stylesheet may need.
+    """
+    text = [path.read_text(encoding='utf-8') for path in purge_content_files()]
+    for label in getattr(settings, 'CSS_PURGE_MODEL_FIELDS', []):
+        model_label, field = label.rsplit('.', 1)
+        try:
+            text.extend(apps.get_model(model_label).objects.values_list(field, flat=True))
+        except DatabaseError as e:
+            logger.warning(f"CSS purge: could not read {label} ({e}); relying on CSS_PURGE_SAFELIST")
+    return set(WORD_RE.findall(' '.join(value for value in text if value)))
+
+
+class BundleFinder(BaseFinder):
+    """
+    Serves the ASSET_BUNDLES: static files concatenated (and minified) from
+    other static files, with CSS_PURGE_SOURCES cut down to the selectors the
+    site uses, plus the CRITICAL_CSS subsets of them. Bundles are rebuilt
+    whenever an input is newer, so
+    runserver always serves current code, and collectstatic picks them up
+    like any other file and hashes/compresses them via STATICFILES_STORAGE.
+    Files that build commands write under GENERATED_DIRS (the subset icon
+    fonts of build_icons) are served as they are.
+    """
+
+    GENERATED_DIRS = ('icons',)
+
+    def __init__(self, app_names=None, *args, **kwargs):
+        self.bundles = getattr(settings, 'ASSET_BUNDLES', {})
+        self.critical = getattr(settings, 'CRITICAL_CSS', {})
+        self.storage = FileSystemStorage(location=settings.ASSET_BUNDLE_ROOT)
+        super().__init__(*args, **kwargs)
+
+    def check(self, **kwargs):
+        errors = []
+        for bundle, sources in self.bundles.items():
+            for source in sources:
+                if _find_source(source) is None:
+                    errors.append(Error(
+                        f"Bundle {bundle} source {source} was not found by the staticfiles finders.",
+                        id='main.E001',
+                    ))
+        return errors
+
+    def build(self, bundle):
+        target = self.storage.path(bundle)
+        sources = [(source, _find_source(source)) for source in self.bundles[bundle]]
+        missing = [source for source, path in sources if path is None]
+        if missing:
+            raise FileNotFoundError(f"Bundle {bundle}: missing sources {', '.join(missing)}")
+
+        purged = [source for source, _path in sources if source in getattr(settings, 'CSS_PURGE_SOURCES', [])]
+        inputs = [path for _source, path in sources] + (purge_content_files() if purged else [])
+        newest = max(os.path.getmtime(path) for path in inputs)
+        if os.path.exists(target) and os.path.getmtime(target) >= newest:
+            return target
+
+        tokens = purge_tokens() if purged else set()
+        parts = []
+        for source, path in sources:
+            with open(path, encoding='utf-8') as fh:
+                text = fh.read()
+            if source in purged:
+                before = len(text)
+                text = purge(text, tokens, getattr(settings, 'CSS_PURGE_SAFELIST', []))
+                logger.info(f"Purged {source}: {before} -> {len(text)} bytes")
+            if bundle.endswith('.css'):
+                parts.append(minify(rewrite_urls(text, source, bundle)))
+            elif rjsmin and not source.endswith('.min.js'):
+                parts.append(rjsmin.jsmin(text))
+            else:
+                parts.append(text.strip())
+        if bundle.endswith('.css'):
+            # @charset is only valid as the very first rule of a stylesheet
+            content = '@charset "UTF-8";\n' + '\n'.join(CHARSET_RE.sub('', part) for part in parts)
+        else:
+            # A statement terminator between scripts keeps an unterminated file from swallowing the next
+            content = ';\n'.join(parts)
+
+        self._write(target, content)
+        logger.info(f"Built {bundle} from {len(sources)} files ({len(content)} bytes)")
+        return target
+
+    def build_critical(self, name):
+        """
+        The rules of a CSS bundle that the above-the-fold markup (the template
+        up to its critical-css marker) can match, for inlining in <head>
+        """
+        config = self.critical[name]
+        target = self.storage.path(name)
+        bundle = self.build(config['bundle'])
+        template = get_template(config['template']).origin.name
+        if os.path.exists(target) and os.path.getmtime(target) >= max(os.path.getmtime(bundle), os.path.getmtime(template)):
+            return target
+
+        with open(template, encoding='utf-8') as fh:
+            markup = fh.read()
+        start, end = markup.find('<body'), markup.find(CRITICAL_MARKER)
+        if start == -1 or end == -1:
+            raise ValueError(f"{config['template']} needs <body> and a {CRITICAL_MARKER} comment for {name}")
+        fold = markup[start:end]
+        elements = {tag.lower() for tag in TAG_RE.findall(fold)} | {'html', 'body'}
+
+        with open(bundle, encoding='utf-8') as fh:
+            css = fh.read()
+        content = purge(css, set(WORD_RE.findall(fold)), config.get('safelist', []), elements)
+        content = BANNER_RE.sub('', content)  # the licences ship with the full stylesheet
+        self._write(target, content)
+        logger.info(f"Built {name}: {len(content)} of {len(css)} bytes above the fold")
+        return target
+
+    def _write(self, target, content):
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp = f'{target}.{os.getpid()}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as fh:
+            fh.write(content + '\n')
+        os.replace(tmp, target)
+
+    def _build_any(self, name):
+        return self.build_critical(name) if name in self.critical else self.build(name)
+
+    def _generated(self, path):
+        return path.split('/', 1)[0] in self.GENERATED_DIRS and self.storage.exists(path)
+
+    def find(self, path, all=False):
+        if path in self.bundles or path in self.critical:
+            target = self._build_any(path)
+        elif self._generated(path):
+            target = self.storage.path(path)
+        else:
+            # Like Django's finders: an empty list, which finders.find() skips
+            return []
+        return [target] if all else target
+
+    def list(self, ignore_patterns):
+        for name in [*self.bundles, *self.critical]:
+            self._build_any(name)
+            yield name, self.storage
+        for directory in self.GENERATED_DIRS:
+            if not self.storage.exists(directory):
+                continue
+            for path in get_files(self.storage, ignore_patterns, directory):
+                yield path, self.storage
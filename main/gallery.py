@@ -0,0 +1,82 @@
+# main/gallery.py
+import re
+
+from django.core.cache import cache
+from django.db.models import Q
+
+from .content import content_version
+from .models import GalleryImage
+
+# One layout block: a large image, three small ones beneath it and a tall one beside them
+GALLERY_PAGE_SIZE = 5
+GALLERY_CACHE_TIMEOUT = 60 * 60
+CURSOR_RE = re.compile(r'(-?\d{1,10})\.(\d{1,19})')
+
+
+def parse_cursor(value):
+    """'<order>.<id>' of the last image on the previous page -> (order, id); ValueError if malformed"""
+    match = CURSOR_RE.fullmatch(value)
+    if not match:
+        raise ValueError(f"Malformed cursor: {value!r}")
+    return int(match.group(1)), int(match.group(2))
+
+
+def format_cursor(image):
+    return f'{image.order}.{image.pk}'
+
+
+def arrange(images):
+    """
+    Fit a page of images (in feed order) into the layout block. Each slot
+    prefers an image whose position asks for it; empty slots take the next
+    image in order, so a page is always filled whatever positions were set.
+    """
+    remaining = list(images)
+
+    def take(position):
+        for image in remaining:
+            if image.position == position:
+                remaining.remove(image)
+                return image
+        return None
+
+    large, tall = take('large'), take('tall')
+    if large is None and remaining:
+        large = remaining.pop(0)
+    small, rest = remaining[:3], remaining[3:]
+    if tall is None and rest:
+        tall = rest.pop(0)
+    return {'large': large, 'small': small, 'tall': tall}
+
+
+def gallery_page(after=None):
+    """
+    One page of the gallery feed: {'large', 'small', 'tall', 'next',
+    'cacheable'}, where next is the cursor for the following page (None on
+    the last one). Keyset pagination on (order, id) reads one index range
+    however deep the page. Pages are cached per content version, but only
+    the first page and those after a cursor naming an active image:
+    anything else is a cursor from before a content change, or made up,
+    and is served uncached with cacheable False.
+    """
+    key = f'gallery:{content_version()}:' + ('%d.%d' % after if after else 'first')
+    page = cache.get(key)
+    if page is None:
+        images = GalleryImage.objects.filter(is_active=True).order_by('order', 'id')
+        limit = GALLERY_PAGE_SIZE + 1
+        if after is not None:
+            order, pk = after
+            # order >= gives the planner a range to seek to; the OR alone makes it scan from the start.
+            # id >= takes the cursor's own image too, so the same query shows whether it exists.
+            images = images.filter(Q(order__gte=order), Q(order__gt=order) | Q(id__gte=pk))
+            limit += 1
+        images = list(images[:limit])
+        known = after is None or (bool(images) and (images[0].order, images[0].pk) == after)
+        if after is not None and known:
+            images = images[1:]
+        more = len(images) > GALLERY_PAGE_SIZE
+        images = images[:GALLERY_PAGE_SIZE]
+        page = {**arrange(images), 'next': format_cursor(images[-1]) if more else None, 'cacheable': known}
+        if known:
+            cache.set(key, page, GALLERY_CACHE_TIMEOUT)
+    return page
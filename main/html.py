@@ -0,0 +1,38 @@
+# main/html.py
+import re
+
+# Comments first, then elements whose contents must stay byte for byte:
+# whitespace is significant in <pre>/<textarea>, and joining lines could pull
+# code after a // comment into it in <script>
+TOKEN_RE = re.compile(
+    r'(<!--.*?-->)|(<(pre|textarea|script|style)\b[^>]*>.*?</\3\s*>)',
+    re.S | re.I,
+)
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def _collapse(chunk):
+    # A run with a line break becomes one line break (keeps the source lines), any other run one space
+    return WHITESPACE_RE.sub(lambda m: '\n' if '\n' in m.group(0) else ' ', chunk)
+
+
+def minify_html(html):
+    """
+    Conservative HTML minifier: drops comments (except <!--[if ...]>
+    conditional ones) and collapses runs of whitespace, never removing
+    whitespace entirely, so inline layout is unchanged. The contents of
+    <pre>, <textarea>, <script> and <style> are left as they are.
+    """
+    out = []
+    text = []  # markup since the last kept token; a dropped comment joins the text around it
+    pos = 0
+    for match in TOKEN_RE.finditer(html):
+        text.append(html[pos:match.start()])
+        if match.group(2) or match.group(1).startswith('<!--[if'):
+            out.append(_collapse(''.join(text)))
+            out.append(match.group(0))
+            text = []
+        pos = match.end()
+    text.append(html[pos:])
+    out.append(_collapse(''.join(text)))
+    return ''.join(out).strip()
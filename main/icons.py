@@ -0,0 +1,182 @@
+# main/icons.py
+import logging
+import os
+import posixpath
+import re
+import threading
+import urllib.request
+from io import BytesIO
+from urllib.parse import urljoin
+
+from django.conf import settings
+
+from .css import _blocks, minify, purge
+
+try:
+    from fontTools import subset as font_subset
+    from fontTools.ttLib import TTFont
+except ImportError:
+    font_subset = None
+
+try:
+    import brotli  # noqa: F401  (fontTools needs it for WOFF2)
+    SUBSET_FLAVOR = 'woff2'
+except ImportError:
+    SUBSET_FLAVOR = 'woff'
+
+logger = logging.getLogger(__name__)
+
+# Generated files live here under ASSET_BUNDLE_ROOT and are served by BundleFinder
+ICON_DIR = 'icons'
+ICON_STYLESHEET = posixpath.join(ICON_DIR, 'icons.css')
+_build_lock = threading.Lock()
+
+GLYPH_RE = re.compile(r'content:\s*"\\([0-9a-fA-F]{2,6})"')
+FONT_URL_RE = re.compile(r'''url\(\s*['"]?([^'")]+?)['"]?\s*\)(?:\s*format\(\s*['"]?([\w-]+)['"]?\s*\))?''')
+# Source formats fontTools can read, best first (WOFF2 only with brotli installed)
+READABLE_FORMATS = ('woff2', 'woff', 'truetype', 'opentype') if SUBSET_FLAVOR == 'woff2' else ('woff', 'truetype', 'opentype')
+
+
+def icon_root():
+    return os.path.join(settings.ASSET_BUNDLE_ROOT, ICON_DIR)
+
+
+def fetch(url):
+    """Download url once; later builds reuse the copy under ASSET_BUNDLE_ROOT/sources"""
+    cached = os.path.join(settings.ASSET_BUNDLE_ROOT, 'sources', re.sub(r'[^\w.-]+', '_', url))
+    if not os.path.exists(cached):
+        os.makedirs(os.path.dirname(cached), exist_ok=True)
+        with urllib.request.urlopen(url, timeout=30) as response:
+            data = response.read()
+        with open(cached + '.part', 'wb') as fh:
+            fh.write(data)
+        os.replace(cached + '.part', cached)
+    with open(cached, 'rb') as fh:
+        return fh.read()
+
+
+def font_source(body, css_url):
+    """(absolute url, format) of the best font file an @font-face src offers"""
+    candidates = {}
+    for declaration in body.split(';'):
+        if declaration.strip().startswith('src'):
+            for url, fmt in FONT_URL_RE.findall(declaration):
+                fmt = fmt or {'.ttf': 'truetype', '.otf': 'opentype'}.get(posixpath.splitext(url.split('?')[0])[1], '')
+                candidates.setdefault(fmt, urljoin(css_url, url))
+    for fmt in READABLE_FORMATS:
+        if fmt in candidates:
+            return candidates[fmt], fmt
+    return None, None
+
+
+def subset_font(data, codepoints):
+    """The font cut down to codepoints, or None if it has none of them"""
+    font = TTFont(BytesIO(data))
+    cmap = font.getBestCmap() or {}
+    wanted = sorted(cp for cp in codepoints if cp in cmap)
+    if not wanted:
+        return None
+    options = font_subset.Options()
+    options.flavor = SUBSET_FLAVOR
+    options.layout_features = []
+    options.name_IDs = []
+    options.notdef_outline = True
+    subsetter = font_subset.Subsetter(options)
+    subsetter.populate(unicodes=wanted)
+    subsetter.subset(font)
+    out = BytesIO()
+    font.flavor = SUBSET_FLAVOR
+    font.save(out)
+    return out.getvalue()
+
+
+def build_icon_css(css, css_url, tokens, write_font):
+    """
+    Prune an icon font stylesheet to the classes in tokens and subset its
+    fonts to the glyphs those classes use. write_font(filename, data) stores a
+    subset and returns the URL to reference. @font-face rules whose font has
+    none of the glyphs are dropped; the rest use font-display: swap.
+    """
+    css = purge(css, tokens)
+    codepoints = {int(hex_value, 16) for hex_value in GLYPH_RE.findall(css)}
+
+    out = []
+    for prelude, body in _blocks(css):
+        if body is None:
+            out.append(prelude)
+            continue
+        if prelude.lower() != '@font-face':
+            out.append(f'{prelude}{{{body}}}')
+            continue
+        url, _fmt = font_source(body, css_url)
+        if not url:
+            logger.warning(f"No readable font in @font-face of {css_url}")
+            continue
+        data = subset_font(fetch(url), codepoints)
+        if data is None:
+            continue
+        filename = posixpath.splitext(posixpath.basename(url.split('?')[0]))[0] + '.' + SUBSET_FLAVOR
+        declarations = [
+            d.strip() for d in body.split(';')
+            if d.strip() and not d.strip().startswith(('src', 'font-display'))
+        ]
+        declarations += ['font-display:swap', f'src:url({write_font(filename, data)}) format("{SUBSET_FLAVOR}")']
+        out.append(f'@font-face{{{";".join(declarations)}}}')
+    return ''.join(out), codepoints
+
+
+def build_icons(tokens):
+    """
+    Write ICON_STYLESHEET and the subset fonts for every ICON_FONTS
+    stylesheet, keeping only the icons whose classes occur in tokens.
+    Returns {stylesheet url: number of glyphs kept}.
+    """
+    if font_subset is None:
+        raise ImportError("Subsetting icon fonts needs fontTools: pip install fonttools brotli")
+    with _build_lock:
+        return _build_icons(tokens)
+
+
+def _build_icons(tokens):
+    root = icon_root()
+    os.makedirs(root, exist_ok=True)
+    written = set()
+
+    def write_font(filename, data):
+        with open(os.path.join(root, filename), 'wb') as fh:
+            fh.write(data)
+        written.add(filename)
+        return filename
+
+    parts = []
+    report = {}
+    for css_url in settings.ICON_FONTS:
+        css, codepoints = build_icon_css(fetch(css_url).decode('utf-8'), css_url, tokens, write_font)
+        parts.append(minify(css))
+        report[css_url] = len(codepoints)
+
+    tmp = os.path.join(root, 'icons.css.part')
+    with open(tmp, 'w', encoding='utf-8') as fh:
+        fh.write('\n'.join(parts) + '\n')
+    os.replace(tmp, os.path.join(root, 'icons.css'))
+    written.add('icons.css')
+
+    # Fonts from an earlier build that are no longer needed
+    for filename in os.listdir(root):
+        if filename not in written:
+            os.remove(os.path.join(root, filename))
+    return report
+
+
+def needs_rebuild(classes):
+    """
+    True if the self-hosted icon stylesheet lacks one of classes (an admin
+    picked a new icon). Without a built stylesheet the page uses the full
+    CDN fonts, so there is nothing to rebuild.
+    """
+    try:
+        with open(os.path.join(icon_root(), 'icons.css'), encoding='utf-8') as fh:
+            css = fh.read()
+    except FileNotFoundError:
+        return False
+    return not all(re.search(rf'\.{re.escape(cls)}(?![\w-])', css) for cls in classes.split())
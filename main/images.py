@@ -0,0 +1,235 @@
+# main/images.py
+import base64
+import hashlib
+import logging
+import posixpath
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.templatetags.static import static
+from PIL import Image, ImageFilter, ImageOps
+
+from .cdn import cdn_enabled, media_url
+
+try:
+    # Pillow < 11.3 has no built-in AVIF encoder; the plugin registers one
+    import pillow_avif  # noqa: F401
+except ImportError:
+    pass
+
+logger = logging.getLogger(__name__)
+
+RENDITION_ROOT = 'renditions'
+# Admin thumbnails used to be generated here; gc_media collects what is left
+THUMBNAIL_ROOT = 'thumbs'
+# Admin preview of an image without renditions or a stored placeholder
+THUMBNAIL_PLACEHOLDER = 'admin/img/icon-unknown.svg'
+RENDITION_CACHE_TIMEOUT = 60 * 60 * 24
+PLACEHOLDER_SIZE = 16
+
+FORMAT_MIME_TYPES = {
+    'avif': 'image/avif',
+    'webp': 'image/webp',
+}
+
+FORMAT_SAVE_OPTIONS = {
+    'avif': {'quality': 55},
+    'webp': {'quality': 78, 'method': 4},
+}
+
+
+def rendition_widths():
+    return sorted(getattr(settings, 'IMAGE_RENDITION_WIDTHS', (320, 640, 960, 1280, 1920)))
+
+
+def available_formats():
+    """Configured rendition formats that this Pillow build can actually encode"""
+    Image.init()
+    wanted = getattr(settings, 'IMAGE_RENDITION_FORMATS', ('avif', 'webp'))
+    return [fmt for fmt in wanted if fmt.upper() in Image.SAVE]
+
+
+def target_widths(original_width):
+    """Widths to render for an image: the configured set, never upscaled"""
+    widths = rendition_widths()
+    targets = [w for w in widths if w < original_width]
+    if original_width <= widths[-1]:
+        targets.append(original_width)
+    return targets or [widths[-1]]
+
+
+def expected_renditions(original_width):
+    """{format: [widths]} that generate_renditions writes for an original this wide"""
+    return {fmt: target_widths(original_width) for fmt in available_formats()}
+
+
+def stored_width(fieldfile):
+    """The original's width from the ImageField's width_field, or None when not stored (yet)"""
+    width_field = getattr(fieldfile.field, 'width_field', None)
+    return getattr(fieldfile.instance, width_field, None) if width_field else None
+
+
+def rendition_dir(name):
+    stem, _ext = posixpath.splitext(name)
+    return posixpath.join(RENDITION_ROOT, stem)
+
+
+def rendition_name(name, width, fmt):
+    return posixpath.join(rendition_dir(name), f'{width}w.{fmt}')
+
+
+def _cache_key(name):
+    return 'renditions:' + hashlib.md5(name.encode()).hexdigest()
+
+
+def _prepare(img):
+    img = ImageOps.exif_transpose(img)
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGBA' if 'A' in img.getbands() or 'transparency' in img.info else 'RGB')
+    return img
+
+
+def generate_renditions(name, storage=None):
+    """Render every width/format of an uploaded image and record what was written"""
+    storage = storage or default_storage
+    formats = available_formats()
+    if not name or not formats:
+        return {}
+
+    with storage.open(name, 'rb') as fh:
+        source = Image.open(fh)
+        source.load()
+    source = _prepare(source)
+
+    written = {}
+    for width in target_widths(source.width):
+        height = max(1, round(source.height * width / source.width))
+        resized = source.resize((width, height), Image.LANCZOS) if width != source.width else source
+        for fmt in formats:
+            buffer = BytesIO()
+            resized.save(buffer, fmt.upper(), **FORMAT_SAVE_OPTIONS.get(fmt, {}))
+            target = rendition_name(name, width, fmt)
+            if storage.exists(target):
+                storage.delete(target)
+            storage.save(target, ContentFile(buffer.getvalue()))
+            written.setdefault(fmt, []).append(width)
+
+    cache.set(_cache_key(name), written, RENDITION_CACHE_TIMEOUT)
+    logger.info(f"Generated renditions for {name}: {written}")
+    return written
+
+
+def get_renditions(name, storage=None, width=None):
+    """
+    {format: [widths]} for an image, from cache or a single directory listing.
+    width is the original's width, when known.
+    """
+    if not name:
+        return {}
+    if cdn_enabled():
+        # Cloudinary resizes on request, so list the widths worth asking for
+        if width:
+            return expected_renditions(width)
+        return {fmt: rendition_widths() for fmt in available_formats()}
+    key = _cache_key(name)
+    found = cache.get(key)
+    if found is not None:
+        return found
+
+    storage = storage or default_storage
+    found = {}
+    try:
+        _dirs, files = storage.listdir(rendition_dir(name))
+    except (FileNotFoundError, NotImplementedError):
+        files = []
+    for filename in files:
+        stem, _dot, fmt = filename.partition('.')
+        if stem.endswith('w') and stem[:-1].isdigit() and fmt in FORMAT_MIME_TYPES:
+            found.setdefault(fmt, []).append(int(stem[:-1]))
+    for widths in found.values():
+        widths.sort()
+
+    # Short timeout while renditions are still being generated in the background
+    cache.set(key, found, RENDITION_CACHE_TIMEOUT if found else 60)
+    return found
+
+
+def renditions_complete(name, width=None, storage=None):
+    """
+    Whether every rendition of an image exists. A job that failed partway
+    leaves some behind, so with the original's width this checks the whole
+    expected set; without it, any rendition will do.
+    """
+    found = get_renditions(name, storage, width)
+    if not width:
+        return bool(found)
+    return all(
+        set(widths) <= set(found.get(fmt, []))
+        for fmt, widths in expected_renditions(width).items()
+    )
+
+
+def srcset(name, fmt, storage=None, width=None):
+    storage = storage or default_storage
+    widths = get_renditions(name, storage, width).get(fmt, [])
+    if cdn_enabled():
+        return ', '.join(f'{media_url(name, f"c_limit,w_{w},f_{fmt},q_auto")} {w}w' for w in widths)
+    return ', '.join(f'{storage.url(rendition_name(name, w, fmt))} {w}w' for w in widths)
+
+
+def thumbnail_url(fieldfile, size):
+    """
+    URL of a small version of an uploaded image, for admin previews: the
+    narrowest rendition at least size px wide (WebP when there is one).
+    Renditions are made in the background, so until they exist this is the
+    placeholder stored at upload (or a generic icon), never the full-size
+    original; a preview never renders an image itself.
+    """
+    name = fieldfile.name
+    if cdn_enabled():
+        return media_url(name, f'c_limit,w_{size},h_{size},f_auto,q_auto')
+
+    found = get_renditions(name, fieldfile.storage)
+    fmt = 'webp' if 'webp' in found else next(iter(found), None)
+    if fmt is None:
+        return getattr(fieldfile.instance, f'{fieldfile.field.name}_placeholder', '') or static(THUMBNAIL_PLACEHOLDER)
+    width = next((w for w in found[fmt] if w >= size), found[fmt][-1])
+    return fieldfile.storage.url(rendition_name(name, width, fmt))
+
+
+def image_metadata(fileobj):
+    """
+    Dominant colour and a tiny base64 WebP blur placeholder for an image file,
+    computed once at upload. Dimensions are stored by the ImageField itself
+    via width_field/height_field.
+    """
+    fileobj.seek(0)
+    img = Image.open(fileobj)
+    img.draft('RGB', (PLACEHOLDER_SIZE * 8, PLACEHOLDER_SIZE * 8))  # fast JPEG downscale
+    img = _prepare(img)
+    fileobj.seek(0)
+    # A backdrop would show through transparent logos/cut-outs, so those get
+    # the fully transparent colour #0000 and no placeholder
+    if img.mode == 'RGBA' and img.getextrema()[3][0] < 255:
+        return {'color': '#0000', 'placeholder': ''}
+    img = img.convert('RGB')
+
+    swatch = img.copy()
+    swatch.thumbnail((64, 64))
+    palette = swatch.quantize(colors=4)
+    _count, index = max(palette.getcolors())
+    r, g, b = palette.getpalette()[index * 3:index * 3 + 3]
+
+    tiny = img.copy()
+    tiny.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    tiny = tiny.filter(ImageFilter.GaussianBlur(1))
+    buffer = BytesIO()
+    tiny.save(buffer, 'WEBP', quality=30)
+
+    return {
+        'color': f'#{r:02x}{g:02x}{b:02x}',
+        'placeholder': 'data:image/webp;base64,' + base64.b64encode(buffer.getvalue()).decode(),
+    }
@@ -0,0 +1,132 @@
+import http.client
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0
+    return sorted_values[max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)]
+
+
+def worker_memory(master_pid):
+    """
+    {pid: (RSS, PSS) in kB} for the child processes of a gunicorn master
+    (Linux /proc). PSS splits pages shared copy-on-write between the
+    processes sharing them, so it shows what preloading saves; RSS counts
+    them in full for every worker.
+    """
+    memory = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as fh:
+                ppid = int(fh.read().rsplit(')', 1)[1].split()[1])
+            if ppid != master_pid:
+                continue
+            with open(f'/proc/{entry}/smaps_rollup') as fh:
+                fields = dict(line.split(':', 1) for line in fh if ':' in line and not line[0].isdigit())
+        except (OSError, ValueError, IndexError):
+            continue
+        memory[int(entry)] = (int(fields['Rss'].split()[0]), int(fields['Pss'].split()[0]))
+    return memory
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test running servers: requests/s and latency percentiles per URL. "
+        "To compare two setups on the same machine, start both with the same "
+        "worker count (e.g. PORT=8001 GUNICORN_WORKER_CLASS=sync gunicorn and "
+        "PORT=8002 GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn) "
+        "and pass both URLs, with --pid for each master to compare worker memory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='+', help="e.g. http://127.0.0.1:8001/ http://127.0.0.1:8002/")
+        parser.add_argument('-n', '--requests', type=int, default=1000, help="Measured requests per URL")
+        parser.add_argument('-c', '--concurrency', type=int, default=20, help="Connections kept open at once")
+        parser.add_argument('--warmup', type=int, default=50, help="Unmeasured requests first (caches, connections)")
+        parser.add_argument('--pid', type=int, action='append', default=[],
+                            help="gunicorn master PID (once per URL, same order) to report its workers' memory after the run")
+        parser.add_argument('-H', '--header', action='append', default=[], help="Extra request header, 'Name: value'")
+
+    def handle(self, *args, **options):
+        headers = {'Accept-Encoding': 'gzip, br'}
+        for header in options['header']:
+            name, sep, value = header.partition(':')
+            if not sep:
+                raise CommandError(f"Header must be 'Name: value': {header}")
+            headers[name.strip()] = value.strip()
+
+        self.stdout.write(f"{'url':<40} {'req/s':>9} {'mean':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8} {'errors':>7}")
+        pids = dict(zip(options['urls'], options['pid']))
+        for url in options['urls']:
+            self.run(url, headers, options['warmup'], 1)
+            latencies, errors, elapsed = self.run(url, headers, options['requests'], options['concurrency'])
+            latencies.sort()
+            ms = lambda seconds: f'{seconds * 1000:.1f}ms'
+            self.stdout.write(
+                f"{url:<40} {len(latencies) / elapsed:>9.1f} {ms(sum(latencies) / max(len(latencies), 1)):>8} "
+                f"{ms(percentile(latencies, 50)):>8} {ms(percentile(latencies, 90)):>8} "
+                f"{ms(percentile(latencies, 99)):>8} {ms(latencies[-1] if latencies else 0):>8} {errors:>7}"
+            )
+            if url in pids:
+                memory = worker_memory(pids[url])
+                if not memory:
+                    raise CommandError(f"No worker processes found for PID {pids[url]}")
+                rss, pss = zip(*memory.values())
+                self.stdout.write(
+                    f"  {len(memory)} workers: RSS {sum(rss) / len(rss) / 1024:.1f}MB each, "
+                    f"PSS {sum(pss) / len(pss) / 1024:.1f}MB each, {sum(pss) / 1024:.1f}MB in total"
+                )
+
+    def run(self, url, headers, total, concurrency):
+        """(latencies of successful requests, error count, wall time) for total GETs over concurrency connections"""
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https'):
+            raise CommandError(f"Not an http(s) URL: {url}")
+        path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+
+        remaining = iter(range(total))
+        lock = threading.Lock()
+        latencies, errors = [], 0
+
+        def worker():
+            nonlocal errors
+            connection = connection_class(parts.netloc, timeout=30)
+            mine, failed = [], 0
+            while True:
+                with lock:
+                    if next(remaining, None) is None:
+                        break
+                start = time.perf_counter()
+                try:
+                    connection.request('GET', path, headers=headers)
+                    response = connection.getresponse()
+                    response.read()
+                    if response.status >= 400:
+                        failed += 1
+                    else:
+                        mine.append(time.perf_counter() - start)
+                except (OSError, http.client.HTTPException):
+                    failed += 1
+                    connection.close()
+            connection.close()
+            with lock:
+                latencies.extend(mine)
+                errors += failed
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            for future in [pool.submit(worker) for _ in range(concurrency)]:
+                future.result()
+        return latencies, errors, time.perf_counter() - start
@@ -0,0 +1,32 @@
+from urllib.error import URLError
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from main.finders import purge_tokens
+from main.icons import ICON_STYLESHEET, build_icons
+
+
+class Command(BaseCommand):
+    help = (
+        "Self-host the ICON_FONTS: keep only the icons that templates, scripts and "
+        "admin content use, and subset the fonts to those glyphs"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--collect', action='store_true', help="Run collectstatic afterwards")
+
+    def handle(self, *args, **options):
+        try:
+            report = build_icons(purge_tokens())
+        except ImportError as e:
+            raise CommandError(str(e))
+        except URLError as e:
+            raise CommandError(f"Could not download the icon fonts: {e}")
+
+        for url, glyphs in report.items():
+            self.stdout.write(f"  ✓ {url}: {glyphs} glyphs")
+        self.stdout.write(self.style.SUCCESS(f"Built {ICON_STYLESHEET}"))
+
+        if options['collect']:
+            call_command('collectstatic', interactive=False, verbosity=0)
@@ -0,0 +1,94 @@
+import posixpath
+from datetime import timedelta
+
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models
+from django.utils import timezone
+
+from main.images import RENDITION_ROOT, THUMBNAIL_ROOT, rendition_dir
+from main.storage import is_content_addressed
+
+DERIVED_PREFIXES = (RENDITION_ROOT + '/', THUMBNAIL_ROOT + '/')
+
+
+def referenced_files():
+    """Every file name stored in a FileField/ImageField of any model"""
+    names = set()
+    for model in apps.get_models():
+        for field in model._meta.get_fields():
+            if isinstance(field, models.FileField) and field.concrete:
+                names.update(
+                    model._base_manager.exclude(**{field.name: ''})
+                    .exclude(**{f'{field.name}__isnull': True})
+                    .values_list(field.name, flat=True)
+                )
+    return names
+
+
+def walk(storage, path=''):
+    dirs, files = storage.listdir(path)
+    for filename in files:
+        yield posixpath.join(path, filename)
+    for dirname in dirs:
+        yield from walk(storage, posixpath.join(path, dirname))
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete media files (and their renditions/thumbnails) that no model row references any more. "
+        "Only files this site created are collected: uploads named by content hash and derived "
+        "images. Seed media checked into the repository keeps its original name and is never touched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="List orphans without deleting them")
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive',
+                            help="Delete without asking for confirmation")
+        parser.add_argument('--min-age', type=float, default=24,
+                            help="Hours a file must be untouched before it is collected, "
+                                 "so uploads whose row isn't saved yet survive (default: 24)")
+
+    def handle(self, *args, **options):
+        storage = default_storage
+        referenced = referenced_files()
+        live_derived_dirs = {rendition_dir(name) for name in referenced}
+        cutoff = timezone.now() - timedelta(hours=options['min_age'])
+
+        orphans = []
+        for name in walk(storage):
+            if name in referenced:
+                continue
+            derived = name.startswith(DERIVED_PREFIXES)
+            if derived and posixpath.dirname(name) in live_derived_dirs:
+                continue
+            if not derived and not is_content_addressed(name):
+                continue
+            try:
+                if storage.get_modified_time(name) > cutoff:
+                    continue
+            except (NotImplementedError, OSError):
+                pass
+            orphans.append((name, storage.size(name)))
+
+        freed = sum(size for _name, size in orphans)
+        for name, size in orphans:
+            self.stdout.write(f"  {name} ({size} bytes)")
+        if options['dry_run'] or not orphans:
+            self.stdout.write(self.style.SUCCESS(
+                f"Would free {freed / 1024 / 1024:.1f}MB from {len(orphans)} orphaned files "
+                f"({len(referenced)} files referenced)"
+            ))
+            return
+
+        if options['interactive']:
+            answer = input(f"Delete these {len(orphans)} files? Type 'yes' to continue, or 'no' to cancel: ")
+            if answer != 'yes':
+                raise CommandError("Media garbage collection cancelled.")
+        for name, _size in orphans:
+            storage.delete(name)
+        self.stdout.write(self.style.SUCCESS(
+            f"Freed {freed / 1024 / 1024:.1f}MB from {len(orphans)} orphaned files "
+            f"({len(referenced)} files referenced)"
+        ))
@@ -0,0 +1,143 @@
+import hashlib
+from collections import defaultdict
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from PIL import Image
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.webp'}
+# Files (relative to the project root) that reference static assets and get rewritten when duplicates are collapsed
+REFERENCE_GLOBS = ['templates/**/*.html', 'static/css/*.css', 'static/js/*.js']
+# When the same bytes live in several places, keep the copy under the first root listed
+PREFERRED_ROOTS = ['images', 'img']
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def human_size(num):
+    for unit in ('B', 'KB', 'MB'):
+        if abs(num) < 1024:
+            return f"{num:.0f}{unit}" if unit == 'B' else f"{num:.1f}{unit}"
+        num /= 1024
+    return f"{num:.1f}GB"
+
+
+class Command(BaseCommand):
+    help = "Find duplicate static images, recompress them and report the savings (--apply to write changes)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--static-dir', default=str(settings.BASE_DIR / 'static'),
+                            help="Static source tree to scan")
+        parser.add_argument('--apply', action='store_true',
+                            help="Actually collapse duplicates and write optimized files (default: report only)")
+        parser.add_argument('--min-savings', type=float, default=0.1,
+                            help="Only keep a re-encode that saves at least this fraction of the file")
+
+    def handle(self, *args, **options):
+        self.static_dir = Path(options['static_dir']).resolve()
+        self.apply = options['apply']
+        images = sorted(
+            p for p in self.static_dir.rglob('*')
+            if p.is_file() and p.suffix.lower() in IMAGE_EXTENSIONS
+            and p.relative_to(self.static_dir).parts[0] != 'lib'
+        )
+        before = sum(p.stat().st_size for p in images)
+
+        removed = self.collapse_duplicates(images)
+        images = [p for p in images if p not in removed]
+        recompressed = self.recompress(images, options['min_savings'])
+
+        dedup_saved = sum(size for size in removed.values())
+        self.stdout.write('')
+        self.stdout.write(self.style.MIGRATE_HEADING("Size report"))
+        self.stdout.write(f"  Scanned:            {len(images) + len(removed)} images, {human_size(before)}")
+        self.stdout.write(f"  Duplicates:         {len(removed)} files, {human_size(dedup_saved)}")
+        self.stdout.write(f"  Lossless recompress: {len(recompressed)} files, {human_size(sum(recompressed.values()))}")
+        total = dedup_saved + sum(recompressed.values())
+        verb = "Saved" if self.apply else "Would save"
+        self.stdout.write(self.style.SUCCESS(f"  {verb} {human_size(total)} in place ({total * 100 / max(before, 1):.0f}%)"))
+        if not self.apply:
+            self.stdout.write("  Re-run with --apply to write these changes.")
+
+    # ---------------------------------------------------------------- dedupe
+
+    def canonical(self, paths):
+        def rank(path):
+            rel = path.relative_to(self.static_dir)
+            root = rel.parts[0]
+            preferred = PREFERRED_ROOTS.index(root) if root in PREFERRED_ROOTS else len(PREFERRED_ROOTS)
+            # Plain names beat "copy" style names like "2 (2).png"
+            messy = any(c in path.name for c in ' ()')
+            return (preferred, messy, len(path.name), str(rel))
+        return min(paths, key=rank)
+
+    def collapse_duplicates(self, images):
+        by_hash = defaultdict(list)
+        for path in images:
+            by_hash[file_hash(path)].append(path)
+
+        removed = {}
+        rewrites = {}
+        for paths in by_hash.values():
+            if len(paths) < 2:
+                continue
+            keep = self.canonical(paths)
+            self.stdout.write(f"  = {keep.relative_to(self.static_dir)}")
+            for path in paths:
+                if path == keep:
+                    continue
+                self.stdout.write(f"      duplicate {path.relative_to(self.static_dir)} ({human_size(path.stat().st_size)})")
+                removed[path] = path.stat().st_size
+                rewrites[path.relative_to(self.static_dir).as_posix()] = keep.relative_to(self.static_dir).as_posix()
+
+        if self.apply and rewrites:
+            self.rewrite_references(rewrites)
+            for path in removed:
+                path.unlink()
+        return removed
+
+    def rewrite_references(self, rewrites):
+        # Project root that holds both templates/ and the static tree
+        base = self.static_dir.parent
+        for pattern in REFERENCE_GLOBS:
+            for source in base.glob(pattern):
+                text = source.read_text(encoding='utf-8')
+                updated = text
+                for old, new in rewrites.items():
+                    updated = updated.replace(f"'{old}'", f"'{new}'").replace(f'"{old}"', f'"{new}"')
+                    updated = updated.replace(f"../{old}", f"../{new}")
+                if updated != text:
+                    source.write_text(updated, encoding='utf-8')
+                    self.stdout.write(f"  ✎ updated references in {source.relative_to(base)}")
+
+    # ------------------------------------------------------------- recompress
+
+    def recompress(self, images, min_savings):
+        """Lossless: re-encode PNGs with full zlib optimisation, keeping their colour profile"""
+        recompressed = {}
+        for path in images:
+            if path.suffix.lower() != '.png':
+                continue
+            try:
+                img = Image.open(path)
+                img.load()
+            except OSError as e:
+                self.stderr.write(f"  ✗ {path.relative_to(self.static_dir)}: {e}")
+                continue
+            size = path.stat().st_size
+            buffer = BytesIO()
+            img.save(buffer, 'PNG', optimize=True, icc_profile=img.info.get('icc_profile'))
+            if buffer.tell() < size * (1 - min_savings):
+                recompressed[path] = size - buffer.tell()
+                self.stdout.write(f"  ↓ {path.relative_to(self.static_dir)}: {human_size(size)} → {human_size(buffer.tell())} (lossless PNG)")
+                if self.apply:
+                    path.write_bytes(buffer.getvalue())
+        return recompressed
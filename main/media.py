@@ -0,0 +1,166 @@
+# main/media.py
+import mimetypes
+import os
+import posixpath
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.views.decorators.http import require_safe
+
+from .storage import CONTENT_HASH_RE, IMMUTABLE_CACHE_CONTROL, is_content_addressed
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# Other names (renditions included) can be replaced in place, so clients revalidate with the ETag
+MUTABLE_CACHE_CONTROL = 'public, no-cache'
+
+
+class RangeFile:
+    """
+    File wrapper that yields only bytes [start, start + length). It keeps
+    fileno(), so gunicorn's wsgi.file_wrapper can hand the range to
+    os.sendfile() and Python never copies the bytes; servers without a file
+    wrapper fall back to bounded read() calls.
+    """
+
+    def __init__(self, fh, start, length):
+        self.fh = fh
+        self.remaining = length
+        fh.seek(start)
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.fh.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.fh.fileno()
+
+    def close(self):
+        self.fh.close()
+
+
+def file_etag(path, stat):
+    match = CONTENT_HASH_RE.search(path)
+    if match:
+        # The name is the content hash: a strong validator that survives
+        # redeploys and copies
+        return quote_etag(path[match.start():].strip('/'))
+    return quote_etag(f'{int(stat.st_mtime):x}-{stat.st_size:x}')
+
+
+def parse_range(header, size):
+    """(start, length) for a single byte range, None to ignore it, or ValueError if unsatisfiable"""
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        # Malformed or multi-range: serving the whole file is always allowed
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = min(int(last), size)
+        if length == 0:
+            raise ValueError(header)
+        return size - length, length
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError(header)
+    return start, end - start + 1
+
+
+def if_range_matches(header, etag, mtime):
+    if header.startswith(('"', 'W/')):
+        # Only a strong ETag match may be used to resume a range
+        return header == etag
+    modified = parse_http_date_safe(header)
+    return modified is not None and int(mtime) <= modified
+
+
+def sendfile_response(path, relative_path, content_type):
+    """Hand the transfer (ranges included) to the front-end server: nginx, Apache, Caddy"""
+    response = HttpResponse(content_type=content_type)
+    if settings.MEDIA_SENDFILE == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = posixpath.join(settings.MEDIA_SENDFILE_URL, relative_path)
+    else:
+        response['X-Sendfile'] = path
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Production media view: ETag/Last-Modified revalidation, single byte
+    ranges with If-Range, and zero-copy delivery either via X-Sendfile /
+    X-Accel-Redirect (MEDIA_SENDFILE) or via os.sendfile through the WSGI
+    file wrapper.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("Invalid path")
+    try:
+        stat = os.stat(full_path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404("File not found")
+    if not os.path.isfile(full_path):
+        raise Http404("File not found")
+
+    etag = file_etag(path, stat)
+    last_modified = http_date(stat.st_mtime)
+    cache_control = IMMUTABLE_CACHE_CONTROL if is_content_addressed(path) else MUTABLE_CACHE_CONTROL
+
+    if_none_match = request.headers.get('If-None-Match')
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    if if_none_match:
+        not_modified = if_none_match.strip() == '*' or etag in [tag.strip() for tag in if_none_match.split(',')]
+    else:
+        not_modified = bool(if_modified_since) and int(stat.st_mtime) <= if_modified_since
+    if not_modified:
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        response['Cache-Control'] = cache_control
+        return response
+
+    content_type, _encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+
+    if getattr(settings, 'MEDIA_SENDFILE', None):
+        response = sendfile_response(full_path, path, content_type)
+    elif request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type)
+        response['Content-Length'] = str(stat.st_size)
+    else:
+        size = stat.st_size
+        byte_range = None
+        range_header = request.headers.get('Range')
+        if_range = request.headers.get('If-Range')
+        if range_header and (not if_range or if_range_matches(if_range, etag, stat.st_mtime)):
+            try:
+                byte_range = parse_range(range_header, size)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+
+        start, length = byte_range or (0, size)
+        response = FileResponse(RangeFile(open(full_path, 'rb'), start, length), content_type=content_type)
+        response['Content-Length'] = str(length)
+        if byte_range:
+            response.status_code = 206
+            response['Content-Range'] = f'bytes {start}-{start + length - 1}/{size}'
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = last_modified
+    response['Cache-Control'] = cache_control
+    return response
@@ -0,0 +1,38 @@
+# main/metrics.py
+import logging
+import threading
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_series = defaultdict(lambda: {'count': 0, 'total': 0, 'max': 0})
+
+
+def observe(name, value):
+    """Record one measurement (bytes saved by a response, a wait in ms...) for this process"""
+    with _lock:
+        series = _series[name]
+        series['count'] += 1
+        series['total'] += value
+        series['max'] = max(series['max'], value)
+    logger.debug(f"{name}={value}")
+
+
+def incr(name, amount=1):
+    """Count an event"""
+    observe(name, amount)
+
+
+def snapshot():
+    """{name: {count, total, max, mean}} for everything recorded in this process so far"""
+    with _lock:
+        return {
+            name: {**series, 'mean': series['total'] / series['count'] if series['count'] else 0}
+            for name, series in _series.items()
+        }
+
+
+def reset():
+    with _lock:
+        _series.clear()
@@ -0,0 +1,279 @@
+# main/middleware.py
+import gzip
+import hashlib
+import re
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import has_vary_header, patch_vary_headers
+
+from . import metrics
+from .content import content_version
+from .html import minify_html
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES_RE = re.compile(r'^(text/|application/(json|javascript|xml|manifest\+json)|image/svg\+xml)')
+# How long an unused compressed/minified body stays cached; a content change orphans it sooner
+COMPRESSED_CACHE_TIMEOUT = 60 * 60
+
+
+def accepted_encodings(header):
+    """Codings an Accept-Encoding header allows (q > 0), lower-cased"""
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        match = re.search(r'q\s*=\s*([\d.]+)', params)
+        try:
+            if match and float(match.group(1)) <= 0:
+                continue
+        except ValueError:
+            continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def shared_body(response):
+    """
+    True for a body the view marked as the same for every visitor
+    (response.shared_body, see main.views.etag_response). Only those are
+    cached: the rest (admin pages, anything with a CSRF token or session
+    data) would fill the cache with one-off copies of private pages.
+    """
+    return (
+        getattr(response, 'shared_body', False)
+        and 'private' not in response.get('Cache-Control', '')
+        and not has_vary_header(response, 'Cookie')
+    )
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=getattr(settings, 'COMPRESS_BROTLI_QUALITY', 9))
+    # mtime=0 keeps the output a pure function of the content
+    return gzip.compress(content, compresslevel=9, mtime=0)
+
+
+def map_stream(response, process, finish=lambda: b''):
+    """
+    Pass each chunk of a streamed response through process(), then send
+    whatever finish() returns. Works for the async iterators async views
+    stream (under ASGI) as well as plain iterators.
+    """
+    chunks = response.streaming_content
+
+    if response.is_async:
+        async def mapped():
+            async for chunk in chunks:
+                yield process(chunk)
+            if tail := finish():
+                yield tail
+    else:
+        def mapped():
+            for chunk in chunks:
+                yield process(chunk)
+            if tail := finish():
+                yield tail
+    response.streaming_content = mapped()
+
+
+def stream_cache_key(response, name):
+    """
+    Cache key for the processed chunks of a streamed body, when the view
+    marked it as replayable (response.stream_cache_key, see
+    main.views.stream_home); None otherwise.
+    """
+    key = getattr(response, 'stream_cache_key', None)
+    return f'{key}:{name}' if key and not response.is_async else None
+
+
+def replayable(response):
+    """False once the view cleared stream_cache_key: the body it streamed was incomplete"""
+    return getattr(response, 'stream_cache_key', None) is not None
+
+
+def compress_stream(response, encoding, cache_key=None):
+    """
+    Compress a streamed body, flushing after every chunk so each one reaches
+    the client at once. With cache_key the compressed chunks are cached
+    for replaying once the whole body has gone out.
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=getattr(settings, 'COMPRESS_BROTLI_QUALITY', 9))
+        process, finish = lambda chunk: compressor.process(chunk) + compressor.flush(), compressor.finish
+    else:
+        compressor = zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container
+        process, finish = lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+    if cache_key is None:
+        map_stream(response, process, finish)
+        return
+
+    compressed = []
+
+    def record(chunk):
+        compressed.append(process(chunk))
+        return compressed[-1]
+
+    def record_finish():
+        tail = finish()
+        if replayable(response):
+            cache.set(cache_key, compressed + [tail], COMPRESSED_CACHE_TIMEOUT)
+        return tail
+
+    map_stream(response, record, record_finish)
+
+
+class CompressionMiddleware:
+    """
+    Brotli (when installed) or gzip for dynamic responses, picked by
+    Accept-Encoding. Bodies under COMPRESS_MIN_SIZE bytes go out as they
+    are. Bodies the view marks as shared (shared_body()) are cached
+    compressed per content version and digest of the uncompressed body, so
+    such a page is compressed once per content change rather than on every
+    request. Streamed pages are compressed as they
+    go, flushing after each chunk, and replayed from the cache when the
+    view marks them as the same body (stream_cache_key). Static files are
+    left to WhiteNoise and media files (FileResponse) go out as they are.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = getattr(settings, 'COMPRESS_MIN_SIZE', 1024)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            response.status_code != 200
+            or response.has_header('Content-Encoding')
+            or not COMPRESSIBLE_TYPES_RE.match(response.get('Content-Type', ''))
+            or getattr(response, 'file_to_stream', None) is not None
+            or (not response.streaming and len(response.content) < self.min_size)
+        ):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if brotli and 'br' in accepted:
+            encoding = 'br'
+        elif 'gzip' in accepted:
+            encoding = 'gzip'
+        else:
+            return response
+
+        if response.streaming:
+            # Compressed as it goes, or replayed from an earlier response with the same stream_cache_key
+            key = stream_cache_key(response, encoding)
+            cached = cache.get(key) if key else None
+            if cached is not None:
+                response.streaming_content = cached
+            else:
+                compress_stream(response, encoding, key)
+            response['Content-Encoding'] = encoding
+            del response['Content-Length']
+            return response
+
+        if shared_body(response):
+            digest = hashlib.md5(response.content, usedforsecurity=False).hexdigest()
+            key = f'compressed:{content_version()}:{encoding}:{digest}'
+            compressed = cache.get(key)
+            if compressed is None:
+                compressed = compress(response.content, encoding)
+                cache.set(key, compressed, COMPRESSED_CACHE_TIMEOUT)
+        else:
+            compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        # The bytes on the wire differ from the identity body a strong ETag describes
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
+
+
+class HTMLMinifyMiddleware:
+    """
+    Minifies rendered HTML pages (main.html.minify_html), caching the result
+    for shared pages (shared_body()) per content version and digest of the
+    rendered page; streamed pages are
+    minified chunk by chunk as they go out. The bytes saved by
+    each response go to the html_minify_bytes_saved metric (see
+    /api/metrics/). Off when
+    HTML_MINIFY is False. List it after CompressionMiddleware, so pages are
+    minified before they are compressed.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'HTML_MINIFY', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            response.status_code != 200
+            or response.has_header('Content-Encoding')
+            or not response.get('Content-Type', '').startswith('text/html')
+        ):
+            return response
+
+        if response.streaming:
+            self.minify_stream(response)
+            return response
+
+        if shared_body(response):
+            digest = hashlib.md5(response.content, usedforsecurity=False).hexdigest()
+            key = f'html:{content_version()}:{digest}'
+            minified = cache.get(key)
+            if minified is None:
+                minified = minify_html(response.content.decode(response.charset)).encode(response.charset)
+                cache.set(key, minified, COMPRESSED_CACHE_TIMEOUT)
+        else:
+            minified = minify_html(response.content.decode(response.charset)).encode(response.charset)
+
+        metrics.observe('html_minify_bytes_saved', len(response.content) - len(minified))
+        response.content = minified
+        if response.has_header('Content-Length'):
+            response['Content-Length'] = str(len(minified))
+        return response
+
+    def minify_stream(self, response):
+        """
+        Minify a streamed page chunk by chunk (each a whole template
+        section), or replay the chunks of an earlier response with the same
+        stream_cache_key
+        """
+        key = stream_cache_key(response, 'html')
+        cached = cache.get(key) if key else None
+        if cached is not None:
+            response.streaming_content, saved = cached
+            metrics.observe('html_minify_bytes_saved', saved)
+            return
+
+        charset = response.charset
+        minified_chunks = []
+        saved = 0
+
+        def process(chunk):
+            nonlocal saved
+            minified = minify_html(chunk.decode(charset)).encode(charset)
+            saved += len(chunk) - len(minified)
+            minified_chunks.append(minified)
+            return minified
+
+        def finish():
+            metrics.observe('html_minify_bytes_saved', saved)
+            if key and replayable(response):
+                cache.set(key, (minified_chunks, saved), COMPRESSED_CACHE_TIMEOUT)
+            return b''
+
+        map_stream(response, process, finish)
@@ -0,0 +1,163 @@
+# Generated by Django 4.2.10 on 2026-10-18 23:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aboutsection',
+            name='image_color',
+            field=models.CharField(blank=True, editable=False, max_length=7),
+        ),
+        migrations.AddField(
+            model_name='aboutsection',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='aboutsection',
+            name='image_placeholder',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='aboutsection',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='galleryimage',
+            name='image_color',
+            field=models.CharField(blank=True, editable=False, max_length=7),
+        ),
+        migrations.AddField(
+            model_name='galleryimage',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='galleryimage',
+            name='image_placeholder',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='galleryimage',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='heroimage',
+            name='image_color',
+            field=models.CharField(blank=True, editable=False, max_length=7),
+        ),
+        migrations.AddField(
+            model_name='heroimage',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='heroimage',
+            name='image_placeholder',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='heroimage',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='newslettercontent',
+            name='image_color',
+            field=models.CharField(blank=True, editable=False, max_length=7),
+        ),
+        migrations.AddField(
+            model_name='newslettercontent',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='newslettercontent',
+            name='image_placeholder',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='newslettercontent',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='sitesettings',
+            name='logo_color',
+            field=models.CharField(blank=True, editable=False, max_length=7),
+        ),
+        migrations.AddField(
+            model_name='sitesettings',
+            name='logo_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='sitesettings',
+            name='logo_placeholder',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='sitesettings',
+            name='logo_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='testimonial',
+            name='avatar_color',
+            field=models.CharField(blank=True, editable=False, max_length=7),
+        ),
+        migrations.AddField(
+            model_name='testimonial',
+            name='avatar_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='testimonial',
+            name='avatar_placeholder',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='testimonial',
+            name='avatar_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='aboutsection',
+            name='image',
+            field=models.ImageField(blank=True, height_field='image_height', null=True, upload_to='about/', width_field='image_width'),
+        ),
+        migrations.AlterField(
+            model_name='galleryimage',
+            name='image',
+            field=models.ImageField(height_field='image_height', upload_to='gallery/', width_field='image_width'),
+        ),
+        migrations.AlterField(
+            model_name='heroimage',
+            name='image',
+            field=models.ImageField(height_field='image_height', upload_to='hero/', width_field='image_width'),
+        ),
+        migrations.AlterField(
+            model_name='newslettercontent',
+            name='image',
+            field=models.ImageField(blank=True, height_field='image_height', null=True, upload_to='newsletter/', width_field='image_width'),
+        ),
+        migrations.AlterField(
+            model_name='sitesettings',
+            name='logo',
+            field=models.ImageField(blank=True, height_field='logo_height', null=True, upload_to='site/', width_field='logo_width'),
+        ),
+        migrations.AlterField(
+            model_name='testimonial',
+            name='avatar',
+            field=models.ImageField(blank=True, height_field='avatar_height', null=True, upload_to='testimonials/', width_field='avatar_width'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.10 on 2026-10-19 00:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0002_image_dimensions_and_placeholders'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='galleryimage',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['order', 'id'], name='gallery_feed_idx'),
+        ),
+    ]
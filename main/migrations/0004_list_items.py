@@ -0,0 +1,47 @@
+# Generated by Django 4.2.10 on 2026-10-19 00:22
+
+from django.db import migrations, models
+
+# Source text field, separator and JSON field for each model
+LIST_FIELDS = {
+    'aboutsection': ('bullet_points', '\n', 'bullet_points_items'),
+    'service': ('topics', ',', 'topics_items'),
+    'newslettercontent': ('benefits', '\n', 'benefits_items'),
+}
+
+
+def fill_list_items(apps, schema_editor):
+    # Historical models have no save() override, so parse here as Model.save() does
+    for model_name, (source, separator, target) in LIST_FIELDS.items():
+        model = apps.get_model('main', model_name)
+        rows = list(model.objects.all())
+        for row in rows:
+            text = getattr(row, source) or ''
+            setattr(row, target, [item.strip() for item in text.split(separator) if item.strip()])
+        model.objects.bulk_update(rows, [target])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0003_gallery_feed_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aboutsection',
+            name='bullet_points_items',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='newslettercontent',
+            name='benefits_items',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='topics_items',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.RunPython(fill_list_items, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.10 on 2026-10-19 00:50
+
+from django.core.files.images import get_image_dimensions
+from django.db import migrations, models
+
+
+def fill_image_dimensions(apps, schema_editor):
+    # Rows uploaded before 0002 have no stored dimensions, so ImageField
+    # would open their file every time one is loaded. Read each file once
+    # here; values_list() keeps the rows themselves from being loaded.
+    for model in apps.get_app_config('main').get_models():
+        for field in model._meta.fields:
+            if not isinstance(field, models.ImageField) or not field.width_field:
+                continue
+            rows = (
+                model.objects.filter(**{f'{field.width_field}__isnull': True})
+                .exclude(**{field.attname: ''})
+                .exclude(**{f'{field.attname}__isnull': True})
+                .values_list('pk', field.attname)
+            )
+            for pk, name in rows:
+                try:
+                    with field.storage.open(name, 'rb') as fh:
+                        width, height = get_image_dimensions(fh)
+                except (OSError, ValueError) as e:
+                    print(f"\n  Could not read {name}: {e}")
+                    continue
+                if width and height:
+                    model.objects.filter(pk=pk).update(**{field.width_field: width, field.height_field: height})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0004_list_items'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_image_dimensions, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,90 @@
+import logging
+
 from django.db import models
 
+logger = logging.getLogger(__name__)
+
+
+class ImageField(models.ImageField):
+    """
+    models.ImageField whose rows still load when their stored dimensions are
+    empty and the file can't be read (deleted, or the storage is down): the
+    image renders without width/height instead of the page failing.
+    """
+
+    def update_dimension_fields(self, instance, force=False, *args, **kwargs):
+        try:
+            super().update_dimension_fields(instance, force, *args, **kwargs)
+        except (OSError, ValueError) as e:
+            if force:
+                raise
+            logger.warning(f"Could not read the dimensions of {getattr(instance, self.attname)}: {e}")
+
+    def deconstruct(self):
+        # Same column as models.ImageField, so migrations keep referring to that
+        name, _path, args, kwargs = super().deconstruct()
+        return name, 'django.db.models.ImageField', args, kwargs
+
+
+def split_list(text, separator):
+    """Non-blank, stripped items of a separated text field: 'a, b,, c' -> ['a', 'b', 'c']"""
+    return [item.strip() for item in (text or '').split(separator) if item.strip()]
+
+
+class ListItemsQuerySet(models.QuerySet):
+    """update() that re-parses the LIST_FIELDS it changes, as ListItemsModel.save() does"""
+
+    def update(self, **kwargs):
+        changed = [source for source in self.model.LIST_FIELDS if source in kwargs]
+        if not changed:
+            return super().update(**kwargs)
+        if all(isinstance(kwargs[source], str) for source in changed):
+            for source in changed:
+                separator, target = self.model.LIST_FIELDS[source]
+                kwargs[target] = split_list(kwargs[source], separator)
+            return super().update(**kwargs)
+        # An expression (F(), Concat()...): parse what it wrote, row by row
+        pks = list(self.values_list('pk', flat=True))
+        count = super().update(**kwargs)
+        rows = list(self.model._base_manager.filter(pk__in=pks))
+        for row in rows:
+            row.parse_list_fields()
+        self.model._base_manager.bulk_update(rows, [self.model.LIST_FIELDS[source][1] for source in changed])
+        return count
+
+
+class ListItemsModel(models.Model):
+    """
+    A model with text fields admins fill in as lists, each parsed into a
+    JSON field whenever it is saved (or changed through update()), so
+    rendering a page doesn't split the text again.
+    LIST_FIELDS = {source field: (separator, JSON field)}
+    """
+    LIST_FIELDS = {}
+
+    objects = ListItemsQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    def parse_list_fields(self):
+        for source, (separator, target) in self.LIST_FIELDS.items():
+            setattr(self, target, split_list(getattr(self, source), separator))
+
+    def save(self, *args, update_fields=None, **kwargs):
+        self.parse_list_fields()
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            update_fields |= {target for source, (_, target) in self.LIST_FIELDS.items() if source in update_fields}
+        super().save(*args, update_fields=update_fields, **kwargs)
+
 # ============ SITE SETTINGS ============
 class SiteSettings(models.Model):
-    logo = models.ImageField(upload_to='site/', blank=True, null=True)
+    logo = ImageField(upload_to='site/', blank=True, null=True, width_field='logo_width', height_field='logo_height')
+    logo_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    logo_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    logo_color = models.CharField(max_length=7, blank=True, editable=False)
+    logo_placeholder = models.TextField(blank=True, editable=False)
     site_name = models.CharField(max_length=100, default='Fusion Force LLC')
     contact_email = models.EmailField(default='info@fusionforce.com')
     contact_phone = models.CharField(max_length=20, default='+1 (443) 545-4565')
@@ -23,7 +105,11 @@ class HeroImage(models.Model):
     ]
     
     title = models.CharField(max_length=200)
-    image = models.ImageField(upload_to='hero/')
+    image = ImageField(upload_to='hero/', width_field='image_width', height_field='image_height')
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_color = models.CharField(max_length=7, blank=True, editable=False)
+    image_placeholder = models.TextField(blank=True, editable=False)
     position = models.CharField(max_length=10, choices=POSITION_CHOICES, default='desktop')
     is_active = models.BooleanField(default=True)
     order = models.IntegerField(default=0)
@@ -36,29 +122,33 @@ class HeroImage(models.Model):
         return f"{self.title} ({self.get_position_display()})"
 
 # ============ ABOUT SECTION ============
-class AboutSection(models.Model):
+class AboutSection(ListItemsModel):
     title = models.CharField(max_length=200, default='Pamela Robinson')
     content = models.TextField(default='Pamela Robinson is a keynote speaker, corporate and leadership trainer, founder of Fusion Force and a recognized expert in sales and marketing support for hospitality companies.')
-    image = models.ImageField(upload_to='about/', blank=True, null=True)
+    image = ImageField(upload_to='about/', blank=True, null=True, width_field='image_width', height_field='image_height')
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_color = models.CharField(max_length=7, blank=True, editable=False)
+    image_placeholder = models.TextField(blank=True, editable=False)
     bullet_points = models.TextField(
         default="Keynote Speaker\nLeadership Trainer\nHospitality Expert\nGlobal Experience",
         help_text="Enter each bullet point on a new line"
     )
+    bullet_points_items = models.JSONField(default=list, blank=True, editable=False)
+    LIST_FIELDS = {'bullet_points': ('\n', 'bullet_points_items')}
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     @property
     def bullet_points_list(self):
-        if self.bullet_points:
-            return [point.strip() for point in self.bullet_points.split('\n') if point.strip()]
-        return []
+        return self.bullet_points_items
 
     def __str__(self):
         return self.title
 
 # ============ SERVICES SECTION ============
-class Service(models.Model):
+class Service(ListItemsModel):
     SERVICE_TYPES = [
         ('keynote', 'Keynote Speaking'),
         ('training', 'Corporate Training'),
@@ -77,6 +167,8 @@ class Service(models.Model):
         help_text="Enter topics separated by commas",
         default="Topic 1, Topic 2, Topic 3"
     )
+    topics_items = models.JSONField(default=list, blank=True, editable=False)
+    LIST_FIELDS = {'topics': (',', 'topics_items')}
     button_text = models.CharField(max_length=50, default='Learn More')
     order = models.IntegerField(default=0)
     is_active = models.BooleanField(default=True)
@@ -85,9 +177,7 @@ class Service(models.Model):
 
     @property
     def topics_list(self):
-        if self.topics:
-            return [topic.strip() for topic in self.topics.split(',') if topic.strip()]
-        return []
+        return self.topics_items
 
     class Meta:
         ordering = ['order', '-created_at']
@@ -118,7 +208,11 @@ class GalleryImage(models.Model):
     ]
     
     title = models.CharField(max_length=200)
-    image = models.ImageField(upload_to='gallery/')
+    image = ImageField(upload_to='gallery/', width_field='image_width', height_field='image_height')
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_color = models.CharField(max_length=7, blank=True, editable=False)
+    image_placeholder = models.TextField(blank=True, editable=False)
     description = models.TextField(blank=True)
     position = models.CharField(max_length=10, choices=GALLERY_POSITION_CHOICES, default='small')
     is_active = models.BooleanField(default=True)
@@ -128,6 +222,10 @@ class GalleryImage(models.Model):
 
     class Meta:
         ordering = ['order', '-created_at']
+        indexes = [
+            # Keyset pagination of the gallery feed (main.gallery)
+            models.Index(fields=['order', 'id'], name='gallery_feed_idx', condition=models.Q(is_active=True)),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.get_position_display()})"
@@ -138,7 +236,11 @@ class Testimonial(models.Model):
     position = models.CharField(max_length=200)
     company = models.CharField(max_length=200)
     content = models.TextField()
-    avatar = models.ImageField(upload_to='testimonials/', blank=True, null=True)
+    avatar = ImageField(upload_to='testimonials/', blank=True, null=True, width_field='avatar_width', height_field='avatar_height')
+    avatar_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    avatar_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    avatar_color = models.CharField(max_length=7, blank=True, editable=False)
+    avatar_placeholder = models.TextField(blank=True, editable=False)
     is_active = models.BooleanField(default=True)
     order = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -151,14 +253,20 @@ class Testimonial(models.Model):
         return f"{self.client_name} - {self.company}"
 
 # ============ NEWSLETTER SECTION ============
-class NewsletterContent(models.Model):
+class NewsletterContent(ListItemsModel):
     title = models.CharField(max_length=200, default="Monthly Newsletter")
     subtitle = models.CharField(max_length=300, default="Get exclusive insights and industry updates delivered to your inbox")
-    image = models.ImageField(upload_to='newsletter/', blank=True, null=True)
+    image = ImageField(upload_to='newsletter/', blank=True, null=True, width_field='image_width', height_field='image_height')
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_color = models.CharField(max_length=7, blank=True, editable=False)
+    image_placeholder = models.TextField(blank=True, editable=False)
     benefits = models.TextField(
         default="Leadership Strategies\nIndustry Updates\nCase Studies\nEvent Announcements\nExclusive Content\nSuccess Stories",
         help_text="Add each benefit on a new line. They will be displayed in two columns."
     )
+    benefits_items = models.JSONField(default=list, blank=True, editable=False)
+    LIST_FIELDS = {'benefits': ('\n', 'benefits_items')}
     pdf_file = models.FileField(upload_to='newsletter_pdfs/', blank=True, null=True)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -166,9 +274,7 @@ class NewsletterContent(models.Model):
 
     @property
     def benefits_list(self):
-        if self.benefits:
-            return [benefit.strip() for benefit in self.benefits.split('\n') if benefit.strip()]
-        return []
+        return self.benefits_items
 
     class Meta:
         verbose_name = "Newsletter Content"
@@ -0,0 +1,117 @@
+# main/signals.py
+import logging
+
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cdn import cdn_enabled
+from .content import bump_content_version, is_content_model
+from .icons import needs_rebuild
+from .images import generate_renditions, get_renditions, image_metadata, renditions_complete, stored_width
+from .models import SiteSettings, HeroImage, GalleryImage, AboutSection, Testimonial, NewsletterContent, Service
+from .tasks import submit, submit_on_commit
+
+logger = logging.getLogger(__name__)
+
+# Image fields that get responsive renditions (also used for admin previews)
+RENDITION_FIELDS = {
+    SiteSettings: ['logo'],
+    HeroImage: ['image'],
+    GalleryImage: ['image'],
+    AboutSection: ['image'],
+    Testimonial: ['avatar'],
+    NewsletterContent: ['image'],
+}
+RENDITION_REQUEST_TIMEOUT = 10 * 60
+
+
+def build_renditions(name, storage):
+    """Background job: the renditions, then a new content version so cached pages and API payloads list them"""
+    generate_renditions(name, storage)
+    bump_content_version()
+
+
+def queue_renditions(instance):
+    """Queue rendition jobs for any image field whose renditions don't all exist yet"""
+    for field_name in RENDITION_FIELDS.get(type(instance), []):
+        fieldfile = getattr(instance, field_name)
+        if fieldfile and not renditions_complete(fieldfile.name, stored_width(fieldfile), fieldfile.storage):
+            submit_on_commit(build_renditions, fieldfile.name, fieldfile.storage)
+
+
+def update_image_metadata(instance, force=False):
+    """
+    Fill <field>_color / <field>_placeholder for new uploads and for images
+    that don't have them yet (every image when force is set). Returns the
+    names of the fields that were updated.
+    """
+    updated = []
+    for field in instance._meta.fields:
+        if not isinstance(field, models.ImageField) or not hasattr(instance, f'{field.name}_placeholder'):
+            continue
+        fieldfile = getattr(instance, field.name)
+        if not fieldfile:
+            setattr(instance, f'{field.name}_color', '')
+            setattr(instance, f'{field.name}_placeholder', '')
+            continue
+        if fieldfile._committed and getattr(instance, f'{field.name}_color') and not force:
+            continue
+        try:
+            if fieldfile._committed:
+                with fieldfile.storage.open(fieldfile.name, 'rb') as fh:
+                    meta = image_metadata(fh)
+            else:
+                meta = image_metadata(fieldfile.file)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read image metadata for {fieldfile.name}: {e}")
+            continue
+        setattr(instance, f'{field.name}_color', meta['color'])
+        setattr(instance, f'{field.name}_placeholder', meta['placeholder'])
+        updated += [f'{field.name}_color', f'{field.name}_placeholder']
+    return updated
+
+
+def request_renditions(fieldfile):
+    """
+    Queue renditions for an image shown without any (uploaded before they
+    existed, or its job failed), at most once per RENDITION_REQUEST_TIMEOUT
+    however often the admin shows it meanwhile
+    """
+    if fieldfile and not cdn_enabled() and not get_renditions(fieldfile.name, fieldfile.storage):
+        if cache.add(f'renditions:requested:{fieldfile.name}', True, RENDITION_REQUEST_TIMEOUT):
+            submit(build_renditions, fieldfile.name, fieldfile.storage)
+
+
+@receiver(pre_save)
+def image_uploading(sender, instance, raw=False, **kwargs):
+    if raw or sender._meta.app_label != 'main':
+        return
+    update_image_metadata(instance)
+
+
+@receiver(post_save)
+def image_saved(sender, instance, raw=False, **kwargs):
+    if raw or sender not in RENDITION_FIELDS:
+        return
+    queue_renditions(instance)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def content_changed(sender, raw=False, **kwargs):
+    if raw or not is_content_model(sender):
+        return
+    # After commit, so nothing renders the old rows under the new version
+    transaction.on_commit(bump_content_version)
+
+
+@receiver(post_save, sender=Service)
+def service_saved(sender, instance, raw=False, **kwargs):
+    if raw or not instance.icon:
+        return
+    # Rebuilding is left to the build step (bin/post_compile); the page uses
+    # the full CDN icon fonts until then
+    if needs_rebuild(instance.icon):
+        logger.warning(f"Icon '{instance.icon}' is not in the self-hosted icon fonts; run build_icons on the next deploy")
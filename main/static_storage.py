@@ -0,0 +1,111 @@
+# main/static_storage.py
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from whitenoise.compress import Compressor
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+logger = logging.getLogger(__name__)
+
+
+def _compress(path, extensions):
+    """Worker-process entry point: write path.gz (and path.br with brotli)"""
+    return list(Compressor(extensions=extensions, quiet=True).compress(path))
+
+
+class IncrementalStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    CompressedManifestStaticFilesStorage that only hashes and compresses
+    what changed since the last collectstatic, compressing over a process
+    pool.
+
+    File hashes are kept in HASH_RECORD by source path, size and mtime, so
+    an unchanged file isn't read and hashed again; files whose url()s are
+    rewritten (CSS) are hashed from their new content each run, as the
+    files they point to may have changed. What was compressed is recorded
+    in COMPRESSION_MANIFEST with the .gz/.br files written: a file is
+    redone when its size or mtime differs from the last run (hashed names
+    are content addressed, so only their existence matters) or one of
+    those files is missing. The record also remembers files that don't
+    compress well, so they aren't retried every run.
+    """
+
+    COMPRESSION_MANIFEST = 'staticfiles-compressed.json'
+    HASH_RECORD = 'staticfiles-hashes.json'
+
+    def load_record(self, name):
+        try:
+            with self.open(name) as fh:
+                return json.loads(fh.read().decode('utf-8'))
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def save_record(self, name, record):
+        path = self.path(name)
+        with open(f'{path}.tmp', 'w', encoding='utf-8') as fh:
+            json.dump(record, fh, sort_keys=True)
+        os.replace(f'{path}.tmp', path)
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            yield from super().post_process(paths, dry_run, **options)
+            return
+        self.previous_hashes, self.hashes = self.load_record(self.HASH_RECORD), {}
+        yield from super().post_process(paths, dry_run, **options)
+        self.save_record(self.HASH_RECORD, self.hashes)
+
+    def file_hash(self, name, content=None):
+        # A file opened from disk (not rewritten content) can be recognised by its path and stat
+        path = getattr(content, 'name', None)
+        if isinstance(content, ContentFile) or not path or not os.path.isabs(path) or not hasattr(self, 'hashes'):
+            return super().file_hash(name, content)
+        stat = os.stat(path)
+        entry = [stat.st_size, stat.st_mtime_ns]
+        previous = self.previous_hashes.get(path)
+        digest = previous[2] if previous and previous[:2] == entry else super().file_hash(name, content)
+        self.hashes[path] = entry + [digest]
+        return digest
+
+    def compress_files(self, names):
+        extensions = getattr(settings, 'WHITENOISE_SKIP_COMPRESS_EXTENSIONS', None)
+        compressor = self.create_compressor(extensions=extensions, quiet=True)
+        previous = self.load_record(self.COMPRESSION_MANIFEST)
+        hashed = set(self.hashed_files.values())
+
+        record = {}
+        todo = []
+        for name in sorted(names):
+            if not compressor.should_compress(name):
+                continue
+            stat = os.stat(self.path(name))
+            record[name] = [stat.st_size, stat.st_mtime_ns, []]
+            last = previous.get(name)
+            if (
+                last and len(last) == 3
+                and (name in hashed or last[:2] == record[name][:2])
+                and all(os.path.exists(self.path(name + suffix)) for suffix in last[2])
+            ):
+                record[name][2] = last[2]
+                continue
+            todo.append(name)
+
+        workers = getattr(settings, 'STATIC_COMPRESS_WORKERS', None) or os.cpu_count() or 1
+        logger.info(f"Compressing {len(todo)} of {len(record)} static files ({workers} processes)")
+        if todo and workers > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(todo))) as pool:
+                results = pool.map(_compress, [self.path(name) for name in todo], [extensions] * len(todo), chunksize=8)
+                compressed = list(zip(todo, results))
+        else:
+            compressed = [(name, _compress(self.path(name), extensions)) for name in todo]
+
+        for name, paths in compressed:
+            record[name][2] = sorted(compressed_path[len(self.path(name)):] for compressed_path in paths)
+        self.save_record(self.COMPRESSION_MANIFEST, record)
+        for name, paths in compressed:
+            prefix_len = len(self.path(name)) - len(name)
+            for compressed_path in paths:
+                yield name, compressed_path[prefix_len:]
@@ -0,0 +1,327 @@
+# main/storage.py
+import hashlib
+import logging
+import os
+import posixpath
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, Storage
+from django.utils.module_loading import import_string
+
+from .cdn import media_url
+from .tasks import submit
+
+logger = logging.getLogger(__name__)
+
+# An upload named by content (hero/<hash>.jpg). Files derived from one
+# (renditions/hero/<hash>/640w.webp) don't count: generate_renditions --force
+# rewrites them in place.
+CONTENT_HASH_RE = re.compile(r'(?:^|/)[0-9a-f]{32}(?:\.\w+)?$')
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Under MEDIA_CACHE_DIR: an empty marker per upload not yet confirmed on the remote
+PENDING_DIR = '.pending'
+# A marker this old belongs to an upload that failed or whose worker exited first
+UPLOAD_RETRY_AFTER = 10 * 60
+# Eviction trims the cache to this fraction of its limit, so it doesn't run again on the next write
+EVICT_TO = 0.9
+
+
+def is_content_addressed(name):
+    """True if the file at name can never change, so it is safe to cache forever"""
+    return bool(CONTENT_HASH_RE.search(name))
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()[:32]
+
+
+def content_addressed_name(name, content):
+    """<dir>/<content hash><ext> for an upload saved as name"""
+    dirname, filename = posixpath.split(name.replace('\\', '/'))
+    ext = posixpath.splitext(filename)[1].lower()
+    return posixpath.join(dirname, content_hash(content) + ext)
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores uploads as <upload_to>/<content hash><ext> instead of the
+    user-supplied name. Identical uploads share one file, and since a name
+    only ever holds one set of bytes the files can be served as immutable.
+
+    Derived files (renditions, thumbnails) already live under their source's
+    hashed name, so they keep the name they're given.
+    """
+    derived_prefixes = ('renditions/', 'thumbs/')
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        if name.startswith(self.derived_prefixes):
+            return super().save(name, content, max_length=max_length)
+
+        name = content_addressed_name(name, content)
+        if self.exists(name):
+            # Same bytes already stored: reuse the file
+            return name
+        return super().save(name, content, max_length=max_length)
+
+    def url(self, name):
+        # Templates and admin previews ask for every image's URL on every render
+        return media_url(name)
+
+
+class LocalCacheStorage(Storage):
+    """
+    Read-through disk cache in front of a remote storage (MEDIA_REMOTE_STORAGE).
+
+    Files read from the remote are kept under MEDIA_CACHE_DIR, up to
+    MEDIA_CACHE_MAX_SIZE bytes, evicting the least recently used first, so
+    admin thumbnails and rendition jobs hit local disk instead of the network.
+    Uploads are written to the cache, named by content hash so the name is
+    known up front, and pushed to the remote in the background. Until the
+    remote has confirmed one, a marker under .pending/ keeps it from being
+    evicted or taken as already uploaded, and retry_uploads() picks it up
+    again if the upload failed or its worker exited first.
+    """
+    derived_prefixes = ContentAddressedStorage.derived_prefixes
+
+    def __init__(self, remote=None, location=None, max_size=None):
+        if remote is None:
+            remote = import_string(settings.MEDIA_REMOTE_STORAGE)()
+        self.remote = remote
+        self.local = FileSystemStorage(location=location or settings.MEDIA_CACHE_DIR)
+        self.max_size = settings.MEDIA_CACHE_MAX_SIZE if max_size is None else max_size
+        self._lock = threading.Lock()
+        self._pending = set()  # unconfirmed uploads known to this process
+        self._uploading = set()  # ... of which these are queued or running
+        self._size = None  # cache size at the last scan, plus what this process added since
+
+    # ---------------------------------------------------------------- cache
+
+    def _write_local(self, name, content):
+        path = self.local.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write under a temporary name so readers never see a partial file
+        tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.part'
+        size = 0
+        with open(tmp, 'wb') as fh:
+            for chunk in content.chunks():
+                fh.write(chunk)
+                size += len(chunk)
+        os.replace(tmp, path)
+        return size
+
+    def _fetch(self, name):
+        """Make sure name is cached locally and mark it as recently used"""
+        try:
+            os.utime(self.local.path(name))
+            return
+        except FileNotFoundError:
+            pass
+        with self.remote.open(name, 'rb') as remote_file:
+            size = self._write_local(name, remote_file)
+        self._added(size)
+
+    def _added(self, size):
+        """Count bytes written to the cache, scanning it only when that may have gone over the limit"""
+        if not self.max_size:
+            return
+        with self._lock:
+            if self._size is not None:
+                self._size += size
+                if self._size <= self.max_size:
+                    return
+        self._evict()
+
+    def _evict(self):
+        if not self.max_size:
+            return
+        entries = []
+        total = 0
+        for root, dirs, files in os.walk(self.local.location):
+            if root == self.local.location and PENDING_DIR in dirs:
+                dirs.remove(PENDING_DIR)
+            for filename in files:
+                path = os.path.join(root, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                total += stat.st_size
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        if total > self.max_size:
+            with self._lock:
+                pinned = {self.local.path(name) for name in self._pending}
+            for _mtime, size, path in sorted(entries):
+                if total <= self.max_size * EVICT_TO:
+                    break
+                if path in pinned or path.endswith('.part'):
+                    continue
+                name = os.path.relpath(path, self.local.location).replace(os.sep, '/')
+                if os.path.exists(self._marker(name)):
+                    continue  # not on the remote yet, so this is the only copy
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+        with self._lock:
+            self._size = total
+
+    # -------------------------------------------------------------- uploads
+
+    def _marker(self, name):
+        return os.path.join(self.local.location, PENDING_DIR, *name.split('/'))
+
+    def _unconfirmed(self, name):
+        return os.path.exists(self._marker(name))
+
+    def _queue_upload(self, name):
+        with self._lock:
+            if name in self._uploading:
+                return
+            self._pending.add(name)
+            self._uploading.add(name)
+        submit(self._upload, name)
+
+    def _upload(self, name):
+        try:
+            if self.remote.exists(name) and name.startswith(self.derived_prefixes):
+                self.remote.delete(name)
+            if not self.remote.exists(name):  # else the same content is already uploaded
+                with self.local.open(name, 'rb') as fh:
+                    saved = self.remote.save(name, fh)
+                if saved != name:
+                    logger.warning(f"Remote storage stored {name} as {saved}")
+            try:
+                os.remove(self._marker(name))
+            except FileNotFoundError:
+                pass
+            with self._lock:
+                self._pending.discard(name)
+        finally:
+            # A failed upload keeps its marker, for the next save or retry_uploads()
+            with self._lock:
+                self._uploading.discard(name)
+
+    def retry_uploads(self, older_than=UPLOAD_RETRY_AFTER):
+        """
+        Queue the uploads whose marker is older than older_than seconds: they
+        failed, or the worker that queued them exited first. Returns how many.
+        """
+        root = os.path.join(self.local.location, PENDING_DIR)
+        cutoff = time.time() - older_than
+        queued = 0
+        for dirpath, _dirs, files in os.walk(root):
+            for filename in files:
+                marker = os.path.join(dirpath, filename)
+                name = os.path.relpath(marker, root).replace(os.sep, '/')
+                try:
+                    if os.stat(marker).st_mtime > cutoff:
+                        continue
+                    # Claim it: other workers leave a fresh marker alone
+                    os.utime(marker)
+                except FileNotFoundError:
+                    continue
+                if not self.local.exists(name):
+                    os.remove(marker)
+                    continue
+                self._queue_upload(name)
+                queued += 1
+        if queued:
+            logger.info(f"Retrying {queued} media uploads")
+        return queued
+
+    # -------------------------------------------------------------- storage
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        if not name.startswith(self.derived_prefixes):
+            name = content_addressed_name(name, content)
+            if self.local.exists(name):
+                # Same bytes already cached; only an upload the remote confirmed counts as done
+                os.utime(self.local.path(name))
+                if self._unconfirmed(name):
+                    self._queue_upload(name)
+                return name
+
+        marker = self._marker(name)
+        os.makedirs(os.path.dirname(marker), exist_ok=True)
+        open(marker, 'wb').close()
+        size = self._write_local(name, content)
+        self._queue_upload(name)
+        self._added(size)
+        return name
+
+    def _open(self, name, mode='rb'):
+        self._fetch(name)
+        return self.local.open(name, mode)
+
+    def path(self, name):
+        self._fetch(name)
+        return self.local.path(name)
+
+    def exists(self, name):
+        return self.local.exists(name) or self.remote.exists(name)
+
+    def delete(self, name):
+        self.local.delete(name)
+        self.remote.delete(name)
+        try:
+            os.remove(self._marker(name))
+        except FileNotFoundError:
+            pass
+
+    def size(self, name):
+        if self.local.exists(name):
+            return self.local.size(name)
+        return self.remote.size(name)
+
+    def url(self, name):
+        return self.remote.url(name)
+
+    def listdir(self, path):
+        dirs, files = map(list, self.remote.listdir(path))
+        prefix = posixpath.join(path, '') if path else ''
+        with self._lock:
+            pending = [name[len(prefix):] for name in self._pending if name.startswith(prefix)]
+        for rest in pending:
+            head, sep, _tail = rest.partition('/')
+            if sep and head not in dirs:
+                dirs.append(head)
+            elif not sep and rest not in files:
+                files.append(rest)
+        return dirs, files
+
+    def get_modified_time(self, name):
+        with self._lock:
+            pending = name in self._pending
+        if pending:
+            return self.local.get_modified_time(name)
+        return self.remote.get_modified_time(name)
+
+
+def retry_pending_uploads():
+    """Called by each gunicorn worker at start: re-queue uploads a previous worker left unconfirmed"""
+    from django.core.files.storage import default_storage
+
+    retry_uploads = getattr(default_storage, 'retry_uploads', None)
+    if retry_uploads is not None:
+        retry_uploads()
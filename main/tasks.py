@@ -0,0 +1,45 @@
+# main/tasks.py
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def get_executor():
+    """Shared worker pool for background jobs (image renditions etc.)"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'BACKGROUND_WORKERS', 2),
+            thread_name_prefix='fusion-worker',
+        )
+    return _executor
+
+
+def _run(func, *args, **kwargs):
+    try:
+        return func(*args, **kwargs)
+    except Exception:
+        logger.exception(f"Background task {func.__name__} failed")
+    finally:
+        # Worker threads outlive requests, so nothing else releases their
+        # connections (or hands them back to the pool)
+        if not getattr(settings, 'BACKGROUND_TASKS_EAGER', False):
+            close_old_connections()
+
+
+def submit(func, *args, **kwargs):
+    """Run func in the worker pool, or inline when BACKGROUND_TASKS_EAGER is set"""
+    if getattr(settings, 'BACKGROUND_TASKS_EAGER', False):
+        return _run(func, *args, **kwargs)
+    return get_executor().submit(_run, func, *args, **kwargs)
+
+
+def submit_on_commit(func, *args, **kwargs):
+    """Queue func once the current transaction commits (so workers see the saved row)"""
+    transaction.on_commit(lambda: submit(func, *args, **kwargs))
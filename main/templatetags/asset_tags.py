@@ -0,0 +1,78 @@
+# main/templatetags/asset_tags.py
+import posixpath
+from functools import lru_cache
+
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.utils.safestring import mark_safe
+
+from main.content import content_version
+from main.css import URL_RE
+from main.icons import ICON_STYLESHEET, needs_rebuild
+from main.models import Service
+
+register = template.Library()
+
+
+def _load_css(path):
+    if settings.DEBUG:
+        # Through the finders, so bundles are rebuilt as sources change
+        with open(finders.find(path), encoding='utf-8') as fh:
+            css = fh.read()
+    else:
+        with staticfiles_storage.open(path) as fh:
+            css = fh.read().decode('utf-8')
+
+    base = posixpath.dirname(path)
+
+    def absolute(match):
+        quote, url = match.groups()
+        if url.startswith(('data:', 'http:', 'https:', '//', '/', '#')):
+            return match.group(0)
+        return f'url({quote}{static(posixpath.normpath(posixpath.join(base, url)))}{quote})'
+
+    # Relative url()s would otherwise resolve against the page, not the stylesheet
+    return URL_RE.sub(absolute, css).replace('</', '<\\/')
+
+
+_load_css_cached = lru_cache(maxsize=None)(_load_css)
+
+
+@register.simple_tag
+def inline_static(path):
+    """
+    Contents of a static stylesheet for a <style> block (critical CSS). Read
+    once per process; re-read on every render with DEBUG.
+    Usage: <style>{% inline_static 'bundles/critical.css' %}</style>
+    """
+    return mark_safe(_load_css(path) if settings.DEBUG else _load_css_cached(path))
+
+
+def _icon_stylesheets(version=None):
+    if settings.DEBUG:
+        built = finders.find(ICON_STYLESHEET) is not None
+    else:
+        built = staticfiles_storage.exists(ICON_STYLESHEET)
+    # The full CDN stylesheets until `manage.py build_icons` has run, and
+    # while a service uses an icon the last build didn't keep
+    if not built or needs_rebuild(' '.join(Service.objects.filter(is_active=True).values_list('icon', flat=True))):
+        return list(settings.ICON_FONTS)
+    return [static(ICON_STYLESHEET)]
+
+
+# Keyed by content_version(), so a newly picked icon is seen on the next request
+_icon_stylesheets_cached = lru_cache(maxsize=1)(_icon_stylesheets)
+
+
+@register.simple_tag
+def icon_stylesheets():
+    """
+    URLs of the icon font stylesheets: the self-hosted subset built by
+    build_icons, or the ICON_FONTS themselves when there is none or it
+    lacks an icon in use.
+    Usage: {% icon_stylesheets as icon_css %}
+    """
+    return _icon_stylesheets() if settings.DEBUG else _icon_stylesheets_cached(content_version())
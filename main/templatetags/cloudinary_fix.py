@@ -0,0 +1,21 @@
+# main/templatetags/cloudinary_fix.py
+from django import template
+
+from main.cdn import normalize_url
+
+register = template.Library()
+
+
+@register.filter
+def fix_cloudinary_url(url):
+    """
+    Fix Cloudinary URLs that are missing the colon after https or the host
+    Example: https:/res.cloudinary.com/... -> https://res.cloudinary.com/...
+    """
+    return normalize_url(url)
+
+
+@register.filter
+def is_cloudinary_url(url):
+    """Check if URL is a Cloudinary URL"""
+    return bool(url) and 'cloudinary.com' in url
@@ -0,0 +1,133 @@
+# main/templatetags/media_tags.py
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html, format_html_join
+
+from main.images import FORMAT_MIME_TYPES, available_formats, srcset, stored_width
+
+register = template.Library()
+
+# Matches the breakpoint where index.html swaps .hero-desktop for .hero-mobile
+HERO_MOBILE_MEDIA = '(max-width: 768px)'
+
+
+def _sources(image):
+    """[(mime type, srcset)] for each rendition format that exists for image"""
+    sources = []
+    for fmt in available_formats():
+        candidates = srcset(image.name, fmt, image.storage, stored_width(image))
+        if candidates:
+            sources.append((FORMAT_MIME_TYPES[fmt], candidates))
+    return sources
+
+
+def _img_tag(image, attrs):
+    """
+    <img> for an uploaded image. Intrinsic width/height and the blur
+    placeholder come from the columns stored at upload, so rendering never
+    asks the storage backend about the file.
+    """
+    img_attrs = {key.replace('_', '-'): value for key, value in attrs.items() if value is not None}
+    img_attrs.setdefault('alt', '')
+    img_attrs.setdefault('decoding', 'async')
+
+    instance, field = image.instance, image.field
+    width = getattr(instance, field.width_field, None) if getattr(field, 'width_field', None) else None
+    height = getattr(instance, field.height_field, None) if getattr(field, 'height_field', None) else None
+    if width and height:
+        img_attrs.setdefault('width', width)
+        img_attrs.setdefault('height', height)
+
+    color = getattr(instance, f'{field.name}_color', '')
+    placeholder = getattr(instance, f'{field.name}_placeholder', '')
+    if placeholder:
+        backdrop = f'background: {color} url({placeholder}) center / cover no-repeat;'
+    elif color and color != '#0000':
+        backdrop = f'background-color: {color};'
+    else:
+        backdrop = ''
+    if backdrop:
+        img_attrs['style'] = f"{backdrop} {img_attrs.get('style', '')}".strip()
+
+    return format_html('<img src="{}"{}>', image.url, flatatt(img_attrs))
+
+
+@register.simple_tag
+def responsive_image(image, sizes='100vw', **attrs):
+    """
+    <picture> for an uploaded image with AVIF/WebP srcset renditions,
+    falling back to the original file for browsers (or images) without them.
+    Lazy-loaded unless a loading attribute is passed.
+    Usage: {% responsive_image obj.image sizes="50vw" class="img-fluid" alt=obj.title %}
+    """
+    if not image:
+        return ''
+
+    attrs.setdefault('loading', 'lazy')
+    img_tag = _img_tag(image, attrs)
+    sources = [(mime, candidates, sizes) for mime, candidates in _sources(image)]
+    if not sources:
+        return img_tag
+    return format_html(
+        '<picture>{}{}</picture>',
+        format_html_join('', '<source type="{}" srcset="{}" sizes="{}">', sources),
+        img_tag,
+    )
+
+
+@register.simple_tag
+def hero_picture(desktop, mobile=None, **attrs):
+    """
+    Art-directed hero: phones get the mobile image's renditions, wider screens
+    the desktop ones. Both hero blocks render the same <picture>, so the browser
+    only ever downloads one file. Loaded eagerly at high priority for LCP.
+    """
+    mobile = mobile or desktop
+    if not desktop:
+        return ''
+
+    sources = []
+    for image, media in ((mobile, HERO_MOBILE_MEDIA), (desktop, None)):
+        candidates = _sources(image)
+        if not candidates and media:
+            # No mobile renditions yet: still keep phones off the desktop original
+            candidates = [('', image.url)]
+        for mime, srcset_value in candidates:
+            sources.append((media, mime, srcset_value))
+
+    attrs.setdefault('fetchpriority', 'high')
+    attrs.setdefault('loading', 'eager')
+    return format_html(
+        '<picture>{}{}</picture>',
+        format_html_join('', '<source{}>', (
+            (flatatt({'media': media, 'type': mime or None, 'srcset': candidates, 'sizes': '100vw'}),)
+            for media, mime, candidates in sources
+        )),
+        _img_tag(desktop, attrs),
+    )
+
+
+@register.simple_tag
+def hero_preload(desktop, mobile=None):
+    """
+    <link rel="preload"> hints for the hero image the browser will pick, so the
+    LCP fetch starts before the <picture> is parsed. Only the preferred format
+    is preloaded; browsers that can't decode it skip the hint rather than
+    fetching a file the <picture> won't use.
+    """
+    mobile = mobile or desktop
+    if not desktop:
+        return ''
+
+    links = []
+    for image, media in ((mobile, HERO_MOBILE_MEDIA), (desktop, '(min-width: 769px)')):
+        sources = _sources(image)
+        if sources:
+            mime, candidates = sources[0]
+            links.append({'type': mime, 'imagesrcset': candidates, 'imagesizes': '100vw', 'media': media})
+        else:
+            links.append({'href': image.url, 'media': media})
+    return format_html_join(
+        '\n', '<link rel="preload" as="image" fetchpriority="high"{}>',
+        ((flatatt(link),) for link in links),
+    )
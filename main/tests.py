@@ -1,3 +1,956 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import HashedFilesMixin
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.storage import FileSystemStorage
+from django.db.models import Value
+from django.db.models.functions import Concat
+import gzip
+import json
+from importlib import import_module
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.http import Http404, HttpResponse
+from django.template import Context, Template
+from django.template.loader import render_to_string
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from main.cdn import media_url, normalize_url
+from main.css import minify, purge, rewrite_urls
+from main.db_pool import database_config
+from main.db_pool.base import ConnectionPool, Database, IDLE, pool_stats
+from main.icons import font_source, needs_rebuild
+from main import api, async_views, metrics, warmup
+from main.html import minify_html
+from main.media import serve_media
+from main.images import (
+    generate_renditions, get_renditions, image_metadata, rendition_name, renditions_complete, target_widths, thumbnail_url,
+)
+from main.models import (
+    AboutSection, GalleryImage, HeroImage, ImpactResult, NewsletterContent, Service, SiteSettings, Testimonial, split_list,
+)
+from main.middleware import CompressionMiddleware, HTMLMinifyMiddleware, accepted_encodings, compress
+from main.signals import build_renditions, request_renditions
+from main.static_storage import IncrementalStaticFilesStorage
+from main.storage import ContentAddressedStorage, LocalCacheStorage
+from main.templatetags import asset_tags
+from PIL import Image, ImageCms
+
+
+def image_bytes(size=(800, 400), color=(200, 30, 30), fmt='PNG', **options):
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+
+# ============ IMAGE RENDITIONS ============
+@override_settings(IMAGE_RENDITION_WIDTHS=(320, 640, 1280), IMAGE_RENDITION_FORMATS=('webp',), CLOUDINARY_CLOUD_NAME='')
+class RenditionTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.storage = FileSystemStorage(location=self.tmp, base_url='/media/')
+        self.name = self.storage.save('gallery/a.png', ContentFile(image_bytes()))
+
+    def test_target_widths_never_upscale(self):
+        self.assertEqual(target_widths(800), [320, 640, 800])
+        self.assertEqual(target_widths(640), [320, 640])
+        self.assertEqual(target_widths(2000), [320, 640, 1280])
+        self.assertEqual(target_widths(100), [100])
+
+    def test_partly_generated_renditions_are_incomplete(self):
+        self.assertEqual(generate_renditions(self.name, self.storage), {'webp': [320, 640, 800]})
+        self.assertTrue(renditions_complete(self.name, 800, self.storage))
+
+        self.storage.delete(rendition_name(self.name, 640, 'webp'))
+        cache.clear()
+        self.assertFalse(renditions_complete(self.name, 800, self.storage))
+        # Without the original's width any rendition counts
+        self.assertTrue(renditions_complete(self.name, None, self.storage))
+
+    def test_cdn_widths_stop_at_the_original(self):
+        with self.settings(CLOUDINARY_CLOUD_NAME='demo'):
+            self.assertEqual(get_renditions(self.name, width=800), {'webp': [320, 640, 800]})
+            self.assertEqual(get_renditions(self.name), {'webp': [320, 640, 1280]})
+
+    def test_admin_thumbnails_reuse_renditions(self):
+        obj = GalleryImage(image=self.name, image_width=800, image_height=400)
+        obj.image.storage = self.storage
+        # No renditions yet: the stored placeholder (or an icon) rather than the original, queueing them once
+        self.assertIn('admin/img/icon-unknown', thumbnail_url(obj.image, 120))
+        obj.image_placeholder = 'data:image/webp;base64,UklGRg=='
+        self.assertEqual(thumbnail_url(obj.image, 120), obj.image_placeholder)
+        with mock.patch('main.signals.submit') as submit:
+            request_renditions(obj.image)
+            request_renditions(obj.image)
+        submit.assert_called_once_with(build_renditions, self.name, self.storage)
+        self.assertEqual(os.listdir(self.tmp), ['gallery'])
+
+        generate_renditions(self.name, self.storage)
+        self.assertEqual(thumbnail_url(obj.image, 120), '/media/renditions/gallery/a/320w.webp')
+        self.assertEqual(thumbnail_url(obj.image, 700), '/media/renditions/gallery/a/800w.webp')
+        self.assertEqual(thumbnail_url(obj.image, 2000), '/media/renditions/gallery/a/800w.webp')
+
+    def test_responsive_image_tag(self):
+        generate_renditions(self.name, self.storage)
+        obj = GalleryImage(image=self.name, image_width=800, image_height=400, image_color='#c81e1e')
+        obj.image.storage = self.storage
+        html = Template('{% load media_tags %}{% responsive_image obj.image sizes="50vw" alt="A" %}').render(Context({'obj': obj}))
+        self.assertHTMLEqual(html, (
+            '<picture><source type="image/webp" sizes="50vw" srcset="/media/renditions/gallery/a/320w.webp 320w, '
+            '/media/renditions/gallery/a/640w.webp 640w, /media/renditions/gallery/a/800w.webp 800w">'
+            '<img src="/media/gallery/a.png" alt="A" loading="lazy" decoding="async" width="800" height="400" '
+            'style="background-color: #c81e1e;"></picture>'
+        ))
+
+
+# ============ IMAGE METADATA ============
+class ImageMetadataTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        media = self.settings(MEDIA_ROOT=self.tmp)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def test_colour_and_placeholder(self):
+        meta = image_metadata(BytesIO(image_bytes(color=(200, 30, 30))))
+        self.assertEqual(meta['color'], '#c81e1e')
+        self.assertTrue(meta['placeholder'].startswith('data:image/webp;base64,'))
+        transparent = BytesIO()
+        Image.new('RGBA', (40, 40), (0, 0, 0, 0)).save(transparent, 'PNG')
+        self.assertEqual(image_metadata(transparent), {'color': '#0000', 'placeholder': ''})
+
+    def test_upload_stores_dimensions_and_metadata(self):
+        obj = GalleryImage.objects.create(title='A', image=SimpleUploadedFile('a.png', image_bytes((300, 200))))
+        obj.refresh_from_db()
+        self.assertEqual((obj.image_width, obj.image_height, obj.image_color), (300, 200, '#c81e1e'))
+        self.assertTrue(obj.image_placeholder)
+
+    def test_migration_fills_missing_dimensions(self):
+        obj = GalleryImage.objects.create(title='A', image=SimpleUploadedFile('a.png', image_bytes((300, 200))))
+        missing = GalleryImage.objects.create(title='B', image=SimpleUploadedFile('b.png', image_bytes((10, 10))))
+        os.remove(missing.image.path)
+        GalleryImage.objects.update(image_width=None, image_height=None)
+
+        with mock.patch('builtins.print'):
+            import_module('main.migrations.0005_fill_image_dimensions').fill_image_dimensions(apps, None)
+        obj.refresh_from_db()
+        self.assertEqual((obj.image_width, obj.image_height), (300, 200))
+        # A row whose file is gone still loads
+        with self.assertLogs('main.models', 'WARNING'):
+            self.assertIsNone(GalleryImage.objects.get(pk=missing.pk).image_width)
+
+
+
+# ============ LIST FIELDS ============
+class ListFieldTests(TestCase):
+    def test_split_list(self):
+        self.assertEqual(split_list('a, b,, c ,', ','), ['a', 'b', 'c'])
+        self.assertEqual(split_list('  Keynotes \r\n\n \t\nTraining\n', '\n'), ['Keynotes', 'Training'])
+        self.assertEqual(split_list(None, ','), [])
+
+    def test_save_with_update_fields(self):
+        about = AboutSection.objects.create(bullet_points='Speaker\nTrainer')
+        about.bullet_points = 'Speaker\n\nAuthor'
+        about.save(update_fields=['bullet_points'])
+        about.refresh_from_db()
+        self.assertEqual(about.bullet_points_list, ['Speaker', 'Author'])
+
+    def test_queryset_update(self):
+        service = Service.objects.create(title='Keynotes', service_type='keynote', description='Talks', topics='Sales')
+        Service.objects.filter(pk=service.pk).update(topics='Sales, Service')
+        service.refresh_from_db()
+        self.assertEqual(service.topics_list, ['Sales', 'Service'])
+        Service.objects.filter(pk=service.pk).update(topics=Concat('topics', Value(',, Leadership ')))
+        service.refresh_from_db()
+        self.assertEqual(service.topics_list, ['Sales', 'Service', 'Leadership'])
+
+    def test_migration_fills_items(self):
+        service = Service.objects.create(title='Keynotes', service_type='keynote', description='Talks', topics=' Sales ,,Service')
+        about = AboutSection.objects.create(bullet_points='Speaker\n  \nTrainer\n')
+        Service.objects.update(topics_items=[])
+        AboutSection.objects.update(bullet_points_items=[])
+
+        import_module('main.migrations.0004_list_items').fill_list_items(apps, None)
+        service.refresh_from_db()
+        about.refresh_from_db()
+        self.assertEqual(service.topics_items, ['Sales', 'Service'])
+        self.assertEqual(about.bullet_points_items, ['Speaker', 'Trainer'])
+
+# ============ STATIC IMAGE OPTIMISATION ============
+class OptimizeStaticTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.static = os.path.join(self.tmp, 'static')
+        for folder in ('images', 'img', os.path.join('..', 'templates')):
+            os.makedirs(os.path.join(self.static, folder))
+
+    def write(self, name, data):
+        with open(os.path.join(self.static, name), 'wb') as fh:
+            fh.write(data)
+
+    def test_duplicates_collapse_and_pngs_keep_their_profile(self):
+        icc = ImageCms.ImageCmsProfile(ImageCms.createProfile('sRGB')).tobytes()
+        self.write('images/logo.png', image_bytes((200, 200), fmt='PNG', compress_level=0, icc_profile=icc))
+        self.write('img/logo copy.png', image_bytes((50, 50), color=(1, 2, 3)))
+        self.write('images/logo (2).png', image_bytes((50, 50), color=(1, 2, 3)))
+        self.write('../templates/page.html', b'<img src="{% static \'img/logo copy.png\' %}">')
+
+        call_command('optimize_static', static_dir=self.static, apply=True, stdout=StringIO())
+        self.assertEqual(sorted(os.listdir(os.path.join(self.static, 'images'))), ['logo (2).png', 'logo.png'])
+        self.assertEqual(os.listdir(os.path.join(self.static, 'img')), [])
+        with open(os.path.join(self.tmp, 'templates', 'page.html')) as fh:
+            self.assertIn("'images/logo (2).png'", fh.read())
+
+        with Image.open(os.path.join(self.static, 'images', 'logo.png')) as img:
+            self.assertEqual(img.info.get('icc_profile'), icc)
+        self.assertLess(os.path.getsize(os.path.join(self.static, 'images', 'logo.png')), 200 * 200 * 3)
+
+
+# ============ CONTENT-ADDRESSED MEDIA ============
+class ContentAddressedMediaTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        media = self.settings(MEDIA_ROOT=self.tmp)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.storage = ContentAddressedStorage()
+
+    def test_uploads_are_named_by_content_and_deduplicated(self):
+        first = self.storage.save('hero/Photo One.JPG', ContentFile(b'same bytes'))
+        again = self.storage.save('hero/other.jpg', ContentFile(b'same bytes'))
+        self.assertRegex(first, r'^hero/[0-9a-f]{32}\.jpg$')
+        self.assertEqual(again, first)
+        self.assertEqual(os.listdir(os.path.join(self.tmp, 'hero')), [first.split('/')[1]])
+        # Derived files keep the name they're given
+        self.assertEqual(self.storage.save('renditions/hero/x/320w.webp', ContentFile(b'r')), 'renditions/hero/x/320w.webp')
+
+    def test_gc_keeps_referenced_derived_and_seed_files(self):
+        kept = GalleryImage.objects.create(title='A', image=SimpleUploadedFile('a.png', image_bytes((20, 20)))).image.name
+        orphan = self.storage.save('gallery/b.png', ContentFile(image_bytes((20, 20), color=(0, 0, 0))))
+        kept_rendition = self.storage.save(rendition_name(kept, 320, 'webp'), ContentFile(b'r'))
+        orphan_rendition = self.storage.save(rendition_name(orphan, 320, 'webp'), ContentFile(b'r'))
+        seed = FileSystemStorage(location=self.tmp).save('gallery/seed.png', ContentFile(b'seed'))
+
+        with mock.patch('builtins.input', return_value='no'), self.assertRaises(CommandError):
+            call_command('gc_media', min_age=0, stdout=StringIO())
+        self.assertTrue(self.storage.exists(orphan))
+
+        call_command('gc_media', min_age=0, interactive=False, stdout=StringIO())
+        for name in (kept, kept_rendition, seed):
+            self.assertTrue(self.storage.exists(name), name)
+        for name in (orphan, orphan_rendition):
+            self.assertFalse(self.storage.exists(name), name)
+
+
+# ============ MEDIA SERVING ============
+class ServeMediaTests(SimpleTestCase):
+    hashed = 'gallery/' + '0123456789abcdef' * 2 + '.bin'
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        media = self.settings(MEDIA_ROOT=self.tmp, MEDIA_SENDFILE=None)
+        media.enable()
+        self.addCleanup(media.disable)
+        storage = FileSystemStorage(location=self.tmp)
+        storage.save('docs/a.txt', ContentFile(b'0123456789'))
+        storage.save(self.hashed, ContentFile(b'0123456789'))
+
+    def get(self, path='/media/docs/a.txt', **headers):
+        response = self.client.get(path, headers=headers)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_whole_file_with_validators(self):
+        response, body = self.get()
+        self.assertEqual((response.status_code, body), (200, b'0123456789'))
+        self.assertEqual((response['Accept-Ranges'], response['Cache-Control']), ('bytes', 'public, no-cache'))
+        self.assertTrue(response['Last-Modified'])
+
+        response, _body = self.get('/media/' + self.hashed)
+        self.assertEqual(response['ETag'], '"%s"' % self.hashed.split('/')[1])
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_ranges(self):
+        for header, status, body, content_range in (
+            ('bytes=2-5', 206, b'2345', 'bytes 2-5/10'),
+            ('bytes=7-', 206, b'789', 'bytes 7-9/10'),
+            ('bytes=-3', 206, b'789', 'bytes 7-9/10'),
+            ('bytes=5-100', 206, b'56789', 'bytes 5-9/10'),
+            ('bytes=0-1,4-5', 200, b'0123456789', None),
+            ('bytes=20-', 416, b'', 'bytes */10'),
+        ):
+            with self.subTest(header):
+                response, content = self.get(range=header)
+                self.assertEqual((response.status_code, content), (status, body))
+                self.assertEqual(response.get('Content-Range'), content_range)
+                if status != 416:
+                    self.assertEqual(response['Content-Length'], str(len(body)))
+
+    def test_if_range(self):
+        etag = self.get()[0]['ETag']
+        last_modified = self.get()[0]['Last-Modified']
+        for if_range, status in (
+            (etag, 206),
+            ('W/' + etag, 200),
+            ('"stale"', 200),
+            (last_modified, 206),
+            ('Thu, 01 Jan 1970 00:00:00 GMT', 200),
+        ):
+            with self.subTest(if_range):
+                self.assertEqual(self.get(range='bytes=0-1', if_range=if_range)[0].status_code, status)
+
+    def test_conditional_get_and_head(self):
+        etag = self.get()[0]['ETag']
+        response, body = self.get(if_none_match=etag)
+        self.assertEqual((response.status_code, body, response['ETag']), (304, b'', etag))
+        self.assertEqual(self.get(if_none_match='"other", ' + etag)[0].status_code, 304)
+
+        response = self.client.head('/media/docs/a.txt')
+        self.assertEqual((response.status_code, response['Content-Length'], response.content), (200, '10', b''))
+        self.assertEqual(self.client.post('/media/docs/a.txt').status_code, 405)
+
+    def test_missing_and_outside_files_are_404(self):
+        for path in ('/media/docs/nope.txt', '/media/docs', '/media/../manage.py', '/media/%2e%2e/manage.py', '/media//etc/passwd'):
+            with self.subTest(path):
+                self.assertEqual(self.client.get(path).status_code, 404)
+        # Straight to the view, past any URL normalisation
+        with self.assertRaises(Http404):
+            serve_media(RequestFactory().get('/'), '../manage.py')
+
+
+# ============ MEDIA URL RESOLUTION ============
+@override_settings(CLOUDINARY_CLOUD_NAME='demo', MEDIA_URL='/media/')
+class CloudinaryURLTests(SimpleTestCase):
+    def test_builds_delivery_url_locally(self):
+        self.assertEqual(
+            media_url('hero/abc.jpg'),
+            'https://res.cloudinary.com/demo/image/upload/media/hero/abc.jpg',
+        )
+
+    def test_transformation_is_part_of_the_url(self):
+        self.assertEqual(
+            media_url('hero/abc.jpg', 'c_limit,w_640,f_auto'),
+            'https://res.cloudinary.com/demo/image/upload/c_limit,w_640,f_auto/media/hero/abc.jpg',
+        )
+
+    def test_resolved_urls_are_memoized(self):
+        media_url.cache_clear()
+        media_url('gallery/one.png', 'w_320')
+        media_url('gallery/one.png', 'w_320')
+        media_url('gallery/one.png', 'w_640')
+        info = media_url.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 2))
+
+    def test_normalize_repairs_stored_urls(self):
+        self.assertEqual(
+            normalize_url('https:/res.cloudinary.com/demo/image/media/a.jpg'),
+            'https://res.cloudinary.com/demo/image/upload/media/a.jpg',
+        )
+        self.assertEqual(
+            normalize_url('/image/upload/media/a.jpg'),
+            'https://res.cloudinary.com/demo/image/upload/media/a.jpg',
+        )
+        self.assertEqual(
+            normalize_url('https://res.cloudinary.com/demo/image/upload/v1/media/abc'),
+            'https://res.cloudinary.com/demo/image/upload/v1/media/abc.jpg',
+        )
+
+
+@override_settings(CLOUDINARY_CLOUD_NAME='', MEDIA_URL='/media/')
+class LocalMediaURLTests(SimpleTestCase):
+    def test_local_stand_in_uses_media_url(self):
+        self.assertEqual(media_url('hero/a b.jpg', 'w_640'), '/media/hero/a%20b.jpg')
+
+    def test_storage_url_goes_through_resolver(self):
+        self.assertEqual(ContentAddressedStorage().url('about/x.png'), '/media/about/x.png')
+
+
+# ============ LOCAL MEDIA CACHE ============
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class LocalCacheStorageTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        # A filesystem storage stands in for the remote (Cloudinary) one
+        self.remote = FileSystemStorage(location=os.path.join(self.tmp, 'remote'), base_url='/remote/')
+        self.storage = LocalCacheStorage(self.remote, location=os.path.join(self.tmp, 'cache'), max_size=25)
+
+    def age(self, name, seconds):
+        path = self.storage.local.path(name)
+        os.utime(path, (os.path.getmtime(path) - seconds,) * 2)
+
+    def test_save_uploads_to_remote_under_content_hash(self):
+        name = self.storage.save('hero/Photo.JPG', ContentFile(b'0123456789'))
+        self.assertRegex(name, r'^hero/[0-9a-f]{32}\.jpg$')
+        self.assertTrue(self.remote.exists(name))
+        self.assertTrue(self.storage.local.exists(name))
+        self.assertEqual(self.storage.url(name), '/remote/' + name)
+
+    def test_reads_are_served_through_the_cache(self):
+        self.remote.save('about/a.png', ContentFile(b'remote bytes'))
+        with self.storage.open('about/a.png') as fh:
+            self.assertEqual(fh.read(), b'remote bytes')
+        self.assertTrue(self.storage.local.exists('about/a.png'))
+
+        self.remote.delete('about/a.png')
+        with self.storage.open('about/a.png') as fh:
+            self.assertEqual(fh.read(), b'remote bytes')
+
+    def test_least_recently_used_files_are_evicted(self):
+        first = self.storage.save('g/1.png', ContentFile(b'a' * 10))
+        second = self.storage.save('g/2.png', ContentFile(b'b' * 10))
+        self.age(first, 20)
+        self.age(second, 30)
+        self.storage.open(first).close()  # marks first as recently used
+
+        third = self.storage.save('g/3.png', ContentFile(b'c' * 10))
+        self.assertTrue(self.storage.local.exists(first))
+        self.assertFalse(self.storage.local.exists(second))
+        self.assertTrue(self.storage.local.exists(third))
+        # Evicted files are still readable from the remote
+        with self.storage.open(second) as fh:
+            self.assertEqual(fh.read(), b'b' * 10)
+
+    def test_failed_uploads_are_retried(self):
+        with mock.patch.object(self.remote, 'save', side_effect=OSError('remote down')), self.assertLogs('main.tasks'):
+            name = self.storage.save('g/1.png', ContentFile(b'x' * 10))
+        self.assertFalse(self.remote.exists(name))
+        # The unconfirmed local copy doesn't count as uploaded: saving the same bytes retries
+        self.assertEqual(self.storage.save('g/again.png', ContentFile(b'x' * 10)), name)
+        self.assertTrue(self.remote.exists(name))
+
+    def test_uploads_left_by_another_worker_are_retried(self):
+        with mock.patch('main.storage.submit'):  # the worker exits before its upload runs
+            name = self.storage.save('g/1.png', ContentFile(b'x' * 10))
+        restarted = LocalCacheStorage(self.remote, location=self.storage.local.location, max_size=25)
+        self.assertEqual(restarted.retry_uploads(), 0)  # still fresh: may be in flight elsewhere
+        self.assertEqual(restarted.retry_uploads(older_than=-1), 1)
+        self.assertTrue(self.remote.exists(name))
+        self.assertEqual(restarted.retry_uploads(older_than=-1), 0)
+
+    def test_pending_uploads_are_never_evicted(self):
+        self.storage._pending.add('g/pending.png')
+        self.storage._write_local('g/pending.png', ContentFile(b'p' * 30))
+        self.storage._evict()
+        self.assertTrue(self.storage.local.exists('g/pending.png'))
+
+
+# ============ CSS BUNDLING ============
+class CSSTests(SimpleTestCase):
+    def test_minify_keeps_strings_and_values(self):
+        css = """
+        /* header */
+        .a > .b ,  .c:hover {
+            content: "  keep  ;  this ";
+            margin: 0 auto ;
+            width: calc(100% - 10px);
+        }
+        """
+        self.assertEqual(
+            minify(css),
+            '.a>.b,.c:hover{content:"  keep  ;  this ";margin:0 auto;width:calc(100% - 10px)}',
+        )
+
+    def test_rewrite_urls_relative_to_bundle(self):
+        css = '.x{background:url(owl.video.play.png)}.y{background:url("data:image/svg+xml,a")}'
+        self.assertEqual(
+            rewrite_urls(css, 'lib/owlcarousel/assets/owl.carousel.css', 'bundles/site.css'),
+            '.x{background:url(../lib/owlcarousel/assets/owl.video.play.png)}.y{background:url("data:image/svg+xml,a")}',
+        )
+
+    def test_purge_keeps_used_and_safelisted_rules(self):
+        css = (
+            '/*! banner */.btn{a:1}.btn-lg,.card{b:2}.modal-open .x{c:3}.show{d:4}'
+            'a:not(.unused){e:5}@media (min-width:768px){.col-md-6{f:6}.col-md-4{g:7}}'
+            '@keyframes spin{to{transform:rotate(1turn)}}'
+        )
+        self.assertEqual(
+            purge(css, {'btn', 'card', 'col-md-6'}, safelist=['sho*']),
+            '/*! banner */.btn{a:1}.card{b:2}.show{d:4}a:not(.unused){e:5}'
+            '@media (min-width:768px){.col-md-6{f:6}}',
+        )
+
+    def test_purge_keeps_keyframes_only_while_referenced(self):
+        css = '@keyframes spin{to{transform:rotate(1turn)}}.spinner{animation:spin 1s}'
+        self.assertEqual(purge(css, {'spinner'}), css)
+        self.assertEqual(purge(css, set()), '')
+
+
+# ============ STATIC COMPRESSION ============
+@override_settings(STATIC_COMPRESS_WORKERS=1)
+class IncrementalStaticFilesStorageTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.storage = IncrementalStaticFilesStorage(location=self.tmp)
+        self.storage.hashed_files = {'app.js': 'app.0123456789ab.js'}
+        for name in ('app.0123456789ab.js', 'app.js', 'site.css'):
+            self.storage.save(name, ContentFile(b'function noop() {}\n' * 200))
+
+    def compress(self):
+        return sorted(name for name, _compressed in self.storage.compress_files(
+            ['app.0123456789ab.js', 'app.js', 'site.css', 'logo.png']))
+
+    def test_only_changed_files_are_recompressed(self):
+        self.assertEqual(self.compress(), ['app.0123456789ab.js', 'app.js', 'site.css'])
+        self.assertTrue(os.path.exists(self.storage.path('site.css.gz')))
+        self.assertEqual(self.compress(), [])
+
+        # An unhashed name is redone once its contents change
+        self.storage.delete('site.css')
+        self.storage.save('site.css', ContentFile(b'.a{color:red}\n' * 300))
+        self.assertEqual(self.compress(), ['site.css'])
+
+    def test_missing_compressed_files_are_redone(self):
+        self.compress()
+        self.storage.delete('app.0123456789ab.js.gz')
+        self.assertEqual(self.compress(), ['app.0123456789ab.js'])
+        self.assertTrue(os.path.exists(self.storage.path('app.0123456789ab.js.gz')))
+
+    def test_unchanged_files_are_not_hashed_again(self):
+        source = FileSystemStorage(location=tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, source.location)
+        source.save('logo.svg', ContentFile(b'<svg></svg>' * 200))
+        source.save('site.css', ContentFile(b'.logo{background:url(logo.svg)}'))
+
+        def collect():
+            for name in ('logo.svg', 'site.css'):
+                self.storage.delete(name)
+                with source.open(name) as fh:
+                    self.storage.save(name, fh)
+            with mock.patch.object(HashedFilesMixin, 'file_hash', autospec=True, side_effect=HashedFilesMixin.file_hash) as file_hash:
+                list(self.storage.post_process({name: (source, name) for name in ('logo.svg', 'site.css')}))
+            return file_hash.call_count
+
+        first = collect()
+        hashed_logo = self.storage.hashed_files['logo.svg']
+        # Only site.css, whose url()s are rewritten, is hashed again
+        self.assertLess(collect(), first)
+        self.assertEqual(self.storage.hashed_files['logo.svg'], hashed_logo)
+
+
+# ============ ICON FONTS ============
+class IconFontTests(SimpleTestCase):
+    def test_font_source_prefers_a_readable_format(self):
+        body = (
+            'font-family:"Font Awesome 5 Free";'
+            'src:url(../webfonts/fa-solid-900.eot);'
+            'src:url(../webfonts/fa-solid-900.eot?#iefix) format("embedded-opentype"),'
+            'url(../webfonts/fa-solid-900.woff) format("woff"),url(../webfonts/fa-solid-900.ttf) format("truetype")'
+        )
+        url, fmt = font_source(body, 'https://cdn.example.com/fa/css/all.min.css')
+        self.assertIn(fmt, ('woff', 'woff2'))
+        self.assertEqual(url, 'https://cdn.example.com/fa/webfonts/fa-solid-900.woff')
+
+    def test_rebuild_only_when_an_icon_is_missing(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        with override_settings(ASSET_BUNDLE_ROOT=tmp):
+            # Not built: the CDN stylesheets cover every icon
+            self.assertFalse(needs_rebuild('fas fa-microphone'))
+            os.makedirs(os.path.join(tmp, 'icons'))
+            with open(os.path.join(tmp, 'icons', 'icons.css'), 'w') as fh:
+                fh.write('.fa,.fas{font-weight:900}.fa-microphone:before{content:"\\f130"}')
+            self.assertFalse(needs_rebuild('fas fa-microphone'))
+            self.assertTrue(needs_rebuild('fas fa-microphone-alt'))
+
+
+
+class IconStylesheetTests(TestCase):
+    def test_cdn_fonts_while_an_icon_is_missing_from_the_build(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        os.makedirs(os.path.join(tmp, 'icons'))
+        with open(os.path.join(tmp, 'icons', 'icons.css'), 'w') as fh:
+            fh.write('.fa,.fas{font-weight:900}.fa-microphone:before{content:"\\f130"}')
+        Service.objects.create(title='Keynotes', service_type='keynote', description='Talks', icon='fas fa-microphone')
+
+        with override_settings(ASSET_BUNDLE_ROOT=tmp, ICON_FONTS=['https://cdn.example.com/fa/css/all.min.css']), \
+                mock.patch('main.templatetags.asset_tags.staticfiles_storage') as storage, \
+                mock.patch('main.templatetags.asset_tags.static', lambda path: f'/static/{path}'):
+            storage.exists.return_value = True
+            self.assertEqual(asset_tags._icon_stylesheets(), ['/static/icons/icons.css'])
+            Service.objects.create(title='Training', service_type='training', description='Workshops', icon='fas fa-chalkboard')
+            self.assertEqual(asset_tags._icon_stylesheets(), ['https://cdn.example.com/fa/css/all.min.css'])
+
+# ============ RESPONSE COMPRESSION ============
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'compression-tests'}},
+    COMPRESS_MIN_SIZE=100,
+)
+class CompressionMiddlewareTests(TestCase):
+    body = b'<p>Fusion Force</p>' * 100
+
+    def get(self, body, accept='gzip, deflate', content_type='text/html; charset=utf-8', shared=True):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept)
+        response = HttpResponse(body, content_type=content_type)
+        response.shared_body = shared
+        return CompressionMiddleware(lambda r: response)(request)
+
+    def test_gzip_for_large_html(self):
+        response = self.get(self.body)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(response.content), self.body)
+
+    def test_small_or_binary_or_unaccepted_responses_are_untouched(self):
+        for response in (
+            self.get(b'<p>hi</p>'),
+            self.get(self.body, content_type='image/png'),
+            self.get(self.body, accept='gzip;q=0, identity'),
+        ):
+            self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_compresses_each_body_once(self):
+        with mock.patch('main.middleware.compress', wraps=compress) as compress_mock:
+            for _ in range(3):
+                self.get(self.body)
+        self.assertEqual(compress_mock.call_count, 1)
+
+    def test_only_shared_bodies_are_cached(self):
+        cache.clear()
+        response = self.get(self.body, shared=False)
+        self.assertEqual(gzip.decompress(response.content), self.body)
+        self.assertFalse(cache._cache)
+
+    def test_admin_pages_are_not_cached(self):
+        cache.clear()
+        self.client.force_login(User.objects.create_user('staff', password='x', is_staff=True, is_superuser=True))
+        response = self.client.get('/admin/main/service/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse([key for key in cache._cache if 'compressed:' in key or 'html:' in key])
+
+    def test_accepted_encodings(self):
+        self.assertEqual(accepted_encodings('br;q=1.0, gzip;q=0.8, *;q=0'), {'br', 'gzip'})
+
+
+# ============ HTML MINIFICATION ============
+class HTMLMinifyTests(SimpleTestCase):
+    def test_collapses_whitespace_and_drops_comments(self):
+        html = (
+            '<div>\n    <!-- Hero Start -->\n    <h1>Fusion   Force</h1>\n'
+            '    <pre>  keep\n    this </pre>\n<textarea>  a\n  b</textarea>\n'
+            '    <script>// note\n  go();</script><!--[if IE]>ie<![endif]-->\n</div>\n'
+        )
+        self.assertEqual(
+            minify_html(html),
+            '<div>\n<h1>Fusion Force</h1>\n<pre>  keep\n    this </pre>\n<textarea>  a\n  b</textarea>\n'
+            '<script>// note\n  go();</script><!--[if IE]>ie<![endif]-->\n</div>',
+        )
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'html-tests'}})
+    def test_middleware_records_bytes_saved(self):
+        metrics.reset()
+        page = '<p>\n        Fusion    Force\n    </p>\n'
+        middleware = HTMLMinifyMiddleware(lambda r: HttpResponse(page))
+        response = middleware(RequestFactory().get('/'))
+        self.assertEqual(response.content, b'<p>\nFusion Force\n</p>')
+        self.assertEqual(metrics.snapshot()['html_minify_bytes_saved']['total'], len(page) - len(response.content))
+
+
+
+# ============ METRICS ============
+class MetricsApiTests(TestCase):
+    def test_staff_only_snapshot(self):
+        metrics.reset()
+        metrics.observe('html_minify_bytes_saved', 120)
+        metrics.observe('html_minify_bytes_saved', 80)
+
+        response = self.client.get('/api/metrics/')
+        self.assertEqual(response.status_code, 302)
+
+        self.client.force_login(User.objects.create_user('staff', password='x', is_staff=True))
+        response = self.client.get('/api/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['pid'], os.getpid())
+        self.assertEqual(response.json()['db_pools'], [])
+        self.assertEqual(
+            response.json()['metrics']['html_minify_bytes_saved'],
+            {'count': 2, 'total': 200, 'max': 120, 'mean': 100},
+        )
+
+        self.client.get('/api/metrics/?reset=1')
+        self.assertEqual(self.client.get('/api/metrics/').json()['metrics'], {})
+
+# ============ STREAMED HOMEPAGE ============
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'home-tests'}},
+    # Bundles straight from the finders, without a collectstatic manifest
+    DEBUG=True,
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+)
+class StreamedHomeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_head_is_sent_before_the_sections(self):
+        response = self.client.get('/')
+        self.assertTrue(response.streaming)
+        self.assertIn('rel=preload; as=style', response['Link'])
+        chunks = list(response.streaming_content)
+        self.assertTrue(chunks[0].startswith(b'<!DOCTYPE html>'))
+        self.assertIn(b'</head>', chunks[0])
+        self.assertNotIn(b'id="about"', chunks[0])
+        self.assertTrue(b''.join(chunks).endswith(b'</html>'))
+
+    @override_settings(LAZY_SECTIONS=['gallery'])
+    def test_lazy_sections_are_fragments_with_etags(self):
+        page = b''.join(self.client.get('/').streaming_content)
+        self.assertIn(b'data-fragment="/fragments/gallery/"', page)
+        self.assertNotIn(b'id="events"', page)
+
+        response = self.client.get('/fragments/gallery/')
+        self.assertContains(response, 'id="events"')
+        again = self.client.get('/fragments/gallery/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(self.client.get('/fragments/about/').status_code, 404)
+
+
+    def test_sections_and_compressed_chunks_are_replayed(self):
+        first = b''.join(self.client.get('/', HTTP_ACCEPT_ENCODING='gzip').streaming_content)
+        with mock.patch('main.views.render_to_string') as render, mock.patch('main.middleware.minify_html') as minify:
+            again = self.client.get('/', HTTP_ACCEPT_ENCODING='gzip')
+            self.assertEqual(again['Content-Encoding'], 'gzip')
+            self.assertEqual(b''.join(again.streaming_content), first)
+            plain = b''.join(self.client.get('/').streaming_content)
+        render.assert_not_called()
+        minify.assert_not_called()
+        self.assertEqual(gzip.decompress(first), plain)
+
+    def test_a_page_missing_a_section_is_not_replayed(self):
+        def failing(template_name, *args, **kwargs):
+            if template_name.endswith('/about.html'):
+                raise ValueError("broken")
+            return render_to_string(template_name, *args, **kwargs)
+
+        with mock.patch('main.views.render_to_string', failing), self.assertLogs('main.views', 'ERROR'):
+            broken = b''.join(self.client.get('/', HTTP_ACCEPT_ENCODING='gzip').streaming_content)
+        self.assertNotIn(b'id="about"', gzip.decompress(broken))
+        fixed = b''.join(self.client.get('/', HTTP_ACCEPT_ENCODING='gzip').streaming_content)
+        self.assertIn(b'id="about"', gzip.decompress(fixed))
+
+# ============ CONTENT API ============
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'api-tests'}})
+class ContentAPITests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.service = Service.objects.create(title='Keynotes', service_type='keynote', description='Talks', topics='Sales, Service')
+
+    def test_payload_is_cached_per_content_version(self):
+        response = self.client.get('/api/content/')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        data = response.json()
+        self.assertEqual(set(data), {'site_settings', 'hero', 'about', 'services', 'results', 'gallery', 'testimonials', 'newsletter'})
+        self.assertEqual(data['services'][0]['topics'], ['Sales', 'Service'])
+
+        with self.assertNumQueries(0):
+            again = self.client.get('/api/content/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.title = 'Keynote Speaking'
+            self.service.save()
+        changed = self.client.get('/api/content/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.json()['services'][0]['title'], 'Keynote Speaking')
+
+    def test_field_selection(self):
+        data = self.client.get('/api/content/?fields=services.title,services.icon,about').json()
+        self.assertEqual(data['services'], [{'title': 'Keynotes', 'icon': 'fas fa-star'}])
+        self.assertEqual(set(data), {'services', 'about'})
+        self.assertEqual(self.client.get('/api/content/?fields=blog').status_code, 400)
+
+    def test_unknown_fields_are_rejected_before_caching(self):
+        cache.clear()
+        self.assertEqual(self.client.get('/api/content/?fields=services.nope').status_code, 400)
+        self.assertFalse(cache._cache)
+        first = self.client.get('/api/content/?fields=services.icon,services.title')
+        again = self.client.get('/api/content/?fields=services.title,,services.icon')
+        self.assertEqual(first['ETag'], again['ETag'])
+
+    def test_section_fields_match_the_serializers(self):
+        rows = {
+            'site_settings': api.site_settings_data(SiteSettings()),
+            'hero': api.hero_data(HeroImage()),
+            'about': api.about_data(AboutSection()),
+            'services': api.service_data(self.service),
+            'results': api.result_data(ImpactResult()),
+            'gallery': api.gallery_data(GalleryImage()),
+            'testimonials': api.testimonial_data(Testimonial()),
+            'newsletter': api.newsletter_data(NewsletterContent()),
+        }
+        self.assertEqual({section: set(row) for section, row in rows.items()}, api.SECTION_FIELDS)
+
+
+# ============ GALLERY FEED ============
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'gallery-tests'}})
+class GalleryFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # bulk_create skips the image signals, which would try to read the files
+        GalleryImage.objects.bulk_create(
+            GalleryImage(title=f'Event {i}', image=f'gallery/{i}.jpg', image_width=800, image_height=600, order=i // 2, position='tall' if i == 3 else 'small')
+            for i in range(12)
+        )
+
+    def test_pages_follow_the_keyset_and_fill_the_layout(self):
+        page = self.client.get('/api/gallery/').json()
+        self.assertEqual(page['tall']['title'], 'Event 3')
+        self.assertEqual(page['large']['title'], 'Event 0')
+        self.assertEqual([image['title'] for image in page['small']], ['Event 1', 'Event 2', 'Event 4'])
+
+        titles = []
+        while True:
+            titles += [image['title'] for image in [page['large'], *page['small'], page['tall']] if image]
+            if not page['next']:
+                break
+            with self.assertNumQueries(1):
+                page = self.client.get('/api/gallery/', {'after': page['next']}).json()
+        self.assertCountEqual(titles, [f'Event {i}' for i in range(12)])
+        self.assertEqual(self.client.get('/api/gallery/?after=x').status_code, 400)
+
+    def test_infinite_scroll_pages(self):
+        first = self.client.get('/api/gallery/').json()
+        response = self.client.get('/gallery/feed/', {'after': first['next']})
+        self.assertContains(response, 'Event 5')
+        self.assertContains(response, 'data-fragment="/gallery/feed/?after=')
+        again = self.client.get('/gallery/feed/', {'after': first['next']}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+    def test_only_known_cursors_are_cached(self):
+        for cursor in ('x', '1.2.3', '1_0.2', ' 1.2', '1.'):
+            self.assertEqual(self.client.get('/api/gallery/', {'after': cursor}).status_code, 400)
+            self.assertEqual(self.client.get('/gallery/feed/', {'after': cursor}).status_code, 400)
+
+        first = self.client.get('/api/gallery/').json()
+        cache.clear()
+        made_up = self.client.get('/api/gallery/', {'after': '2.999'}).json()
+        self.assertEqual(made_up['large']['title'], 'Event 6')
+        self.assertContains(self.client.get('/gallery/feed/', {'after': '2.999'}), 'Event 6')
+        self.assertFalse([key for key in cache._cache if 'gallery' in key])
+
+        self.assertEqual(self.client.get('/api/gallery/', {'after': first['next']}).status_code, 200)
+        self.assertTrue([key for key in cache._cache if 'gallery' in key])
+
+
+# ============ ASYNC VIEWS ============
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'async-tests'}},
+    DEBUG=True,
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+)
+class AsyncViewTests(TestCase):
+    async def test_home_streams_through_the_compression_middleware(self):
+        response = await async_views.home(AsyncRequestFactory().get('/'))
+        self.assertTrue(response.is_async)
+
+        middleware = CompressionMiddleware(lambda request: response)
+        compressed = middleware(RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip'))
+        page = gzip.decompress(b''.join([chunk async for chunk in compressed.streaming_content]))
+        self.assertTrue(page.strip().startswith(b'<!DOCTYPE html>'))
+        self.assertTrue(page.strip().endswith(b'</html>'))
+
+    async def test_home_head_with_self_hosted_icons(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        os.makedirs(os.path.join(tmp, 'icons'))
+        with open(os.path.join(tmp, 'icons', 'icons.css'), 'w') as fh:
+            fh.write('.fa,.fas{font-weight:900}.fa-star:before{content:"\\f005"}')
+        await Service.objects.acreate(title='Keynotes', service_type='keynote', description='Talks')
+
+        self.addCleanup(finders.get_finder.cache_clear)
+        with self.settings(ASSET_BUNDLE_ROOT=tmp, DEBUG=True, STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage'):
+            finders.get_finder.cache_clear()
+            response = await async_views.home(AsyncRequestFactory().get('/'))
+            page = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertTrue(page.strip().startswith(b'<!DOCTYPE html>'))
+        self.assertIn(b'<head>', page)
+        self.assertIn(b'icons/icons.css', page)
+
+    async def test_newsletter_submit(self):
+        post = lambda: AsyncRequestFactory().post('/api/newsletter-submit/', '{"email": "a@example.com"}', content_type='application/json')
+        first = json.loads((await async_views.newsletter_submit(post())).content)
+        again = json.loads((await async_views.newsletter_submit(post())).content)
+        self.assertEqual((first['status'], again['status']), ('success', 'info'))
+        self.assertEqual((await async_views.newsletter_submit(AsyncRequestFactory().get('/'))).status_code, 405)
+
+
+# ============ WARM-UP ============
+class WarmUpTests(TestCase):
+    def test_phases_are_timed_and_failures_skipped(self):
+        with mock.patch.dict(warmup.PHASES, {'broken': mock.Mock(side_effect=RuntimeError)}), self.assertLogs('main.warmup') as logs:
+            timings = warmup.warm_up('templates', 'broken', 'database')
+        self.assertEqual(list(timings), ['templates', 'broken', 'database'])
+        self.assertIn('broken', logs.output[-1])
+
+
+# ============ DATABASE POOL ============
+def fake_connection():
+    connection = mock.Mock(closed=0)
+    connection.info.transaction_status = IDLE
+    return connection
+
+
+class DatabasePoolTests(SimpleTestCase):
+    def setUp(self):
+        metrics.reset()
+
+    def test_database_url_params(self):
+        config = database_config('postgres://u:p@db:5432/app?sslmode=require&pool=true&pool_size=8&health_checks=false')
+        self.assertEqual(config['ENGINE'], 'main.db_pool')
+        self.assertEqual(config['OPTIONS'], {'sslmode': 'require'})
+        self.assertEqual((config['CONN_MAX_AGE'], config['CONN_HEALTH_CHECKS']), (0, False))
+        self.assertEqual(config['POOL'], {'MAX_SIZE': 8, 'TIMEOUT': 10.0, 'MAX_AGE': 600})
+        plain = database_config('postgres://u:p@db:5432/app')
+        self.assertEqual((plain['ENGINE'], plain['CONN_MAX_AGE'], plain['CONN_HEALTH_CHECKS']),
+                         ('django.db.backends.postgresql', 600, True))
+        with self.assertRaises(ImproperlyConfigured):
+            database_config('sqlite:///db.sqlite3?pool=true')
+
+    def test_connections_are_reused_and_bounded(self):
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+        first = pool.getconn(fake_connection)
+        with self.assertRaises(Database.OperationalError):
+            pool.getconn(fake_connection)
+        pool.putconn(first)
+        self.assertIs(pool.getconn(fake_connection), first)
+        stats = metrics.snapshot()
+        self.assertEqual((stats['db_pool_checkouts']['count'], stats['db_pool_connects']['count']), (2, 1))
+        self.assertEqual((stats['db_pool_waits']['count'], stats['db_pool_errors']['count']), (1, 1))
+
+    def test_broken_connections_are_replaced(self):
+        pool = ConnectionPool(max_size=2, health_check=lambda connection: not connection.broken)
+        first = pool.getconn(fake_connection)
+        first.broken = True
+        first.info.transaction_status = Database.extensions.TRANSACTION_STATUS_INERROR
+        pool.putconn(first)
+        first.rollback.assert_called_once()
+        second = pool.getconn(lambda: mock.Mock(wraps=fake_connection(), broken=False, closed=0))
+        self.assertIsNot(second, first)
+        first.close.assert_called_once()
+        self.assertEqual(pool.size, 1)
+
+    def test_stats(self):
+        pool = ConnectionPool(max_size=3)
+        first = pool.getconn(fake_connection)
+        pool.getconn(fake_connection)
+        pool.putconn(first)
+        self.assertEqual(pool.stats(), {'max_size': 3, 'size': 2, 'idle': 1, 'in_use': 1})
+        with mock.patch.dict('main.db_pool.base._pools', {(os.getpid(), 'db'): pool, (1, 'parent'): ConnectionPool()}):
+            self.assertEqual(pool_stats(), [pool.stats()])
@@ -1,18 +1,31 @@
 # main/urls.py
-from django.urls import path
+import re
+
+from django.urls import path, re_path
 from django.conf import settings
-from django.conf.urls.static import static
 
 # Import views directly (not from . import views which might cause circular import)
-from main.views import home, contact_submit, newsletter_submit, form_submit_webhook
+from main.views import home, fragment, gallery_feed, content_api, gallery_api, contact_submit, newsletter_submit, form_submit_webhook, metrics_api
+from main.media import serve_media
+
+# Under an ASGI worker, the homepage and form endpoints run as async views
+if getattr(settings, 'ASGI_VIEWS', False):
+    from main.async_views import home, contact_submit, newsletter_submit
 
 urlpatterns = [
     path('', home, name='home'),
+    path('fragments/<slug:section>/', fragment, name='fragment'),
+    path('gallery/feed/', gallery_feed, name='gallery_feed'),
+    path('api/content/', content_api, name='content_api'),
+    path('api/gallery/', gallery_api, name='gallery_api'),
     path('api/contact-submit/', contact_submit, name='contact_submit'),
     path('api/newsletter-submit/', newsletter_submit, name='newsletter_submit'),
     path('api/formsubmit-webhook/', form_submit_webhook, name='formsubmit_webhook'),
+    path('api/metrics/', metrics_api, name='metrics_api'),
 ]
 
-# Only add media serving if MEDIA_ROOT is set and not empty
+# Uploaded media (Range/ETag aware, optionally offloaded to the front-end server)
 if settings.MEDIA_ROOT:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serve_media, name='media'),
+    ]
\ No newline at end of file
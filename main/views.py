@@ -1,15 +1,32 @@
 from django.shortcuts import render, redirect
-from django.http import JsonResponse
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.templatetags.static import static
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.functional import SimpleLazyObject
+from django.views.decorators.cache import never_cache
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_GET, require_POST
 from django.utils import timezone
+import hashlib
 import json
 import logging
+import os
 from django.db import IntegrityError
 
+from django.core.cache import cache
+
+from . import metrics
+from .api import content_payload, gallery_payload, parse_fields
+from .content import content_version
+from .db_pool.base import pool_stats
+from .gallery import gallery_page, parse_cursor
+from .templatetags.asset_tags import icon_stylesheets
 from .models import (
     SiteSettings, HeroImage, AboutSection, Service,
-    ImpactResult, GalleryImage, Testimonial,
+    ImpactResult, Testimonial,
     NewsletterContent, ContactSubmission, NewsletterSubscription,
     SystemLog
 )
@@ -29,8 +46,219 @@ def log_system_action(message, level='info', source='views', request=None):
     except Exception as e:
         logger.error(f"Failed to log action: {e}")
         
+def resolve_hero_images(hero_images):
+    """Pick the (desktop, mobile) hero; each falls back to the other position"""
+    by_position = {}
+    for hero in hero_images:
+        if hero.image:
+            by_position.setdefault(hero.position, hero)
+    desktop = by_position.get('desktop') or by_position.get('mobile')
+    mobile = by_position.get('mobile') or desktop
+    return desktop, mobile
+
+# Homepage sections (templates/main/sections/) in page order
+HOME_SECTIONS = [
+    'head', 'hero', 'about', 'services', 'gallery', 'testimonials', 'newsletter', 'contact', 'footer', 'scripts',
+]
+# How long an unrequested fragment stays cached; a content change orphans it sooner
+FRAGMENT_CACHE_TIMEOUT = 60 * 60
+NO_CACHE_HEADERS = {
+    'Cache-Control': 'no-cache, no-store, must-revalidate, max-age=0',
+    'Pragma': 'no-cache',
+    'Expires': '0',
+}
+
+
+def lazy_sections():
+    return [name for name in getattr(settings, 'LAZY_SECTIONS', []) if name in HOME_SECTIONS]
+
+
+def section_context():
+    """
+    Context for the homepage sections. Querysets and the lazy single objects
+    only hit the database when a section using them renders.
+    """
+    return {
+        'site_settings': SimpleLazyObject(lambda: SiteSettings.objects.first()),
+        'about_section': SimpleLazyObject(lambda: AboutSection.objects.filter(is_active=True).first()),
+        'services': Service.objects.filter(is_active=True).order_by('order'),
+        'results': ImpactResult.objects.filter(is_active=True).order_by('order'),
+        'gallery': SimpleLazyObject(gallery_page),
+        'testimonials': Testimonial.objects.filter(is_active=True).order_by('order'),
+        'newsletter': SimpleLazyObject(lambda: NewsletterContent.objects.filter(is_active=True).first()),
+    }
+
+
+def home_context():
+    """Context for the whole page: the hero is looked up straight away because <head> preloads it"""
+    hero_desktop, hero_mobile = resolve_hero_images(HeroImage.objects.filter(is_active=True).order_by('order'))
+    return {
+        **section_context(),
+        'hero_desktop': hero_desktop,
+        'hero_mobile': hero_mobile,
+        'home_sections': HOME_SECTIONS,
+        'lazy_sections': lazy_sections(),
+    }
+
+
+def preload_links():
+    """
+    Link header for the render-blocking-soon assets. Sent with the first
+    byte of a streamed page; CDNs such as Cloudflare turn it into a
+    103 Early Hints response before the origin has answered.
+    """
+    links = [f'<{static("bundles/site.css")}>; rel=preload; as=style']
+    links += [f'<{href}>; rel=preload; as=style' for href in icon_stylesheets()]
+    links.append(f'<{static("bundles/site.js")}>; rel=preload; as=script')
+    return ', '.join(links)
+
+
+def stream_home(request):
+    """
+    The homepage as a stream: <head> (stylesheets, preloads) goes out as
+    soon as the hero is known, then each section as it is rendered, so the
+    browser fetches assets while the remaining queries run. Sections are
+    rendered once per content version, and stream_cache_key lets the
+    middleware replay its minified and compressed chunks as well.
+    """
+    context = home_context()
+    key = f'home:{content_version()}:' + ','.join(context['lazy_sections'])
+
+    def sections():
+        for name in HOME_SECTIONS:
+            template_name = 'main/sections/placeholder.html' if name in context['lazy_sections'] else f'main/sections/{name}.html'
+            html = cache.get(f'{key}:{name}')
+            if html is None:
+                try:
+                    html = render_to_string(template_name, {**context, 'section': name}, request)
+                except Exception:
+                    # Headers are already sent; leave the section out rather than cut the page short
+                    logger.exception(f"Homepage section {name} failed to render")
+                    response.stream_cache_key = None
+                    continue
+                cache.set(f'{key}:{name}', html, FRAGMENT_CACHE_TIMEOUT)
+            yield html
+
+    response = StreamingHttpResponse(sections(), content_type='text/html; charset=utf-8')
+    # The same key always streams the same page; cleared if a section fails
+    response.stream_cache_key = key
+    for header, value in NO_CACHE_HEADERS.items():
+        response[header] = value
+    if getattr(settings, 'EARLY_HINTS', True):
+        response['Link'] = preload_links()
+    return response
+
+
+def etag_response(request, body, etag, content_type=None):
+    """body with its ETag, or a 304 when the client already has it; clients revalidate on every use"""
+    response = get_conditional_response(request, etag=etag) or HttpResponse(body, content_type=content_type)
+    response['ETag'] = etag
+    # The same for every visitor, so the middleware may cache its minified/compressed copies
+    response.shared_body = True
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def cached_html(request, key, render):
+    """
+    HTML rendered once per cache key (which should include the content
+    version; every time without one) and served with an ETag, so a client
+    that has it gets a 304.
+    """
+    cached = cache.get(key) if key else None
+    if cached is None:
+        html = render()
+        cached = (html, f'"{hashlib.md5(html.encode(), usedforsecurity=False).hexdigest()}"')
+        if key:
+            cache.set(key, cached, FRAGMENT_CACHE_TIMEOUT)
+    return etag_response(request, *cached)
+
+
+def fragment(request, section):
+    """
+    One below-the-fold homepage section (LAZY_SECTIONS) as HTML, for
+    static/js/fragments.js. Rendered once per content version; the ETag
+    lets returning visitors revalidate each section and only download the
+    ones that changed.
+    """
+    if section not in lazy_sections():
+        raise Http404(f"No lazy section {section}")
+
+    return cached_html(
+        request, f'fragment:{content_version()}:{section}',
+        lambda: render_to_string(f'main/sections/{section}.html', section_context(), request),
+    )
+
+
+def gallery_feed(request):
+    """
+    The gallery page after ?after=<cursor>, for infinite scroll: each page
+    ends with a placeholder for the next one, which static/js/fragments.js
+    loads as it nears the viewport. The first page is part of the gallery
+    section itself.
+    """
+    try:
+        after = parse_cursor(request.GET['after'])
+    except (KeyError, ValueError):
+        return HttpResponseBadRequest("after=<order>.<id> required")
+
+    page = gallery_page(after)
+    return cached_html(
+        request, f'gallery-feed:{content_version()}:{after[0]}.{after[1]}' if page['cacheable'] else None,
+        lambda: render_to_string('main/sections/gallery_page.html', {'page': page}, request),
+    )
+
+
+@require_GET
+def content_api(request):
+    """
+    Read-only JSON of the homepage content (main.api.SECTIONS) for the
+    mobile app and partner sites. ?fields= narrows it down, e.g.
+    ?fields=services,about.title. Served from the cache per content version,
+    with an ETag for revalidation; CompressionMiddleware compresses it.
+    """
+    try:
+        selection = parse_fields(request.GET.get('fields', ''))
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+    return etag_response(request, *content_payload(selection), content_type='application/json')
+
+
+@require_GET
+def gallery_api(request):
+    """
+    JSON gallery feed page: {large, small, tall, next}. Without ?after= it
+    is the first page (as in /api/content/); pass next back as ?after= for
+    the one after it, until next is null.
+    """
+    try:
+        after = parse_cursor(request.GET['after']) if 'after' in request.GET else None
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'after must be an <order>.<id> cursor'}, status=400)
+    return etag_response(request, *gallery_payload(after), content_type='application/json')
+
+
+@require_GET
+@never_cache
+@staff_member_required
+def metrics_api(request):
+    """
+    JSON of main.metrics.snapshot() (html_minify_bytes_saved, db_pool_*...)
+    and the database pools' sizes, for staff. The numbers belong to the
+    worker process that answered, named by pid; ?reset=1 starts its counts
+    over.
+    """
+    data = {'pid': os.getpid(), 'metrics': metrics.snapshot(), 'db_pools': pool_stats()}
+    if request.GET.get('reset'):
+        metrics.reset()
+    return JsonResponse(data)
+
+
 def home(request):
     """Main home view - with aggressive cache prevention"""
+    if getattr(settings, 'HOME_STREAMING', True):
+        return stream_home(request)
     try:
         # Debug - print to console on EVERY request
         print("\n" + "="*80)
@@ -38,33 +266,37 @@ def home(request):
         
         # Get all data
         site_settings = SiteSettings.objects.first()
-        hero_images = HeroImage.objects.filter(is_active=True).order_by('order')
+        hero_images = list(HeroImage.objects.filter(is_active=True).order_by('order'))
+        hero_desktop, hero_mobile = resolve_hero_images(hero_images)
         about_section = AboutSection.objects.filter(is_active=True).first()
         services = Service.objects.filter(is_active=True).order_by('order')
         results = ImpactResult.objects.filter(is_active=True).order_by('order')
-        gallery_images = GalleryImage.objects.filter(is_active=True).order_by('order')[:6]
+        gallery = gallery_page()
         testimonials = Testimonial.objects.filter(is_active=True).order_by('order')
         newsletter = NewsletterContent.objects.filter(is_active=True).first()
         
         # ADD DEBUG PRINT
         print(f"\n🔥 DEBUG DATA:")
-        print(f"Hero Images: {hero_images.count()}")
         print(f"About Section: {about_section}")
         print(f"Services: {services.count()}")
-        print(f"Gallery Images: {gallery_images.count()}")
         
         context = {
             'site_settings': site_settings,
             'hero_images': hero_images,
+            'hero_desktop': hero_desktop,
+            'hero_mobile': hero_mobile,
             'about_section': about_section,
             'services': services,
             'results': results,
-            'gallery_images': gallery_images,
+            'gallery': gallery,
             'testimonials': testimonials,
             'newsletter': newsletter,
+            'home_sections': HOME_SECTIONS,
+            'lazy_sections': lazy_sections(),
         }
         
         response = render(request, 'main/index.html', context)
+        response.shared_body = True
         
        # ADD THESE LINES FOR PRODUCTION:
         response['Cache-Control'] = 'no-cache, no-store, must-revalidate, max-age=0'
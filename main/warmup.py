@@ -0,0 +1,121 @@
+# main/warmup.py
+"""
+Boot-time warm-up, so a fresh gunicorn worker serves its first request
+as fast as its thousandth. gunicorn.conf.py runs the 'templates', 'static'
+and 'urls' phases in the master before forking (the workers inherit the
+result copy-on-write) and the 'database' and 'content' phases in each
+worker once it has started.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.template.loader import get_template, render_to_string
+from django.template.loader_tags import ExtendsNode, IncludeNode
+
+logger = logging.getLogger(__name__)
+
+
+def log_startup(started):
+    """Called by fusion_force/wsgi.py and asgi.py once Django is set up (settings, apps, models)"""
+    logger.info(f"Django loaded in {(time.perf_counter() - started) * 1000:.0f}ms")
+    logger.debug(f"CSRF_TRUSTED_ORIGINS: {settings.CSRF_TRUSTED_ORIGINS}")
+    logger.debug(f"MEDIA_URL: {settings.MEDIA_URL}, MEDIA_ROOT: {settings.MEDIA_ROOT}")
+
+
+# The admin pages editors use; everything they extend or include is compiled with them
+ADMIN_TEMPLATES = [
+    'admin/index.html',
+    'admin/login.html',
+    'admin/change_list.html',
+    'admin/change_form.html',
+    'admin/delete_confirmation.html',
+]
+
+
+def _compile(name, seen):
+    """Compile a template into the cached loader, then the templates it names literally"""
+    if name in seen:
+        return
+    seen.add(name)
+    template = get_template(name).template
+    for node in template.nodelist.get_nodes_by_type((ExtendsNode, IncludeNode)):
+        expression = node.parent_name if isinstance(node, ExtendsNode) else node.template
+        if isinstance(expression.var, str) and not expression.filters:
+            _compile(expression.var, seen)
+
+
+def warm_templates():
+    from .views import HOME_SECTIONS
+
+    names = ['main/index.html', 'main/sections/placeholder.html', 'main/sections/gallery_page.html']
+    names += [f'main/sections/{section}.html' for section in HOME_SECTIONS]
+    seen = set()
+    for name in names + ADMIN_TEMPLATES:
+        _compile(name, seen)
+    return f"{len(seen)} compiled"
+
+
+def warm_static():
+    """Load the staticfiles manifest and resolve the bundle and icon font URLs"""
+    from .views import preload_links
+
+    preload_links()
+
+
+def warm_urls():
+    """Build the URL resolver (the admin alone adds a few hundred patterns) and import the views"""
+    from django.urls import reverse
+
+    reverse('admin:login')
+
+
+def warm_database():
+    """Open (and check) each database connection this worker will reuse"""
+    for connection in connections.all():
+        connection.ensure_connection()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        # Closed now only if CONN_MAX_AGE says so; a main.db_pool connection goes back to the pool
+        connection.close_if_unusable_or_obsolete()
+    return ', '.join(connections)
+
+
+def warm_content():
+    """Render the homepage sections once: fills the content version, the gallery page and the per-process caches"""
+    from .views import HOME_SECTIONS, home_context
+
+    context = home_context()
+    for section in HOME_SECTIONS:
+        render_to_string(f'main/sections/{section}.html', {**context, 'section': section})
+
+
+PHASES = {
+    'templates': warm_templates,
+    'static': warm_static,
+    'urls': warm_urls,
+    'database': warm_database,
+    'content': warm_content,
+}
+
+
+def warm_up(*phases):
+    """
+    Run warm-up phases in order and log how long each took. A failing phase
+    is logged and skipped: a cold cache only costs latency, so it must not
+    stop a worker from booting. Returns {phase: seconds}.
+    """
+    timings = {}
+    report = []
+    for phase in phases:
+        start = time.perf_counter()
+        try:
+            detail = PHASES[phase]()
+        except Exception:
+            logger.exception(f"Warm-up phase {phase} failed")
+            detail = 'failed'
+        timings[phase] = time.perf_counter() - start
+        report.append(f"{phase} {timings[phase] * 1000:.0f}ms" + (f" ({detail})" if detail else ''))
+    logger.info(f"Warm-up {sum(timings.values()) * 1000:.0f}ms: " + ', '.join(report))
+    return timings
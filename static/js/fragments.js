@@ -0,0 +1,85 @@
+// Below-the-fold sections: the page holds a placeholder with data-fragment="<url>"
+// for each, swapped for the section's HTML shortly before it scrolls into view.
+// Fragments carry ETags, so the browser revalidates them instead of downloading
+// them again. Placeholders inside a loaded fragment (the gallery's next page)
+// are watched in turn, but not loaded by in-page links.
+(function () {
+    "use strict";
+
+    var placeholders = Array.prototype.slice.call(document.querySelectorAll("[data-fragment]"));
+    if (!placeholders.length) {
+        return;
+    }
+
+    function load(placeholder) {
+        if (!placeholder.fragmentLoaded) {
+            placeholder.fragmentLoaded = fetch(placeholder.dataset.fragment, {credentials: "same-origin"})
+                .then(function (response) {
+                    if (!response.ok) {
+                        throw new Error("Fragment " + placeholder.dataset.fragment + ": HTTP " + response.status);
+                    }
+                    return response.text();
+                })
+                .then(function (html) {
+                    var content = document.createRange().createContextualFragment(html);
+                    var nested = Array.prototype.slice.call(content.querySelectorAll("[data-fragment]"));
+                    placeholder.replaceWith(content);
+                    nested.forEach(watch);
+                    document.dispatchEvent(new CustomEvent("fragment:loaded", {detail: placeholder.dataset.fragment}));
+                })
+                .catch(function (error) {
+                    placeholder.fragmentLoaded = null;  // try again next time it comes into view
+                    console.error(error);
+                });
+        }
+        return placeholder.fragmentLoaded;
+    }
+
+    function loadAll() {
+        return Promise.all(placeholders.map(load));
+    }
+
+    // In-page links (#contact) and deep links need every section in place to find their target
+    function scrollToHash(hash) {
+        loadAll().then(function () {
+            var target = document.getElementById(hash.slice(1));
+            if (target) {
+                target.scrollIntoView();
+            }
+        });
+    }
+
+    document.addEventListener("click", function (event) {
+        var link = event.target.closest && event.target.closest('a[href^="#"]');
+        var hash = link && link.getAttribute("href");
+        if (hash && hash.length > 1 && !document.getElementById(hash.slice(1))) {
+            event.preventDefault();
+            history.pushState(null, "", hash);
+            scrollToHash(hash);
+        }
+    });
+
+    if (location.hash.length > 1 && !document.getElementById(location.hash.slice(1))) {
+        scrollToHash(location.hash);
+    }
+
+    // Start a screen or so ahead, so the section is usually there before it is seen
+    var observer = "IntersectionObserver" in window && new IntersectionObserver(function (entries) {
+        entries.forEach(function (entry) {
+            if (entry.isIntersecting) {
+                observer.unobserve(entry.target);
+                load(entry.target);
+            }
+        });
+    }, {rootMargin: "800px 0px"});
+
+    // Without IntersectionObserver, sections load straight away but an
+    // infinite feed stops at its first page
+    function watch(placeholder) {
+        if (observer) {
+            observer.observe(placeholder);
+        }
+    }
+
+    placeholders.forEach(observer ? watch : load);
+})();
@@ -13,7 +13,8 @@
     
     
     // Initiate the wowjs
-    new WOW().init();
+    var wow = new WOW();
+    wow.init();
 
 
     // Sticky Navbar
@@ -104,6 +105,24 @@
             }
         }
     });
-    
+
+
+    // Testimonial slider: the track scrolls through its items twice, so
+    // append a copy here rather than rendering every testimonial twice
+    var loopTestimonials = function () {
+        $(".testimonial-track:not(.is-looping)").each(function () {
+            var $track = $(this);
+            $track.children().clone().attr("aria-hidden", "true").appendTo($track);
+            $track.addClass("is-looping");
+        });
+    };
+    loopTestimonials();
+
+    // Sections loaded later by fragments.js
+    document.addEventListener("fragment:loaded", function () {
+        wow.sync();
+        loopTestimonials();
+    });
+
 })(jQuery);
 